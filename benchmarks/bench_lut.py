@@ -0,0 +1,28 @@
+import os
+import tempfile
+import tracemalloc
+
+from common import load_module, best_time, result
+
+# time and peak python memory of the lut generator
+
+generate_sine_lut = load_module('generate_sine_lut', 'tools/generate_sine_lut.py')
+
+FORMATS = {'default': ('hex', 'vh'), 'all': generate_sine_lut.FORMATS}
+
+def run(results, quick=False):
+    widths = range(8, 13, 2) if quick else range(8, 21, 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, 'sine_lut')
+        for PHASE_DW in widths:
+            for name, formats in FORMATS.items():
+                params = dict(PHASE_DW=PHASE_DW, OUT_DW=16, formats=name)
+                create = lambda: generate_sine_lut.create_lut_file(filename, PHASE_DW, 16, formats=formats)
+                t = best_time(create, repeat=1 if PHASE_DW >= 18 else 3, min_time=0)
+                result(results, 'lut', 'time', params, t, 's', higher_is_better=False)
+                result(results, 'lut', 'entries', params, 2**PHASE_DW / t, 'entries/s')
+                tracemalloc.start()
+                create()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                result(results, 'lut', 'peak_memory', params, peak / 2**20, 'MiB', higher_is_better=False)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from common import load_module, best_time, result
+
+# samples per second of the python model and the stimulus generation
+
+dds_model = load_module('dds_model', 'model/dds_model.py')
+nco = load_module('nco', 'model/nco.py')
+
+CONFIGS = [
+    dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, LUT_DW=14),
+    dict(PHASE_DW=24, OUT_DW=16, USE_TAYLOR=1, LUT_DW=11),
+]
+
+def run(results, quick=False):
+    n_tick = 200 if quick else 5000
+    n_block = 2**14 if quick else 2**20
+    chunk = 4096
+    for config in CONFIGS:
+        phases = nco.PhaseAccumulator(ACCU_DW=config['PHASE_DW']).ramp(12345, n_block)
+        for bit_exact in (0, 1):
+            model = dds_model.Model(config['PHASE_DW'], config['OUT_DW'], config['USE_TAYLOR'], config['LUT_DW'],
+                                    1, 0, 0, bit_exact=bool(bit_exact))
+            params = dict(config, bit_exact=bit_exact)
+
+            def tick():
+                for phase in phases[:n_tick].tolist():
+                    model.set_data(phase)
+                    model.tick()
+                    model.get_data()
+                    model.get_data_cos()
+            result(results, 'model', 'tick', params, n_tick / best_time(tick), 'samples/s')
+
+            t = best_time(lambda: model.process(phases))
+            result(results, 'model', 'process', params, n_block / t, 'samples/s')
+
+            def stream():
+                for _ in model.stream(phases[i:i + chunk] for i in range(0, n_block, chunk)):
+                    pass
+            result(results, 'model', 'stream', dict(params, chunk=chunk), n_block / best_time(stream), 'samples/s')
+
+    accumulator = nco.PhaseAccumulator(ACCU_DW=32, PHASE_DW=24)
+    t = best_time(lambda: accumulator.ramp(12345, n_block))
+    result(results, 'nco', 'ramp', dict(ACCU_DW=32), n_block / t, 'samples/s')
+    t = best_time(lambda: accumulator.linear_chirp(1000, 10**6, n_block))
+    result(results, 'nco', 'linear_chirp', dict(ACCU_DW=32), n_block / t, 'samples/s')
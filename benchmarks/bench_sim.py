@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+
+from common import benchmarks_dir, root_dir, load_module, result
+
+# simulated clocks per wall second of the dds testbench and compile time of the simulation model
+
+cached_build = load_module('cached_build', 'tests/cached_build.py')
+
+CONFIGS = [
+    dict(PHASE_DW=12, USE_TAYLOR=0, LUT_DW=10),
+    dict(PHASE_DW=16, USE_TAYLOR=0, LUT_DW=14),
+    dict(PHASE_DW=16, USE_TAYLOR=1, LUT_DW=9),
+    dict(PHASE_DW=20, USE_TAYLOR=1, LUT_DW=9),
+    dict(PHASE_DW=24, USE_TAYLOR=1, LUT_DW=11),
+]
+
+def simulators():
+    return [sim for sim, exe in (('icarus', 'iverilog'), ('verilator', 'verilator')) if shutil.which(exe)]
+
+def run(results, quick=False):
+    num_clocks = 2000 if quick else 50000
+    configs = CONFIGS[:1] + CONFIGS[-1:] if quick else CONFIGS
+    sims = simulators()
+    if not sims:
+        print("no simulator found, skipping simulation benchmarks")
+    old_sim = os.environ.get('SIM')
+    try:
+        for sim in sims:
+            os.environ['SIM'] = sim
+            for config in configs:
+                parameters = dict(config, OUT_DW=16, SIN_COS=1, NEGATIVE_SINE=0, NEGATIVE_COSINE=0, USE_LUT_FILE=0)
+                # a fresh build directory, so that the compile time is measured as well
+                with tempfile.TemporaryDirectory() as sim_build:
+                    result_file = os.path.join(sim_build, 'result.json')
+                    start = time.perf_counter()
+                    cached_build.run(
+                        python_search=[benchmarks_dir],
+                        verilog_sources=[os.path.join(root_dir, 'hdl', 'dds.sv')],
+                        toplevel='dds',
+                        module='sim_throughput',
+                        parameters=parameters,
+                        sim_build=sim_build,
+                        work_dir=os.path.join(sim_build, 'run'),
+                        extra_env={'NUM_CLOCKS': str(num_clocks), 'BENCH_RESULT': result_file},
+                        testcase='throughput',
+                        waves=False,
+                    )
+                    total = time.perf_counter() - start
+                    with open(result_file) as f:
+                        sim_result = json.load(f)
+                params = dict(sim=sim, **config)
+                result(results, 'sim', 'clocks', params, sim_result['clocks'] / sim_result['seconds'], 'clocks/s')
+                result(results, 'sim', 'build_and_run', dict(params, clocks=num_clocks), total, 's', higher_is_better=False)
+    finally:
+        if old_sim is None:
+            os.environ.pop('SIM', None)
+        else:
+            os.environ['SIM'] = old_sim
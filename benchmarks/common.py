@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import time
+import platform
+import importlib.util
+import numpy as np
+
+# Shared helpers of the benchmark suites. A result is stored under a key "suite.name[params]"
+# with its value, unit and whether higher values are better, so that runs can be compared.
+
+benchmarks_dir = os.path.abspath(os.path.dirname(__file__))
+root_dir = os.path.abspath(os.path.join(benchmarks_dir, '..'))
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(root_dir, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def best_time(func, repeat=3, min_time=0.1):
+    # best time of one call out of repeat measurements, fast calls are repeated until min_time is reached
+    best = float('inf')
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+def key(suite, name, params):
+    return f"{suite}.{name}[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+def result(results, suite, name, params, value, unit, higher_is_better=True):
+    results[key(suite, name, params)] = {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+    print(f"{key(suite, name, params):70s} {value:14.6g} {unit}")
+
+def metadata():
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def save(filename, results):
+    with open(filename, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=2, sort_keys=True)
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)['results']
+
+def compare(results, baseline, threshold=0.1):
+    # Returns (key, baseline value, new value, speedup, regression) for every key in both runs,
+    # speedup > 1 is an improvement. A result regressed if it is worse by more than threshold.
+    rows = []
+    for k in sorted(set(results) & set(baseline)):
+        old, new = baseline[k]['value'], results[k]['value']
+        if results[k]['higher_is_better']:
+            speedup = new / old if old else float('inf')
+        else:
+            speedup = old / new if new else float('inf')
+        rows.append((k, old, new, speedup, speedup < 1 - threshold))
+    return rows
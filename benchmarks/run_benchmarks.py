@@ -0,0 +1,37 @@
+import sys
+import argparse
+
+import common
+import bench_model
+import bench_lut
+import bench_sim
+
+SUITES = {'model': bench_model, 'lut': bench_lut, 'sim': bench_sim}
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Runs the DDS benchmarks and compares them to a previous run')
+    parser.add_argument('--suites', required=False, default=','.join(SUITES), help=f"comma separated list of {','.join(SUITES)}")
+    parser.add_argument('--output', metavar='path', required=False, default='benchmark_results.json', help='json file for the results')
+    parser.add_argument('--compare', metavar='path', required=False, default=None, help='json file of a previous run')
+    parser.add_argument('--threshold', required=False, type=float, default=0.1, help='relative slowdown that is flagged as regression')
+    parser.add_argument('--quick', action='store_true', help='small problem sizes, for a smoke test')
+    args = parser.parse_args(args)
+
+    results = {}
+    for suite in args.suites.split(','):
+        SUITES[suite].run(results, quick=args.quick)
+    common.save(args.output, results)
+    print(f"results written to {args.output}")
+
+    if args.compare is None:
+        return 0
+    regressions = 0
+    print(f"\ncompared to {args.compare}:")
+    for k, old, new, speedup, regression in common.compare(results, common.load(args.compare), args.threshold):
+        regressions += regression
+        print(f"{k:70s} {old:12.6g} -> {new:12.6g} {speedup:6.2f}x {'REGRESSION' if regression else ''}")
+    print(f"{regressions} regressions")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
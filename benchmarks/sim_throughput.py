@@ -0,0 +1,36 @@
+import os
+import json
+import time
+import importlib.util
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge
+
+# cocotb testbench of bench_sim.py, drives NUM_CLOCKS phases like test_dds.py and
+# writes the wall time of the simulation to BENCH_RESULT
+
+CLK_PERIOD_NS = 2
+
+tests_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+checker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(checker)
+
+@cocotb.test()
+async def throughput(dut):
+    num_clocks = int(os.environ['NUM_CLOCKS'])
+    cocotb.start_soon(Clock(dut.clk, CLK_PERIOD_NS, units='ns').start())
+    dut.s_axis_phase_tvalid.value = 0
+    dut.reset_n.value = 0
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    dut.reset_n.value = 1
+    await RisingEdge(dut.clk)
+    phases = [(i * 12345) % 2**int(dut.PHASE_DW) for i in range(num_clocks)]
+    start = time.perf_counter()
+    cocotb.start_soon(checker.drive_input(dut, phases))
+    await checker.capture_output(dut, num_clocks, int(dut.OUT_DW), int(dut.SIN_COS))
+    elapsed = time.perf_counter() - start
+    with open(os.environ['BENCH_RESULT'], 'w') as f:
+        json.dump({'clocks': num_clocks, 'seconds': elapsed}, f)
@@ -13,6 +13,17 @@ core_parameter SIN_COS  {SIN COS} {Additional cos output if 1}
 core_parameter NEGATIVE_SINE  {NEGATIVE SINE} {output negative sine if 1}
 core_parameter NEGATIVE_COSINE  {NEGATIVE COSINE} {output negative cosine if 1}
 core_parameter DECIMAL_SHIFT  {DECIMAL SHIFT} {Used for scaling the taylor approximation factor}
+core_parameter SAMPLES_PER_CLOCK  {SAMPLES PER CLOCK} {Number of parallel samples per clock}
+core_parameter LUT_COMPRESSION  {LUT COMPRESSION} {0: quarter wave lut, 1: coarse + fine lut}
+core_parameter SUNDERLAND_A  {SUNDERLAND A} {Phase msbs shared by coarse and fine lut}
+core_parameter SUNDERLAND_C  {SUNDERLAND C} {Phase lsbs of the fine lut}
+core_parameter CHANNELS  {CHANNELS} {Number of time multiplexed channels, channel number in tuser}
+core_parameter USE_CORDIC  {USE CORDIC} {Use a pipelined cordic instead of the lut if set to 1}
+core_parameter CORDIC_ITERATIONS  {CORDIC ITERATIONS} {Number of cordic iterations}
+core_parameter USE_ACCUMULATOR  {USE ACCUMULATOR} {Generate the phase with the integrated phase accumulator if set to 1}
+core_parameter ACCU_DW  {ACCU DW} {Phase accumulator width}
+core_parameter USE_MIXER  {USE MIXER} {Mix s_axis_mix with cos - j*sin, 1: real input, 2: complex input}
+core_parameter MIXER_DW  {MIXER DW} {Mixer input width}
 
 set bus [ipx::get_bus_interfaces -of_objects $core s_axis_phase]
 set_property NAME S_AXIS_PHASE $bus
@@ -11,299 +11,738 @@ module dds
     parameter NEGATIVE_SINE = 0,      // invert sine output if set to 1
     parameter NEGATIVE_COSINE = 0,    // invert cosine output of set to 1
     parameter DECIMAL_SHIFT = 0,      // not used
-    parameter USE_LUT_FILE = 0
+    parameter USE_LUT_FILE = 0,
+    parameter SAMPLES_PER_CLOCK = 1,  // number of samples per beat, sample i is in bits [i*PHASE_DW +: PHASE_DW] / [i*OUT_DW +: OUT_DW]
+    parameter LUT_COMPRESSION = 0,    // 0: quarter wave lut, 1: coarse + fine lut (sunderland)
+    parameter SUNDERLAND_A = 8,       // lut index msbs that address coarse and fine lut if LUT_COMPRESSION = 1
+    parameter SUNDERLAND_C = 3,       // lut index lsbs that only address the fine lut if LUT_COMPRESSION = 1
+    parameter CHANNELS = 1,           // number of time multiplexed channels, the channel of a beat is in tuser
+    parameter USE_CORDIC = 0,         // use a pipelined cordic instead of lut and taylor correction, needs no memory
+    parameter CORDIC_ITERATIONS = 18, // cordic iterations (pipeline stages), about OUT_DW + 2 for an error < 1 LSB
+    parameter USE_ACCUMULATOR = 0,    // generate the phase with the integrated phase accumulator, s_axis_phase_tdata is not used
+    parameter ACCU_DW = 48,           // phase accumulator width, the phase is the accumulator truncated to PHASE_DW bits
+    parameter USE_MIXER = 0,          // multiply s_axis_mix with cos - j*sin, 1: real input, 2: complex input, needs SIN_COS = 1
+    parameter MIXER_DW = 16,          // width of the mixer input, the mixer output has MIXER_DW + 1 bits
+    localparam CHANNEL_DW = CHANNELS > 1 ? $clog2(CHANNELS) : 1
 )
 /*********************************************************************************************/
 (
-    input                                   clk,
-    input                                   reset_n,
-    input   wire           [PHASE_DW-1:0]   s_axis_phase_tdata,
-    input                                   s_axis_phase_tvalid,
-    output  wire    signed [OUT_DW-1:0]     m_axis_out_sin_tdata,
-    output                                  m_axis_out_sin_tvalid,
-    output  wire    signed [OUT_DW-1:0]     m_axis_out_cos_tdata,
-    output                                  m_axis_out_cos_tvalid,
-    output  wire    signed [2*OUT_DW-1:0]   m_axis_out_tdata,
-    output                                  m_axis_out_tvalid
+    input                                                       clk,
+    input                                                       reset_n,
+    input   wire           [SAMPLES_PER_CLOCK*PHASE_DW-1:0]     s_axis_phase_tdata,
+    input                                                       s_axis_phase_tvalid,
+    input   wire           [CHANNEL_DW-1:0]                     s_axis_phase_tuser,
+    input   wire           [2*ACCU_DW-1:0]                      s_axis_tuning_tdata,  // {phase offset, frequency word} of channel tuser
+    input                                                       s_axis_tuning_tvalid,
+    input   wire           [CHANNEL_DW-1:0]                     s_axis_tuning_tuser,
+    output  wire    signed [SAMPLES_PER_CLOCK*OUT_DW-1:0]       m_axis_out_sin_tdata,
+    output                                                      m_axis_out_sin_tvalid,
+    output  wire           [CHANNEL_DW-1:0]                     m_axis_out_sin_tuser,
+    output  wire    signed [SAMPLES_PER_CLOCK*OUT_DW-1:0]       m_axis_out_cos_tdata,
+    output                                                      m_axis_out_cos_tvalid,
+    output  wire           [CHANNEL_DW-1:0]                     m_axis_out_cos_tuser,
+    output  wire    signed [2*SAMPLES_PER_CLOCK*OUT_DW-1:0]     m_axis_out_tdata,     // {sin, cos} of sample i in bits [i*2*OUT_DW +: 2*OUT_DW]
+    output                                                      m_axis_out_tvalid,
+    output  wire           [CHANNEL_DW-1:0]                     m_axis_out_tuser,
+    input   wire    signed [2*SAMPLES_PER_CLOCK*MIXER_DW-1:0]   s_axis_mix_tdata,     // {q, i} of sample i in bits [i*2*MIXER_DW +: 2*MIXER_DW], transferred with s_axis_phase
+    output  wire    signed [2*SAMPLES_PER_CLOCK*(MIXER_DW+1)-1:0] m_axis_mix_tdata,   // {q, i} of sample i in bits [i*2*(MIXER_DW+1) +: 2*(MIXER_DW+1)]
+    output                                                      m_axis_mix_tvalid,
+    output  wire           [CHANNEL_DW-1:0]                     m_axis_mix_tuser
 );
 /*********************************************************************************************/
+// ------------------- PHASE ACCUMULATOR -----------------------------
+// With USE_ACCUMULATOR every beat with s_axis_phase_tvalid is generated from the accumulator of channel
+// s_axis_phase_tuser: lane k gets accu + offset + k * fcw, then accu advances by SAMPLES_PER_CLOCK * fcw.
+// A tuning word is used from the next clock on, a beat in the same clock still uses the old one.
+// The accumulator is not reset by a tuning word, so frequency hops are phase continuous.
+wire [SAMPLES_PER_CLOCK*PHASE_DW - 1 : 0] phase_in;
+if (USE_ACCUMULATOR) begin : accumulator
+    reg [ACCU_DW - 1 : 0] accu [0 : CHANNELS - 1];
+    reg [ACCU_DW - 1 : 0] fcw [0 : CHANNELS - 1];
+    reg [ACCU_DW - 1 : 0] offset [0 : CHANNELS - 1];
+    wire [CHANNEL_DW - 1 : 0] channel = CHANNELS > 1 ? s_axis_phase_tuser : '0;
+    wire [CHANNEL_DW - 1 : 0] tuning_channel = CHANNELS > 1 ? s_axis_tuning_tuser : '0;
+    wire [ACCU_DW - 1 : 0] base = accu[channel] + offset[channel];
+
+    for (genvar k = 0; k < SAMPLES_PER_CLOCK; k = k + 1) begin : lane_phase
+        wire [ACCU_DW - 1 : 0] lane_accu = base + fcw[channel] * k;
+        assign phase_in[k*PHASE_DW +: PHASE_DW] = lane_accu[ACCU_DW - 1 -: PHASE_DW];
+    end
+
+    always_ff @(posedge clk) begin
+        if (!reset_n) begin
+            for (integer c = 0; c < CHANNELS; c = c + 1) begin
+                accu[c] <= 0;
+                fcw[c] <= 0;
+                offset[c] <= 0;
+            end
+        end else begin
+            if (s_axis_phase_tvalid)
+                accu[channel] <= accu[channel] + fcw[channel] * SAMPLES_PER_CLOCK;
+            if (s_axis_tuning_tvalid) begin
+                fcw[tuning_channel] <= s_axis_tuning_tdata[ACCU_DW - 1 : 0];
+                offset[tuning_channel] <= s_axis_tuning_tdata[2*ACCU_DW - 1 : ACCU_DW];
+            end
+        end
+    end
+
+    initial begin
+        if (ACCU_DW < PHASE_DW) begin
+            $display("ACCU_DW < PHASE_DW does not make sense!");
+            $finish;
+        end
+    end
+end else begin : phase_input
+    assign phase_in = s_axis_phase_tdata;
+end
+
 // input buffer, stage 1
-reg [PHASE_DW - 1 : 0] phase_buf;
+reg [SAMPLES_PER_CLOCK*PHASE_DW - 1 : 0] phase_buf;
 reg in_valid_buf;
+reg [CHANNEL_DW - 1 : 0] channel_buf;
 always_ff @(posedge clk) begin
-    phase_buf <= !reset_n ? 0 : (s_axis_phase_tvalid ? s_axis_phase_tdata : phase_buf);
+    phase_buf <= !reset_n ? 0 : (s_axis_phase_tvalid ? phase_in : phase_buf);
     in_valid_buf <= !reset_n ? 0 : s_axis_phase_tvalid;
+    channel_buf <= !reset_n ? 0 : (s_axis_phase_tvalid ? s_axis_phase_tuser : channel_buf);
 end
 
 // ------------------- SIN COS LUT -----------------------------
 localparam EFFECTIVE_LUT_WIDTH = USE_TAYLOR ? LUT_DW : PHASE_DW - 2;
 
-reg signed [OUT_DW - 1 : 0] lut [0 : 2**EFFECTIVE_LUT_WIDTH - 1];
-initial	begin
-    if (USE_LUT_FILE) begin
-        `ifdef LUT_PATH  // recommended to use this
-            $display("LUT_PATH = %s",`LUT_PATH);
-            $readmemh($sformatf("%s/sine_lut_%0d_%0d.hex",`LUT_PATH,EFFECTIVE_LUT_WIDTH,OUT_DW), lut);  // for makefile            
-        `elsif COCOTB_SIM
-            $readmemh($sformatf("sine_lut_%0d_%0d.hex",EFFECTIVE_LUT_WIDTH,OUT_DW), lut);  // for pytest, depends on execution dir
-        `else // for vivado
-            $readmemh($sformatf("../../../submodules/DDS/lut_data/sine_lut_%0d_%0d.hex",EFFECTIVE_LUT_WIDTH,OUT_DW), lut);
-        `endif
-    end else begin
-        integer i;
-        for (i = 0; i < 2 ** EFFECTIVE_LUT_WIDTH; i = i + 1) begin
-            // implicit conversion from real to integer does round away from zero
-            // explicit conversion with $rtoi() does truncation
-            // https://stackoverflow.com/questions/42003998/systemverilog-round-real-type
-            lut[i] = $sin(2 * 3.141592653589793238 * $itor(i) / $itor((2 ** EFFECTIVE_LUT_WIDTH)) / 4) * $itor((2** (OUT_DW - 1) - 1));
-        end
-    end
-
+initial begin
     if (USE_TAYLOR) begin
         if (LUT_DW > PHASE_DW - 2) begin
             $display("LUT_DW > PHASE_DW - 2 does not make sense!");
             $finish;
         end
     end
-end
-
-// calculate lut index, stage 2
-reg in_valid_buf2;
-reg [EFFECTIVE_LUT_WIDTH-1:0] sin_lut_index, cos_lut_index;
-reg [1:0] sin_quadrant_index;
-always_ff @(posedge clk) begin
-    if (!reset_n) begin
-        cos_lut_index <= '0;
-        sin_lut_index <= '0;
-        sin_quadrant_index <= '0;
-        in_valid_buf2 <= '0;
-    end else begin
-        in_valid_buf2 <= in_valid_buf;
-        sin_quadrant_index <= phase_buf[PHASE_DW-1:PHASE_DW-2];  
-        // sin
-        if (phase_buf[PHASE_DW - 2]) // if in 2nd or 4th quadrant
-            sin_lut_index <= ~phase_buf[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH] + 1;
-        else
-            sin_lut_index <= phase_buf[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH];
-        // cos
-        if (SIN_COS || USE_TAYLOR) begin
-            if (!phase_buf[PHASE_DW - 2]) // if in 1st or 3rd quadrant
-                cos_lut_index <= ~phase_buf[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH] + 1;
-            else
-                cos_lut_index <= phase_buf[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH];
+    if (USE_CORDIC) begin
+        if (CORDIC_ITERATIONS < 1) begin
+            $display("USE_CORDIC = 1 needs CORDIC_ITERATIONS >= 1!");
+            $finish;
         end
     end
-end
-
-// lut reading, stage 3
-reg in_valid_buf3;
-reg signed [OUT_DW-1:0] sin_lut_data, cos_lut_data;
-reg [1:0] sin_quadrant_index2;
-always_ff @(posedge clk) begin
-    if (!reset_n) begin
-        in_valid_buf3 <= '0;
-        sin_lut_data <= '0;
-        cos_lut_data <= '0;
-        sin_quadrant_index2 <= '0;
-    end else begin
-        in_valid_buf3 <= in_valid_buf2;
-        // sin
-        sin_quadrant_index2 <= sin_quadrant_index;
-        if (sin_quadrant_index[0] && sin_lut_index == 0)
-            sin_lut_data <= 2**(OUT_DW-1) - 1;
-        else
-            sin_lut_data <= lut[sin_lut_index];
-        // cos
-        if (SIN_COS || USE_TAYLOR) begin
-            if (!sin_quadrant_index[0] && cos_lut_index == 0)
-                cos_lut_data <= 2**(OUT_DW-1) - 1;
-            else
-                cos_lut_data <= lut[cos_lut_index];
+    if (USE_MIXER) begin
+        if (!SIN_COS) begin
+            $display("USE_MIXER needs SIN_COS = 1!");
+            $finish;
         end
     end
-end
-
-// output buffer, stage 4
-reg signed [OUT_DW - 1 : 0] out_sin_buf;
-reg signed [OUT_DW - 1 : 0] out_cos_buf;
-reg out_valid_buf;
-always_ff @(posedge clk) begin
-    if (!reset_n) begin
-        out_cos_buf <= '0;
-        out_sin_buf <= '0;
-        out_valid_buf <= '0;
-    end else begin
-        if (sin_quadrant_index2[1]) // if in 3rd or 4th quadrant
-            out_sin_buf <= NEGATIVE_SINE ? sin_lut_data : -sin_lut_data;
-        else
-            out_sin_buf <= NEGATIVE_SINE ? -sin_lut_data : sin_lut_data;
-        if (SIN_COS || USE_TAYLOR) begin
-            if (sin_quadrant_index2 == 2'b10 || sin_quadrant_index2 == 2'b01) // if in 2nd or 3rd quadrant
-                out_cos_buf <= NEGATIVE_COSINE ? cos_lut_data : -cos_lut_data ;
-            else
-                out_cos_buf <= NEGATIVE_COSINE ? -cos_lut_data : cos_lut_data ;
+    if (LUT_COMPRESSION) begin
+        if (SUNDERLAND_A < 1 || SUNDERLAND_C < 1 || SUNDERLAND_A + SUNDERLAND_C > EFFECTIVE_LUT_WIDTH) begin
+            $display("LUT_COMPRESSION = 1 needs SUNDERLAND_A >= 1, SUNDERLAND_C >= 1 and SUNDERLAND_A + SUNDERLAND_C <= lut width!");
+            $finish;
         end
-        out_valid_buf <= in_valid_buf3;          
     end
 end
 
+// Every lut has 2 read ports like a dual port block ram. A lane needs one port for sin and one for cos
+// if cos is calculated, otherwise two lanes share one lut. The cordic engine does not use the luts.
+localparam LUT_PORTS_PER_LANE = (SIN_COS || USE_TAYLOR) ? 2 : 1;
+localparam LUT_COPIES = (SAMPLES_PER_CLOCK * LUT_PORTS_PER_LANE + 1) / 2;
+wire [2*LUT_COPIES*EFFECTIVE_LUT_WIDTH - 1 : 0] lut_addr;
+wire [2*LUT_COPIES*OUT_DW - 1 : 0] lut_data;
+for (genvar c = 0; c < (USE_CORDIC ? 0 : LUT_COPIES); c = c + 1) begin : lut_copy
+    dds_lut #(
+        .LUT_WIDTH(EFFECTIVE_LUT_WIDTH),
+        .OUT_DW(OUT_DW),
+        .USE_LUT_FILE(USE_LUT_FILE),
+        .LUT_COMPRESSION(LUT_COMPRESSION),
+        .SUNDERLAND_A(SUNDERLAND_A),
+        .SUNDERLAND_C(SUNDERLAND_C)
+    )
+    lut_i(
+        .addr_a(lut_addr[2*c*EFFECTIVE_LUT_WIDTH +: EFFECTIVE_LUT_WIDTH]),
+        .addr_b(lut_addr[(2*c+1)*EFFECTIVE_LUT_WIDTH +: EFFECTIVE_LUT_WIDTH]),
+        .data_a(lut_data[2*c*OUT_DW +: OUT_DW]),
+        .data_b(lut_data[(2*c+1)*OUT_DW +: OUT_DW])
+    );
+end
+if (!USE_CORDIC && SAMPLES_PER_CLOCK * LUT_PORTS_PER_LANE < 2 * LUT_COPIES) begin
+    assign lut_addr[2*LUT_COPIES*EFFECTIVE_LUT_WIDTH - 1 -: EFFECTIVE_LUT_WIDTH] = '0;  // unused port
+end
+
 // ------------------- TAYLOR CORRECTION -----------------------------
 // TODO: add negative offset to phase error so that taylor correction is effective in 2 directions, should improve accuracy
-
-// taylor phase offset multiplication, stage 2-5
 localparam PHASE_ERROR_WIDTH = USE_TAYLOR ? PHASE_DW - (LUT_DW + 2) : 1;
-localparam PHASE_FACTOR_WIDTH = 18;  // 18 is width of small operand of DSP48E1 
+localparam PHASE_FACTOR_WIDTH = 18;  // 18 is width of small operand of DSP48E1
 localparam PI_DECIMAL_SHIFT   = 14;  // this leaves 4 bits for 2*pi which is enough
 localparam real PHASE_FACTOR_REAL = (2 * 3.141592654) * 2**PI_DECIMAL_SHIFT;
 // typedef bit [PHASE_FACTOR_WIDTH - 1 : 0] t_PHASE_FACTOR;
 localparam [PHASE_FACTOR_WIDTH - 1 : 0] PHASE_FACTOR = $rtoi(PHASE_FACTOR_REAL);
-
 localparam SIN_COS_LUT_BALANCING_STAGES = 2;  // this value has to be 2, otherwise valid will be out of sync
-reg [PHASE_ERROR_WIDTH - 1 : 0]    phase_error_buf [0 : SIN_COS_LUT_BALANCING_STAGES - 1];
 localparam EXTENDED_WIDTH    = PHASE_FACTOR_WIDTH + PHASE_ERROR_WIDTH;
+localparam TAYLOR_PIPELINE_STAGES = 3;    // 2 for input of taylor mult, 1 for mult, so 3 should be enough
+localparam TAYLOR_MULT_WIDTH = PHASE_DW + OUT_DW;
+// TAYLOR_MULT_WIDTH should fit into the large add operand of a DSP48E1 which is 48 bits
+localparam TAYLOR_OUT_PIPELINE_STAGES = 1;  // more than 1 does not seem to help here, dsp only pulls in 1 reg
 
-reg signed   [EXTENDED_WIDTH - 1 : 0]    phase_error_multiplied_extended;  // for M reg of DSP
-reg signed   [EXTENDED_WIDTH - 1 : 0]    phase_error_multiplied_extended_buf; // for P reg of DSP
-reg signed [OUT_DW-1 : 0] out_sin_phase;
-reg signed [OUT_DW-1 : 0] out_cos_phase;
-reg phase_error_valid;
-integer i;
-if (USE_TAYLOR) begin
-    always_ff@(posedge clk) begin
-        if (!reset_n) begin
-            phase_error_valid <= '0;
-            for(i = 0; i < SIN_COS_LUT_BALANCING_STAGES; i = i + 1) begin
-                phase_error_buf[i] <= '0;
+// ------------------- LANES -----------------------------
+// Every lane is a complete dds pipeline for one sample of the beat, only the luts are shared.
+// The phase to amplitude engine of a lane is either the lut with optional taylor correction or a cordic.
+// The valid pipeline is the same in all lanes, the output valid is taken from lane 0.
+wire [SAMPLES_PER_CLOCK - 1 : 0] lane_valid;
+for (genvar l = 0; l < SAMPLES_PER_CLOCK; l = l + 1) begin : lane
+    localparam SIN_PORT = l * LUT_PORTS_PER_LANE;
+    localparam COS_PORT = (SIN_COS || USE_TAYLOR) ? l * LUT_PORTS_PER_LANE + 1 : SIN_PORT;
+    wire [PHASE_DW - 1 : 0] phase = phase_buf[l*PHASE_DW +: PHASE_DW];
+
+    if (USE_CORDIC) begin : cordic_engine
+        dds_cordic #(
+            .PHASE_DW(PHASE_DW),
+            .OUT_DW(OUT_DW),
+            .ITERATIONS(CORDIC_ITERATIONS),
+            .SIN_COS(SIN_COS),
+            .NEGATIVE_SINE(NEGATIVE_SINE),
+            .NEGATIVE_COSINE(NEGATIVE_COSINE)
+        )
+        cordic_i(
+            .clk(clk),
+            .reset_n(reset_n),
+            .phase(phase),
+            .in_valid(in_valid_buf),
+            .sin(m_axis_out_sin_tdata[l*OUT_DW +: OUT_DW]),
+            .cos(m_axis_out_cos_tdata[l*OUT_DW +: OUT_DW]),
+            .out_valid(lane_valid[l])
+        );
+    end
+    else begin : lut_engine
+        // calculate lut index, stage 2
+        reg in_valid_buf2;
+        reg [EFFECTIVE_LUT_WIDTH-1:0] sin_lut_index, cos_lut_index;
+        reg [1:0] sin_quadrant_index;
+        always_ff @(posedge clk) begin
+            if (!reset_n) begin
+                cos_lut_index <= '0;
+                sin_lut_index <= '0;
+                sin_quadrant_index <= '0;
+                in_valid_buf2 <= '0;
+            end else begin
+                in_valid_buf2 <= in_valid_buf;
+                sin_quadrant_index <= phase[PHASE_DW-1:PHASE_DW-2];
+                // sin
+                if (phase[PHASE_DW - 2]) // if in 2nd or 4th quadrant
+                    sin_lut_index <= ~phase[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH] + 1;
+                else
+                    sin_lut_index <= phase[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH];
+                // cos
+                if (SIN_COS || USE_TAYLOR) begin
+                    if (!phase[PHASE_DW - 2]) // if in 1st or 3rd quadrant
+                        cos_lut_index <= ~phase[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH] + 1;
+                    else
+                        cos_lut_index <= phase[PHASE_DW - 3 -: EFFECTIVE_LUT_WIDTH];
+                end
             end
-            out_sin_phase <= '0;
-            out_cos_phase <= '0;
-        end else begin
-            for(i = 0; i < SIN_COS_LUT_BALANCING_STAGES; i = i + 1) begin
-                if(i == 0)
-                    phase_error_buf[0] <= phase_buf[PHASE_ERROR_WIDTH - 1: 0];
+        end
+
+        // lut reading, stage 3
+        assign lut_addr[SIN_PORT*EFFECTIVE_LUT_WIDTH +: EFFECTIVE_LUT_WIDTH] = sin_lut_index;
+        if (SIN_COS || USE_TAYLOR) begin
+            assign lut_addr[COS_PORT*EFFECTIVE_LUT_WIDTH +: EFFECTIVE_LUT_WIDTH] = cos_lut_index;
+        end
+        reg in_valid_buf3;
+        reg signed [OUT_DW-1:0] sin_lut_data, cos_lut_data;
+        reg [1:0] sin_quadrant_index2;
+        always_ff @(posedge clk) begin
+            if (!reset_n) begin
+                in_valid_buf3 <= '0;
+                sin_lut_data <= '0;
+                cos_lut_data <= '0;
+                sin_quadrant_index2 <= '0;
+            end else begin
+                in_valid_buf3 <= in_valid_buf2;
+                // sin
+                sin_quadrant_index2 <= sin_quadrant_index;
+                if (sin_quadrant_index[0] && sin_lut_index == 0)
+                    sin_lut_data <= 2**(OUT_DW-1) - 1;
                 else
-                    phase_error_buf[i] <= phase_error_buf[i - 1];
+                    sin_lut_data <= lut_data[SIN_PORT*OUT_DW +: OUT_DW];
+                // cos
+                if (SIN_COS || USE_TAYLOR) begin
+                    if (!sin_quadrant_index[0] && cos_lut_index == 0)
+                        cos_lut_data <= 2**(OUT_DW-1) - 1;
+                    else
+                        cos_lut_data <= lut_data[COS_PORT*OUT_DW +: OUT_DW];
+                end
             end
-            phase_error_multiplied_extended <= phase_error_buf[SIN_COS_LUT_BALANCING_STAGES-1] * PHASE_FACTOR; 
-            phase_error_multiplied_extended_buf <= phase_error_multiplied_extended;
-            phase_error_valid <= out_valid_buf;
-            out_sin_phase <= out_sin_buf;
-            out_cos_phase <= out_cos_buf;
         end
-    end
-end
-wire signed  [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0]    phase_error_multiplied;
-assign phase_error_multiplied = phase_error_multiplied_extended_buf[EXTENDED_WIDTH - 1 : 14];
 
-// taylor correction pipeline, stage 6-8
-localparam TAYLOR_PIPELINE_STAGES = 3;    // 2 for input of taylor mult, 1 for mult, so 3 should be enough
-reg signed [OUT_DW - 1 : 0] out_sin_buf_taylor[TAYLOR_PIPELINE_STAGES - 2 : 0];
-reg signed [OUT_DW - 1 : 0] out_cos_buf_taylor[TAYLOR_PIPELINE_STAGES - 2 : 0];
-reg signed [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0] phase_error_multiplied_buf[TAYLOR_PIPELINE_STAGES - 2 : 0];
-// duplicate reg so that it can be pulled into dsp
-// vivado 2020.2 is not smart enough to do it
-reg signed [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0] phase_error_multiplied_buf2[TAYLOR_PIPELINE_STAGES - 2 : 0];  
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_times_phase;
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] cos_times_phase;
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_extended[TAYLOR_PIPELINE_STAGES - 1 : 0];
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] cos_extended[TAYLOR_PIPELINE_STAGES - 1 : 0];
-reg [TAYLOR_PIPELINE_STAGES - 1 : 0] valid_taylor;
-if (USE_TAYLOR) begin
-    always_ff@(posedge clk) begin
-        integer k;
-        for (k = 0; k < TAYLOR_PIPELINE_STAGES; k = k + 1) begin
+        // output buffer, stage 4
+        reg signed [OUT_DW - 1 : 0] out_sin_buf;
+        reg signed [OUT_DW - 1 : 0] out_cos_buf;
+        reg out_valid_buf;
+        always_ff @(posedge clk) begin
             if (!reset_n) begin
-                out_sin_buf_taylor[k] <= '0;
-                out_cos_buf_taylor[k] <= '0;
-                sin_extended[k] <= '0;
-                cos_extended[k] <= '0;
-                phase_error_multiplied_buf[k] <= '0;
-                phase_error_multiplied_buf2[k] <= '0;
-                valid_taylor[k] <= '0;
+                out_cos_buf <= '0;
+                out_sin_buf <= '0;
+                out_valid_buf <= '0;
             end else begin
-                if(k == 0) begin  // stage 5
-                    out_sin_buf_taylor[k]           <= out_sin_phase;
-                    out_cos_buf_taylor[k]           <= out_cos_phase;
-                    sin_extended[k]                 <= {out_sin_phase, {(TAYLOR_MULT_WIDTH - OUT_DW){1'b0}}};  // multiply by 2**(PHASE_DW)
-                    cos_extended[k]                 <= {out_cos_phase, {(TAYLOR_MULT_WIDTH - OUT_DW){1'b0}}};  // multiply by 2**(PHASE_DW)
-                    phase_error_multiplied_buf[k]   <= phase_error_multiplied;
-                    phase_error_multiplied_buf2[k]  <= phase_error_multiplied;
-                    valid_taylor[k]                 <= phase_error_valid;
+                if (sin_quadrant_index2[1]) // if in 3rd or 4th quadrant
+                    out_sin_buf <= NEGATIVE_SINE ? sin_lut_data : -sin_lut_data;
+                else
+                    out_sin_buf <= NEGATIVE_SINE ? -sin_lut_data : sin_lut_data;
+                if (SIN_COS || USE_TAYLOR) begin
+                    if (sin_quadrant_index2 == 2'b10 || sin_quadrant_index2 == 2'b01) // if in 2nd or 3rd quadrant
+                        out_cos_buf <= NEGATIVE_COSINE ? cos_lut_data : -cos_lut_data ;
+                    else
+                        out_cos_buf <= NEGATIVE_COSINE ? -cos_lut_data : cos_lut_data ;
                 end
-                else if (k < TAYLOR_PIPELINE_STAGES -1) begin  // stages 6-7
-                    out_sin_buf_taylor[k]           <= out_sin_buf_taylor[k-1];
-                    out_cos_buf_taylor[k]           <= out_cos_buf_taylor[k-1];
-                    sin_extended[k]                 <= sin_extended[k-1];
-                    cos_extended[k]                 <= cos_extended[k-1];
-                    phase_error_multiplied_buf[k]   <= phase_error_multiplied_buf[k-1];
-                    phase_error_multiplied_buf2[k]  <= phase_error_multiplied_buf2[k-1];
-                    valid_taylor[k]                 <= valid_taylor[k-1];
+                out_valid_buf <= in_valid_buf3;
+            end
+        end
+
+        // taylor phase offset multiplication, stage 2-5
+        reg [PHASE_ERROR_WIDTH - 1 : 0]    phase_error_buf [0 : SIN_COS_LUT_BALANCING_STAGES - 1];
+        reg signed   [EXTENDED_WIDTH - 1 : 0]    phase_error_multiplied_extended;  // for M reg of DSP
+        reg signed   [EXTENDED_WIDTH - 1 : 0]    phase_error_multiplied_extended_buf; // for P reg of DSP
+        reg signed [OUT_DW-1 : 0] out_sin_phase;
+        reg signed [OUT_DW-1 : 0] out_cos_phase;
+        reg phase_error_valid;
+        if (USE_TAYLOR) begin
+            always_ff@(posedge clk) begin
+                integer i;
+                if (!reset_n) begin
+                    phase_error_valid <= '0;
+                    for(i = 0; i < SIN_COS_LUT_BALANCING_STAGES; i = i + 1) begin
+                        phase_error_buf[i] <= '0;
+                    end
+                    out_sin_phase <= '0;
+                    out_cos_phase <= '0;
+                end else begin
+                    for(i = 0; i < SIN_COS_LUT_BALANCING_STAGES; i = i + 1) begin
+                        if(i == 0)
+                            phase_error_buf[0] <= phase[PHASE_ERROR_WIDTH - 1: 0];
+                        else
+                            phase_error_buf[i] <= phase_error_buf[i - 1];
+                    end
+                    phase_error_multiplied_extended <= phase_error_buf[SIN_COS_LUT_BALANCING_STAGES-1] * PHASE_FACTOR;
+                    phase_error_multiplied_extended_buf <= phase_error_multiplied_extended;
+                    phase_error_valid <= out_valid_buf;
+                    out_sin_phase <= out_sin_buf;
+                    out_cos_phase <= out_cos_buf;
                 end
-                else begin  // stage 8: multiplication and further pipelien add operands
-                    sin_times_phase <= out_sin_buf_taylor[k-1] * phase_error_multiplied_buf[k-1];
-                    cos_times_phase <= out_cos_buf_taylor[k-1] * phase_error_multiplied_buf2[k-1];
-                    sin_extended[k] <= sin_extended[k-1];
-                    cos_extended[k] <= cos_extended[k-1];
-                    valid_taylor[k] <= valid_taylor[k-1];
+            end
+        end
+        wire signed  [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0]    phase_error_multiplied;
+        assign phase_error_multiplied = phase_error_multiplied_extended_buf[EXTENDED_WIDTH - 1 : 14];
+
+        // taylor correction pipeline, stage 6-8
+        reg signed [OUT_DW - 1 : 0] out_sin_buf_taylor[TAYLOR_PIPELINE_STAGES - 2 : 0];
+        reg signed [OUT_DW - 1 : 0] out_cos_buf_taylor[TAYLOR_PIPELINE_STAGES - 2 : 0];
+        reg signed [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0] phase_error_multiplied_buf[TAYLOR_PIPELINE_STAGES - 2 : 0];
+        // duplicate reg so that it can be pulled into dsp
+        // vivado 2020.2 is not smart enough to do it
+        reg signed [EXTENDED_WIDTH - PI_DECIMAL_SHIFT - 1 : 0] phase_error_multiplied_buf2[TAYLOR_PIPELINE_STAGES - 2 : 0];
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_times_phase;
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] cos_times_phase;
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_extended[TAYLOR_PIPELINE_STAGES - 1 : 0];
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] cos_extended[TAYLOR_PIPELINE_STAGES - 1 : 0];
+        reg [TAYLOR_PIPELINE_STAGES - 1 : 0] valid_taylor;
+        if (USE_TAYLOR) begin
+            always_ff@(posedge clk) begin
+                integer k;
+                for (k = 0; k < TAYLOR_PIPELINE_STAGES; k = k + 1) begin
+                    if (!reset_n) begin
+                        out_sin_buf_taylor[k] <= '0;
+                        out_cos_buf_taylor[k] <= '0;
+                        sin_extended[k] <= '0;
+                        cos_extended[k] <= '0;
+                        phase_error_multiplied_buf[k] <= '0;
+                        phase_error_multiplied_buf2[k] <= '0;
+                        valid_taylor[k] <= '0;
+                    end else begin
+                        if(k == 0) begin  // stage 5
+                            out_sin_buf_taylor[k]           <= out_sin_phase;
+                            out_cos_buf_taylor[k]           <= out_cos_phase;
+                            sin_extended[k]                 <= {out_sin_phase, {(TAYLOR_MULT_WIDTH - OUT_DW){1'b0}}};  // multiply by 2**(PHASE_DW)
+                            cos_extended[k]                 <= {out_cos_phase, {(TAYLOR_MULT_WIDTH - OUT_DW){1'b0}}};  // multiply by 2**(PHASE_DW)
+                            phase_error_multiplied_buf[k]   <= phase_error_multiplied;
+                            phase_error_multiplied_buf2[k]  <= phase_error_multiplied;
+                            valid_taylor[k]                 <= phase_error_valid;
+                        end
+                        else if (k < TAYLOR_PIPELINE_STAGES -1) begin  // stages 6-7
+                            out_sin_buf_taylor[k]           <= out_sin_buf_taylor[k-1];
+                            out_cos_buf_taylor[k]           <= out_cos_buf_taylor[k-1];
+                            sin_extended[k]                 <= sin_extended[k-1];
+                            cos_extended[k]                 <= cos_extended[k-1];
+                            phase_error_multiplied_buf[k]   <= phase_error_multiplied_buf[k-1];
+                            phase_error_multiplied_buf2[k]  <= phase_error_multiplied_buf2[k-1];
+                            valid_taylor[k]                 <= valid_taylor[k-1];
+                        end
+                        else begin  // stage 8: multiplication and further pipelien add operands
+                            sin_times_phase <= out_sin_buf_taylor[k-1] * phase_error_multiplied_buf[k-1];
+                            cos_times_phase <= out_cos_buf_taylor[k-1] * phase_error_multiplied_buf2[k-1];
+                            sin_extended[k] <= sin_extended[k-1];
+                            cos_extended[k] <= cos_extended[k-1];
+                            valid_taylor[k] <= valid_taylor[k-1];
+                        end
+                    end
                 end
             end
-        end        
+        end
+
+        wire signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_corrected, cos_corrected;  // cannot truncate unneeded bits here, because vivado wont pull register into dsp then
+
+        if (NEGATIVE_SINE != NEGATIVE_COSINE) begin
+            assign sin_corrected = sin_extended[TAYLOR_PIPELINE_STAGES - 1] - cos_times_phase;
+            assign cos_corrected = cos_extended[TAYLOR_PIPELINE_STAGES - 1] + sin_times_phase;
+        end
+        else begin
+            assign sin_corrected = sin_extended[TAYLOR_PIPELINE_STAGES - 1] + cos_times_phase;
+            assign cos_corrected = cos_extended[TAYLOR_PIPELINE_STAGES - 1] - sin_times_phase;
+        end
+
+        // taylor correction, stage 9 : addition and output buffer
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] out_sin_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
+        reg signed [TAYLOR_MULT_WIDTH - 1 : 0] out_cos_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
+        reg out_valid_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
+        if (USE_TAYLOR) begin
+            always_ff @(posedge clk) begin
+                integer k;
+                for (k = 0; k < TAYLOR_OUT_PIPELINE_STAGES; k = k + 1) begin
+                    if (k == 0) begin  // addition
+                        out_sin_buf2[0]     <= !reset_n ? 0 : sin_corrected;
+                        out_cos_buf2[0]     <= !reset_n ? 0 : cos_corrected;
+                        out_valid_buf2[0]   <= !reset_n ? 0 : valid_taylor[TAYLOR_PIPELINE_STAGES-1];
+                    end
+                    else begin  // pipeline result of addition
+                        out_sin_buf2[k]     <= !reset_n ? 0 : out_sin_buf2[k-1];
+                        out_cos_buf2[k]     <= !reset_n ? 0 : out_cos_buf2[k-1];
+                        out_valid_buf2[k]   <= !reset_n ? 0 : out_valid_buf2[k-1];
+                    end
+                end
+            end
+        end
+
+        if (USE_TAYLOR) begin
+            wire signed [TAYLOR_MULT_WIDTH -1 : 0] out_sin;  // create wires to truncate unneeded bits (divide by 2**(PHASE_DW))
+            wire signed [TAYLOR_MULT_WIDTH -1 : 0] out_cos;
+            assign out_sin = out_sin_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
+            assign out_cos = out_cos_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
+            assign m_axis_out_sin_tdata[l*OUT_DW +: OUT_DW] = out_sin[TAYLOR_MULT_WIDTH - 1 -: OUT_DW];
+            assign m_axis_out_cos_tdata[l*OUT_DW +: OUT_DW] = out_cos[TAYLOR_MULT_WIDTH - 1 -: OUT_DW];
+            assign lane_valid[l] = out_valid_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
+        end
+        else begin
+            assign m_axis_out_sin_tdata[l*OUT_DW +: OUT_DW] = out_sin_buf;
+            assign m_axis_out_cos_tdata[l*OUT_DW +: OUT_DW] = out_cos_buf;
+            assign lane_valid[l] = out_valid_buf;
+        end
     end
+    assign m_axis_out_tdata[l*2*OUT_DW +: 2*OUT_DW] = {m_axis_out_sin_tdata[l*OUT_DW +: OUT_DW], m_axis_out_cos_tdata[l*OUT_DW +: OUT_DW]};
 end
 
-localparam TAYLOR_MULT_WIDTH = PHASE_DW + OUT_DW;
-// TAYLOR_MULT_WIDTH should fit into the large add operand of a DSP48E1 which is 48 bits
-wire signed [TAYLOR_MULT_WIDTH - 1 : 0] sin_corrected, cos_corrected;  // cannot truncate unneeded bits here, because vivado wont pull register into dsp then
+assign m_axis_out_sin_tvalid = lane_valid[0];
+assign m_axis_out_cos_tvalid = lane_valid[0];
+assign m_axis_out_tvalid = lane_valid[0];
 
-if (NEGATIVE_SINE != NEGATIVE_COSINE) begin
-    assign sin_corrected = sin_extended[TAYLOR_PIPELINE_STAGES - 1] - cos_times_phase;
-    assign cos_corrected = cos_extended[TAYLOR_PIPELINE_STAGES - 1] + sin_times_phase;
-end
-else begin
-    assign sin_corrected = sin_extended[TAYLOR_PIPELINE_STAGES - 1] + cos_times_phase;
-    assign cos_corrected = cos_extended[TAYLOR_PIPELINE_STAGES - 1] - sin_times_phase;
+// ------------------- CHANNELS -----------------------------
+// Time multiplexed channels share the whole pipeline, the core has no state per sample, so only the
+// channel number has to be delayed like the data. It is held while tvalid is low, like the phase.
+localparam LATENCY = USE_CORDIC ? CORDIC_ITERATIONS + 3 : (USE_TAYLOR ? 9 : 4);  // stages from s_axis_phase to the output registers
+reg [CHANNEL_DW - 1 : 0] channel_delay [0 : LATENCY - 2];
+always_ff @(posedge clk) begin
+    integer i;
+    for (i = 0; i < LATENCY - 1; i = i + 1) begin
+        if (i == 0)
+            channel_delay[0] <= !reset_n ? 0 : channel_buf;
+        else
+            channel_delay[i] <= !reset_n ? 0 : channel_delay[i - 1];
+    end
 end
+assign m_axis_out_sin_tuser = channel_delay[LATENCY - 2];
+assign m_axis_out_cos_tuser = channel_delay[LATENCY - 2];
+assign m_axis_out_tuser = channel_delay[LATENCY - 2];
 
-// taylor correction, stage 9 : addition and output buffer
-localparam TAYLOR_OUT_PIPELINE_STAGES = 1;  // more than 1 does not seem to help here, dsp only pulls in 1 reg
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] out_sin_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
-reg signed [TAYLOR_MULT_WIDTH - 1 : 0] out_cos_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
-reg out_valid_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1 : 0];
-if (USE_TAYLOR) begin
+// ------------------- MIXER -----------------------------
+// USE_MIXER multiplies every sample of s_axis_mix with the dds output cos - j*sin (down conversion, up conversion
+// with NEGATIVE_SINE = 1). The mixer sample is taken together with the phase of the same beat and is delayed like
+// the channel number, so that it meets the sin/cos of its phase at the output registers.
+//   i_out = (i * cos + q * sin) >>> (OUT_DW - 1)
+//   q_out = (q * cos - i * sin) >>> (OUT_DW - 1)
+// With a real input (USE_MIXER = 1) q is 0. Like in the taylor stage every product has its own register for the
+// M reg of a DSP48 and the sum is registered in the P reg of the second DSP48, the output is 2 clocks after
+// m_axis_out. i_out and q_out are MIXER_DW + 1 bits wide, because the sum of two products can exceed MIXER_DW bits.
+localparam MIX_PRODUCT_WIDTH = MIXER_DW + OUT_DW;
+if (USE_MIXER) begin : mixer
+    reg signed [2*SAMPLES_PER_CLOCK*MIXER_DW - 1 : 0] mix_delay [0 : LATENCY - 1];
     always_ff @(posedge clk) begin
-        integer k;
-        for (k = 0; k < TAYLOR_OUT_PIPELINE_STAGES; k = k + 1) begin
-            if (k == 0) begin  // addition
-                out_sin_buf2[0]     <= !reset_n ? 0 : sin_corrected;
-                out_cos_buf2[0]     <= !reset_n ? 0 : cos_corrected; 
-                out_valid_buf2[0]   <= !reset_n ? 0 : valid_taylor[TAYLOR_PIPELINE_STAGES-1];    
+        integer i;
+        for (i = 0; i < LATENCY; i = i + 1) begin
+            if (i == 0)
+                mix_delay[0] <= !reset_n ? 0 : (s_axis_phase_tvalid ? s_axis_mix_tdata : mix_delay[0]);
+            else
+                mix_delay[i] <= !reset_n ? 0 : mix_delay[i - 1];
+        end
+    end
+
+    for (genvar l = 0; l < SAMPLES_PER_CLOCK; l = l + 1) begin : mixer_lane
+        wire signed [MIXER_DW - 1 : 0] in_i = mix_delay[LATENCY - 1][l*2*MIXER_DW +: MIXER_DW];
+        wire signed [MIXER_DW - 1 : 0] in_q = USE_MIXER == 2 ? mix_delay[LATENCY - 1][l*2*MIXER_DW + MIXER_DW +: MIXER_DW] : '0;
+        wire signed [OUT_DW - 1 : 0] sin = m_axis_out_sin_tdata[l*OUT_DW +: OUT_DW];
+        wire signed [OUT_DW - 1 : 0] cos = m_axis_out_cos_tdata[l*OUT_DW +: OUT_DW];
+        reg signed [MIX_PRODUCT_WIDTH - 1 : 0] i_cos, q_sin, q_cos, i_sin;
+        reg signed [MIX_PRODUCT_WIDTH - 1 : 0] out_i, out_q;
+        always_ff @(posedge clk) begin
+            if (!reset_n) begin
+                i_cos <= '0;
+                q_sin <= '0;
+                q_cos <= '0;
+                i_sin <= '0;
+                out_i <= '0;
+                out_q <= '0;
+            end else begin
+                i_cos <= in_i * cos;
+                q_sin <= in_q * sin;
+                q_cos <= in_q * cos;
+                i_sin <= in_i * sin;
+                out_i <= i_cos + q_sin;
+                out_q <= q_cos - i_sin;
+            end
+        end
+        assign m_axis_mix_tdata[l*2*(MIXER_DW+1) +: 2*(MIXER_DW+1)] = {out_q[OUT_DW - 1 +: MIXER_DW + 1], out_i[OUT_DW - 1 +: MIXER_DW + 1]};
+    end
+
+    reg [1:0] mix_valid;
+    reg [CHANNEL_DW - 1 : 0] mix_channel [0 : 1];
+    always_ff @(posedge clk) begin
+        mix_valid <= !reset_n ? 0 : {mix_valid[0], lane_valid[0]};
+        mix_channel[0] <= !reset_n ? 0 : channel_delay[LATENCY - 2];
+        mix_channel[1] <= !reset_n ? 0 : mix_channel[0];
+    end
+    assign m_axis_mix_tvalid = mix_valid[1];
+    assign m_axis_mix_tuser = mix_channel[1];
+end
+else begin : no_mixer
+    assign m_axis_mix_tdata = '0;
+    assign m_axis_mix_tvalid = 1'b0;
+    assign m_axis_mix_tuser = '0;
+end
+
+endmodule
+
+// quarter wave sine lut with 2 asynchronous read ports, the output register is in the lane pipeline of dds
+//
+// LUT_COMPRESSION = 1 replaces the lut by a coarse and a fine lut (sunderland architecture). The index is split
+// into A (SUNDERLAND_A msbs), B and C (SUNDERLAND_C lsbs) and sin(A + B + C) = coarse[A,B] + fine[A,C] with
+//   coarse[A,B] = sin(A + B + mid(C))
+//   fine[A,C]   = cos(A + mid(B) + mid(C)) * sin(C - mid(C))
+// The luts have 2**(A+B) entries of COARSE_DW bits and 2**(A+C) entries of FINE_DW bits instead of 2**(A+B+C)
+// entries of OUT_DW bits. Both luts have GUARD fraction bits, the sum is rounded once to OUT_DW bits and saturated
+// to the full scale value. Rounding each lut to OUT_DW bits would add up to 1 LSB to the 0.5 LSB of the quarter
+// wave lut. The fine lut ignores B, with the default split A = 8, C = 3 and LUT_WIDTH >= OUT_DW - 2 this error stays
+// below 1/16 LSB (see README). The adder is in the read path, so the small luts fit into distributed ram.
+module dds_lut
+/*********************************************************************************************/
+#(
+    parameter LUT_WIDTH = 10,
+    parameter OUT_DW = 16,
+    parameter USE_LUT_FILE = 0,
+    parameter LUT_COMPRESSION = 0,
+    parameter SUNDERLAND_A = 8,
+    parameter SUNDERLAND_C = 3
+)
+/*********************************************************************************************/
+(
+    input   wire           [LUT_WIDTH-1:0]  addr_a,
+    input   wire           [LUT_WIDTH-1:0]  addr_b,
+    output  wire    signed [OUT_DW-1:0]     data_a,
+    output  wire    signed [OUT_DW-1:0]     data_b
+);
+/*********************************************************************************************/
+if (LUT_COMPRESSION) begin : sunderland
+    localparam A = SUNDERLAND_A;
+    localparam C = SUNDERLAND_C;
+    localparam B = LUT_WIDTH - A - C;
+    localparam GUARD = 6;  // SUNDERLAND_GUARD in dds_model.py
+    localparam COARSE_DW = OUT_DW + GUARD;
+    localparam FINE_DW = (C + OUT_DW - LUT_WIDTH > 2 ? C + OUT_DW - LUT_WIDTH : 2) + GUARD;  // |fine| < 2**(FINE_DW-1)
+    localparam signed [OUT_DW:0] MAX_VAL = 2**(OUT_DW-1) - 1;
+    localparam signed [COARSE_DW:0] HALF = 2**(GUARD-1);
+
+    reg signed [COARSE_DW - 1 : 0] coarse [0 : 2**(A+B) - 1];
+    reg signed [FINE_DW - 1 : 0] fine [0 : 2**(A+C) - 1];
+    initial begin
+        if (USE_LUT_FILE) begin
+            `ifdef LUT_PATH
+                $readmemh($sformatf("%s/sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_coarse.hex",`LUT_PATH,LUT_WIDTH,OUT_DW,A,C,GUARD), coarse);
+                $readmemh($sformatf("%s/sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_fine.hex",`LUT_PATH,LUT_WIDTH,OUT_DW,A,C,GUARD), fine);
+            `elsif COCOTB_SIM
+                $readmemh($sformatf("sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_coarse.hex",LUT_WIDTH,OUT_DW,A,C,GUARD), coarse);
+                $readmemh($sformatf("sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_fine.hex",LUT_WIDTH,OUT_DW,A,C,GUARD), fine);
+            `else // for vivado
+                $readmemh($sformatf("../../../submodules/DDS/lut_data/sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_coarse.hex",LUT_WIDTH,OUT_DW,A,C,GUARD), coarse);
+                $readmemh($sformatf("../../../submodules/DDS/lut_data/sine_lut_%0d_%0d_sunderland_%0d_%0d_%0d_fine.hex",LUT_WIDTH,OUT_DW,A,C,GUARD), fine);
+            `endif
+        end else begin
+            integer i;
+            // same operation order as sunderland_luts() in dds_model.py, so that the rounding is identical
+            for (i = 0; i < 2 ** (A+B); i = i + 1) begin
+                coarse[i] = $sin(2 * 3.141592653589793238 * ($itor(i) * 2**C + (2**C - 1) / 2.0) / $itor(2 ** LUT_WIDTH) / 4) * ($itor(2**(OUT_DW - 1) - 1) * 2.0**GUARD);
             end
-            else begin  // pipeline result of addition
-                out_sin_buf2[k]     <= !reset_n ? 0 : out_sin_buf2[k-1];
-                out_cos_buf2[k]     <= !reset_n ? 0 : out_cos_buf2[k-1];
-                out_valid_buf2[k]   <= !reset_n ? 0 : out_valid_buf2[k-1];
+            for (i = 0; i < 2 ** (A+C); i = i + 1) begin
+                fine[i] = $cos(2 * 3.141592653589793238 * ($itor((i >> C) * 2**(B+C)) + (2**B - 1) * 2**C / 2.0 + (2**C - 1) / 2.0) / $itor(2 ** LUT_WIDTH) / 4)
+                        * $sin(2 * 3.141592653589793238 * ($itor(i % 2**C) - (2**C - 1) / 2.0) / $itor(2 ** LUT_WIDTH) / 4) * ($itor(2**(OUT_DW - 1) - 1) * 2.0**GUARD);
             end
         end
     end
+
+    wire signed [COARSE_DW : 0] sum_a, sum_b;
+    wire signed [OUT_DW : 0] rounded_a, rounded_b;
+    assign sum_a = coarse[addr_a[LUT_WIDTH-1 : C]] + fine[{addr_a[LUT_WIDTH-1 -: A], addr_a[C-1 : 0]}] + HALF;
+    assign sum_b = coarse[addr_b[LUT_WIDTH-1 : C]] + fine[{addr_b[LUT_WIDTH-1 -: A], addr_b[C-1 : 0]}] + HALF;
+    assign rounded_a = sum_a >>> GUARD;
+    assign rounded_b = sum_b >>> GUARD;
+    assign data_a = rounded_a > MAX_VAL ? MAX_VAL[OUT_DW-1:0] : rounded_a[OUT_DW-1:0];
+    assign data_b = rounded_b > MAX_VAL ? MAX_VAL[OUT_DW-1:0] : rounded_b[OUT_DW-1:0];
 end
+else begin : quarter_wave
+    reg signed [OUT_DW - 1 : 0] lut [0 : 2**LUT_WIDTH - 1];
+    initial	begin
+        if (USE_LUT_FILE) begin
+            `ifdef LUT_PATH  // recommended to use this
+                $display("LUT_PATH = %s",`LUT_PATH);
+                $readmemh($sformatf("%s/sine_lut_%0d_%0d.hex",`LUT_PATH,LUT_WIDTH,OUT_DW), lut);  // for makefile
+            `elsif COCOTB_SIM
+                $readmemh($sformatf("sine_lut_%0d_%0d.hex",LUT_WIDTH,OUT_DW), lut);  // for pytest, depends on execution dir
+            `else // for vivado
+                $readmemh($sformatf("../../../submodules/DDS/lut_data/sine_lut_%0d_%0d.hex",LUT_WIDTH,OUT_DW), lut);
+            `endif
+        end else begin
+            integer i;
+            for (i = 0; i < 2 ** LUT_WIDTH; i = i + 1) begin
+                // implicit conversion from real to integer does round away from zero
+                // explicit conversion with $rtoi() does truncation
+                // https://stackoverflow.com/questions/42003998/systemverilog-round-real-type
+                lut[i] = $sin(2 * 3.141592653589793238 * $itor(i) / $itor((2 ** LUT_WIDTH)) / 4) * $itor((2** (OUT_DW - 1) - 1));
+            end
+        end
+    end
 
-if (USE_TAYLOR) begin
-    wire signed [TAYLOR_MULT_WIDTH -1 : 0] out_sin;  // create wires to truncate unneeded bits (divide by 2**(PHASE_DW))
-    wire signed [TAYLOR_MULT_WIDTH -1 : 0] out_cos;
-    assign out_sin = out_sin_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
-    assign out_cos = out_cos_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
-    assign m_axis_out_sin_tdata = out_sin[TAYLOR_MULT_WIDTH - 1 -: OUT_DW];
-    assign m_axis_out_cos_tdata = out_cos[TAYLOR_MULT_WIDTH - 1 -: OUT_DW];
-    assign m_axis_out_sin_tvalid = out_valid_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];
-    assign m_axis_out_cos_tvalid = out_valid_buf2[TAYLOR_OUT_PIPELINE_STAGES - 1];    
+    assign data_a = lut[addr_a];
+    assign data_b = lut[addr_b];
 end
-else begin
-    assign m_axis_out_sin_tdata = out_sin_buf;
-    assign m_axis_out_cos_tdata = out_cos_buf;
-    assign m_axis_out_sin_tvalid = out_valid_buf;
-    assign m_axis_out_cos_tvalid = out_valid_buf;
+
+endmodule
+
+// pipelined cordic in rotation mode, one iteration per clock, no memory
+//
+// The 2nd and 3rd quadrant are rotated by pi (the result is negated), so that the angle is in [-pi/2, pi/2) where
+// the cordic converges. x starts with the full scale value divided by the cordic gain, y with 0. The angle z has
+// enough fraction bits that the rounding of the atan constants is far below 1 LSB, x and y have GUARD extra bits
+// for the truncation in the shifts. The error is about 2**(OUT_DW - ITERATIONS) LSB plus rounding.
+module dds_cordic
+/*********************************************************************************************/
+#(
+    parameter PHASE_DW = 16,
+    parameter OUT_DW = 16,
+    parameter ITERATIONS = 18,
+    parameter SIN_COS = 0,
+    parameter NEGATIVE_SINE = 0,
+    parameter NEGATIVE_COSINE = 0
+)
+/*********************************************************************************************/
+(
+    input                                   clk,
+    input                                   reset_n,
+    input   wire           [PHASE_DW-1:0]   phase,
+    input                                   in_valid,
+    output  wire    signed [OUT_DW-1:0]     sin,
+    output  wire    signed [OUT_DW-1:0]     cos,
+    output                                  out_valid
+);
+/*********************************************************************************************/
+localparam GUARD = $clog2(ITERATIONS) + 2;
+localparam XW = OUT_DW + GUARD + 1;
+localparam ZW = (PHASE_DW > OUT_DW + GUARD + 2 ? PHASE_DW : OUT_DW + GUARD + 2) + 2;  // 2**ZW is 2*pi
+localparam signed [XW:0] MAX_VAL = 2**(OUT_DW-1) - 1;
+localparam signed [XW:0] HALF = 2**(GUARD-1);
+
+// cordic gain prod(sqrt(1 + 2**(-2i))) of the first ITERATIONS iterations, unrolled because yosys has no real
+// variables. The factors of i >= 26 are 1.0 in double precision, so 26 factors cover every ITERATIONS.
+`define CORDIC_GAIN_FACTOR(i) (ITERATIONS > i ? $sqrt(1.0 + 2.0**(-2 * i)) : 1.0)
+localparam real GAIN = `CORDIC_GAIN_FACTOR(0) * `CORDIC_GAIN_FACTOR(1) * `CORDIC_GAIN_FACTOR(2) * `CORDIC_GAIN_FACTOR(3)
+    * `CORDIC_GAIN_FACTOR(4) * `CORDIC_GAIN_FACTOR(5) * `CORDIC_GAIN_FACTOR(6) * `CORDIC_GAIN_FACTOR(7)
+    * `CORDIC_GAIN_FACTOR(8) * `CORDIC_GAIN_FACTOR(9) * `CORDIC_GAIN_FACTOR(10) * `CORDIC_GAIN_FACTOR(11)
+    * `CORDIC_GAIN_FACTOR(12) * `CORDIC_GAIN_FACTOR(13) * `CORDIC_GAIN_FACTOR(14) * `CORDIC_GAIN_FACTOR(15)
+    * `CORDIC_GAIN_FACTOR(16) * `CORDIC_GAIN_FACTOR(17) * `CORDIC_GAIN_FACTOR(18) * `CORDIC_GAIN_FACTOR(19)
+    * `CORDIC_GAIN_FACTOR(20) * `CORDIC_GAIN_FACTOR(21) * `CORDIC_GAIN_FACTOR(22) * `CORDIC_GAIN_FACTOR(23)
+    * `CORDIC_GAIN_FACTOR(24) * `CORDIC_GAIN_FACTOR(25);
+`undef CORDIC_GAIN_FACTOR
+// implicit conversion from real to integer does round away from zero
+localparam signed [XW - 1 : 0] X_INIT = $itor(2**(OUT_DW - 1) - 1) * 2.0**GUARD / GAIN;
+
+reg signed [ZW - 1 : 0] atan_table [0 : ITERATIONS - 1];
+initial begin
+    integer i;
+    for (i = 0; i < ITERATIONS; i = i + 1) begin
+        atan_table[i] = $atan(2.0**(-i)) / (2 * 3.141592653589793) * 2.0**ZW;
+    end
+end
+
+// angle fold, stage 2
+wire flip_in = phase[PHASE_DW - 1] ^ phase[PHASE_DW - 2];  // 2nd or 3rd quadrant
+reg signed [XW - 1 : 0] x [0 : ITERATIONS];
+reg signed [XW - 1 : 0] y [0 : ITERATIONS];
+reg signed [ZW - 1 : 0] z [0 : ITERATIONS];
+reg [ITERATIONS : 0] flip;
+reg [ITERATIONS : 0] valid;
+
+// rotation towards z = 0, stage 3 .. ITERATIONS + 2
+always_ff @(posedge clk) begin
+    integer i;
+    if (!reset_n) begin
+        for (i = 0; i <= ITERATIONS; i = i + 1) begin
+            x[i] <= '0;
+            y[i] <= '0;
+            z[i] <= '0;
+        end
+        flip <= '0;
+        valid <= '0;
+    end else begin
+        x[0] <= X_INIT;
+        y[0] <= '0;
+        z[0] <= {phase[PHASE_DW - 1] ^ flip_in, phase[PHASE_DW - 2 : 0], {(ZW - PHASE_DW){1'b0}}};
+        flip[0] <= flip_in;
+        valid[0] <= in_valid;
+        for (i = 0; i < ITERATIONS; i = i + 1) begin
+            if (!z[i][ZW - 1]) begin
+                x[i + 1] <= x[i] - (y[i] >>> i);
+                y[i + 1] <= y[i] + (x[i] >>> i);
+                z[i + 1] <= z[i] - atan_table[i];
+            end else begin
+                x[i + 1] <= x[i] + (y[i] >>> i);
+                y[i + 1] <= y[i] - (x[i] >>> i);
+                z[i + 1] <= z[i] + atan_table[i];
+            end
+            flip[i + 1] <= flip[i];
+            valid[i + 1] <= valid[i];
+        end
+    end
+end
+
+// rounding, saturation and sign, stage ITERATIONS + 3
+wire signed [XW : 0] sin_rounded = (y[ITERATIONS] + HALF) >>> GUARD;
+wire signed [XW : 0] cos_rounded = (x[ITERATIONS] + HALF) >>> GUARD;
+wire signed [XW : 0] sin_saturated = sin_rounded > MAX_VAL ? MAX_VAL : (sin_rounded < -MAX_VAL ? -MAX_VAL : sin_rounded);
+wire signed [XW : 0] cos_saturated = cos_rounded > MAX_VAL ? MAX_VAL : (cos_rounded < -MAX_VAL ? -MAX_VAL : cos_rounded);
+reg signed [OUT_DW - 1 : 0] sin_buf;
+reg signed [OUT_DW - 1 : 0] cos_buf;
+reg valid_buf;
+always_ff @(posedge clk) begin
+    if (!reset_n) begin
+        sin_buf <= '0;
+        cos_buf <= '0;
+        valid_buf <= '0;
+    end else begin
+        sin_buf <= (flip[ITERATIONS] != NEGATIVE_SINE) ? -sin_saturated[OUT_DW - 1 : 0] : sin_saturated[OUT_DW - 1 : 0];
+        if (SIN_COS)
+            cos_buf <= (flip[ITERATIONS] != NEGATIVE_COSINE) ? -cos_saturated[OUT_DW - 1 : 0] : cos_saturated[OUT_DW - 1 : 0];
+        valid_buf <= valid[ITERATIONS];
+    end
 end
-assign m_axis_out_tdata = {m_axis_out_sin_tdata, m_axis_out_cos_tdata};
-assign m_axis_out_tvalid = m_axis_out_sin_tvalid;
+assign sin = sin_buf;
+assign cos = cos_buf;
+assign out_valid = valid_buf;
 
-endmodule
\ No newline at end of file
+endmodule
@@ -1,11 +1,171 @@
-from fixedpoint import FixedPoint
-from bitstring import BitArray
-
 import math
+import os
 import numpy as np
 
+import importlib.util
+
+spec = importlib.util.spec_from_file_location("nco", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nco.py'))
+nco = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nco)
+
+# constants of the taylor correction in dds.sv
+PI_DECIMAL_SHIFT = 14
+PHASE_FACTOR = int((2 * 3.141592654) * 2**PI_DECIMAL_SHIFT)
+
+def sine_lut(LUT_DW, OUT_DW):
+    # quarter wave lut like it is initialized in dds.sv,
+    # conversion from real to integer rounds away from zero
+    i = np.arange(2**LUT_DW)
+    return np.floor(np.sin(2 * np.pi * i / 2**LUT_DW / 4) * (2**(OUT_DW - 1) - 1) + 0.5).astype(np.int64)
+
+# fraction bits of the coarse and fine lut (LUT_COMPRESSION = 1), the sum is rounded once to OUT_DW bits
+SUNDERLAND_GUARD = 6
+
+def sunderland_luts(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C):
+    # Coarse and fine lut of the compressed quarter wave lut (LUT_COMPRESSION = 1) like they are initialized
+    # in dds_lut. The lut index is split into A (SUNDERLAND_A msbs), B and C (SUNDERLAND_C lsbs):
+    # coarse[A,B] = sin(A + B + mid(C)), fine[A,C] = cos(A + mid(B) + mid(C)) * sin(C - mid(C)).
+    # Both luts have SUNDERLAND_GUARD fraction bits, so that only the sum is rounded to OUT_DW bits.
+    # math.sin is used instead of numpy so that the values match the real arithmetic of the simulator.
+    A, C = SUNDERLAND_A, SUNDERLAND_C
+    B = LUT_WIDTH - A - C
+    max_val = (2**(OUT_DW - 1) - 1) * 2**SUNDERLAND_GUARD
+    def away(x):
+        # conversion from real to integer rounds away from zero
+        return int(math.copysign(math.floor(abs(x) + 0.5), x))
+    coarse = [away(math.sin(2 * math.pi * (k * 2**C + (2**C - 1) / 2) / 2**LUT_WIDTH / 4) * max_val)
+              for k in range(2**(A + B))]
+    fine = [away(math.cos(2 * math.pi * ((k >> C) * 2**(B + C) + (2**B - 1) * 2**C / 2 + (2**C - 1) / 2) / 2**LUT_WIDTH / 4)
+                 * math.sin(2 * math.pi * ((k & (2**C - 1)) - (2**C - 1) / 2) / 2**LUT_WIDTH / 4) * max_val)
+            for k in range(2**(A + C))]
+    return np.array(coarse, dtype=np.int64), np.array(fine, dtype=np.int64)
+
+def sunderland_coarse_width(OUT_DW):
+    # same as COARSE_DW in dds_lut
+    return OUT_DW + SUNDERLAND_GUARD
+
+def sunderland_fine_width(LUT_WIDTH, OUT_DW, SUNDERLAND_C):
+    # |fine| < 2**(SUNDERLAND_C + OUT_DW - LUT_WIDTH - 1) LSB, same as FINE_DW in dds_lut
+    return max(SUNDERLAND_C + OUT_DW - LUT_WIDTH, 2) + SUNDERLAND_GUARD
+
+def sunderland_lut(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C):
+    # quarter wave lut that dds_lut reads from the coarse and fine lut, the sum is rounded (half up)
+    # and saturated to the full scale value
+    coarse, fine = sunderland_luts(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C)
+    i = np.arange(2**LUT_WIDTH)
+    C = SUNDERLAND_C
+    fine_index = ((i >> (LUT_WIDTH - SUNDERLAND_A)) << C) | (i & (2**C - 1))
+    rounded = (coarse[i >> C] + fine[fine_index] + 2**(SUNDERLAND_GUARD - 1)) >> SUNDERLAND_GUARD
+    return np.minimum(rounded, 2**(OUT_DW - 1) - 1)
+
+def dds_bit_exact(phases, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, lut=None):
+    # integer model of the dds.sv datapath without pipeline delay,
+    # returns the values of m_axis_out_sin_tdata and m_axis_out_cos_tdata for each phase
+    phases = np.asarray(phases, dtype=np.int64)
+    lut_width = LUT_DW if USE_TAYLOR else PHASE_DW - 2
+    if lut is None:
+        lut = sine_lut(lut_width, OUT_DW)
+    max_val = 2**(OUT_DW - 1) - 1
+
+    # stage 2: lut index, 2nd and 4th quadrant are mirrored with ~index + 1
+    quadrant = (phases >> (PHASE_DW - 2)) & 3
+    index = (phases >> (PHASE_DW - 2 - lut_width)) & (2**lut_width - 1)
+    mirrored = (~index + 1) & (2**lut_width - 1)
+    odd_quadrant = (quadrant & 1).astype(bool)
+    sin_index = np.where(odd_quadrant, mirrored, index)
+    cos_index = np.where(odd_quadrant, index, mirrored)
+
+    # stage 3: lut read, the mirrored index 0 is the full scale value which is not in the lut
+    sin = np.where(odd_quadrant & (sin_index == 0), max_val, lut[sin_index])
+    cos = np.where(~odd_quadrant & (cos_index == 0), max_val, lut[cos_index])
+
+    # stage 4: sign
+    sin = np.where((quadrant >= 2) != bool(NEGATIVE_SINE), -sin, sin)
+    cos = np.where(((quadrant == 1) | (quadrant == 2)) != bool(NEGATIVE_COSINE), -cos, cos)
+    if not (SIN_COS or USE_TAYLOR):
+        return sin, np.zeros(len(phases), dtype=np.int64)
+    if not USE_TAYLOR:
+        return sin, cos
+
+    # stage 4-5: phase error times 2*pi, scaled by 2**PI_DECIMAL_SHIFT and truncated
+    phase_error = phases & (2**(PHASE_DW - (LUT_DW + 2)) - 1)
+    phase_error_multiplied = (phase_error * PHASE_FACTOR) >> PI_DECIMAL_SHIFT
+
+    # stage 8-9: taylor correction in TAYLOR_MULT_WIDTH = PHASE_DW + OUT_DW bits,
+    # output is the upper OUT_DW bits
+    if NEGATIVE_SINE != NEGATIVE_COSINE:
+        sin_corrected = (sin << PHASE_DW) - cos * phase_error_multiplied
+        cos_corrected = (cos << PHASE_DW) + sin * phase_error_multiplied
+    else:
+        sin_corrected = (sin << PHASE_DW) + cos * phase_error_multiplied
+        cos_corrected = (cos << PHASE_DW) - sin * phase_error_multiplied
+    return to_signed(sin_corrected >> PHASE_DW, OUT_DW), to_signed(cos_corrected >> PHASE_DW, OUT_DW)
+
+def cordic_widths(PHASE_DW, OUT_DW, CORDIC_ITERATIONS):
+    # guard bits of x and y, width of the angle z, same as in dds.sv
+    guard = (CORDIC_ITERATIONS - 1).bit_length() + 2
+    z_width = max(PHASE_DW, OUT_DW + guard + 2) + 2
+    return guard, z_width
+
+def cordic_constants(PHASE_DW, OUT_DW, CORDIC_ITERATIONS):
+    # atan(2**-i) in units of 2*pi / 2**z_width and the start value of x that compensates the cordic gain,
+    # calculated with the same real arithmetic as the initial block in dds.sv, conversion rounds away from zero
+    guard, z_width = cordic_widths(PHASE_DW, OUT_DW, CORDIC_ITERATIONS)
+    pi = 3.141592653589793
+    atan = []
+    gain = 1.0
+    for i in range(CORDIC_ITERATIONS):
+        atan.append(math.floor(math.atan(2.0**(-i)) / (2 * pi) * 2.0**z_width + 0.5))
+        gain = gain * math.sqrt(1.0 + 2.0**(-2 * i))
+    x_init = math.floor((2**(OUT_DW - 1) - 1) * 2.0**guard / gain + 0.5)
+    return np.array(atan, dtype=np.int64), x_init
+
+def cordic_bit_exact(phases, PHASE_DW, OUT_DW, CORDIC_ITERATIONS, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE):
+    # integer model of the cordic engine of dds.sv (USE_CORDIC = 1) without pipeline delay
+    phases = np.asarray(phases, dtype=np.int64)
+    guard, z_width = cordic_widths(PHASE_DW, OUT_DW, CORDIC_ITERATIONS)
+    atan, x_init = cordic_constants(PHASE_DW, OUT_DW, CORDIC_ITERATIONS)
+    max_val = 2**(OUT_DW - 1) - 1
+
+    # stage 2: the 2nd and 3rd quadrant are rotated by pi, so that the angle is in [-pi/2, pi/2)
+    flip = ((phases >> (PHASE_DW - 1)) ^ (phases >> (PHASE_DW - 2))) & 1
+    z = to_signed(phases ^ (flip << (PHASE_DW - 1)), PHASE_DW) << (z_width - PHASE_DW)
+    x = np.full(len(phases), x_init, dtype=np.int64)
+    y = np.zeros(len(phases), dtype=np.int64)
+
+    # stage 3 .. CORDIC_ITERATIONS + 2: rotation towards z = 0
+    for i in range(CORDIC_ITERATIONS):
+        positive = z >= 0
+        x, y = np.where(positive, x - (y >> i), x + (y >> i)), np.where(positive, y + (x >> i), y - (x >> i))
+        z = np.where(positive, z - atan[i], z + atan[i])
+
+    # output stage: remove the guard bits with rounding, saturate and apply the sign
+    sin = np.clip((y + 2**(guard - 1)) >> guard, -max_val, max_val)
+    cos = np.clip((x + 2**(guard - 1)) >> guard, -max_val, max_val)
+    sin = np.where(flip.astype(bool) != bool(NEGATIVE_SINE), -sin, sin)
+    cos = np.where(flip.astype(bool) != bool(NEGATIVE_COSINE), -cos, cos)
+    if not SIN_COS:
+        cos = np.zeros(len(phases), dtype=np.int64)
+    return sin, cos
+
+def mixer_bit_exact(data_i, data_q, sin, cos, OUT_DW):
+    # mixer of dds.sv (USE_MIXER): (i + j*q) * (cos - j*sin), the sums are shifted right by OUT_DW - 1
+    # with truncation, q is 0 for a real input
+    data_i = np.asarray(data_i, dtype=np.int64)
+    data_q = np.zeros(len(data_i), dtype=np.int64) if data_q is None else np.asarray(data_q, dtype=np.int64)
+    sin = np.asarray(sin, dtype=np.int64)
+    cos = np.asarray(cos, dtype=np.int64)
+    return (data_i * cos + data_q * sin) >> (OUT_DW - 1), (data_q * cos - data_i * sin) >> (OUT_DW - 1)
+
+def to_signed(data, width):
+    # two's complement wrap around to width bits
+    data = np.asarray(data, dtype=np.int64) & (2**width - 1)
+    return np.where(data >= 2**(width - 1), data - 2**width, data)
+
 class Model:
-    def __init__(self, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE):
+    def __init__(self, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, bit_exact=False,
+                 SAMPLES_PER_CLOCK=1, LUT_COMPRESSION=0, SUNDERLAND_A=8, SUNDERLAND_C=3, CHANNELS=1,
+                 USE_CORDIC=0, CORDIC_ITERATIONS=18):
         self.PHASE_DW = PHASE_DW
         self.OUT_DW = OUT_DW
         self.USE_TAYLOR = USE_TAYLOR
@@ -13,56 +173,200 @@ class Model:
         self.SIN_COS = SIN_COS
         self.NEGATIVE_SINE = NEGATIVE_SINE
         self.NEGATIVE_COSINE = NEGATIVE_COSINE
+        # bit_exact = True reproduces the fixed point arithmetic of dds.sv,
+        # otherwise the ideal rounded sin/cos is calculated
+        self.bit_exact = bit_exact
+        # With SAMPLES_PER_CLOCK > 1 every tick processes one beat of SAMPLES_PER_CLOCK phases (lane 0 first),
+        # set_data() takes and get_data() returns one array per beat. process() works on samples in time order,
+        # valid is per beat and is returned per sample.
+        self.SAMPLES_PER_CLOCK = SAMPLES_PER_CLOCK
+        # LUT_COMPRESSION = 1 uses the coarse and fine lut of dds_lut, only used by the bit exact model
+        self.LUT_COMPRESSION = LUT_COMPRESSION
+        self.SUNDERLAND_A = SUNDERLAND_A
+        self.SUNDERLAND_C = SUNDERLAND_C
+        # With CHANNELS > 1 every beat has a channel number (tuser) that is delayed like the data,
+        # get_channel() returns the channel of the current output and process() returns it as 4th array.
+        self.CHANNELS = CHANNELS
+        # USE_CORDIC = 1 replaces lut and taylor correction by the cordic engine, only used by the bit exact model
+        self.USE_CORDIC = USE_CORDIC
+        self.CORDIC_ITERATIONS = CORDIC_ITERATIONS
+        if self.bit_exact and not USE_CORDIC:
+            lut_width = LUT_DW if USE_TAYLOR else PHASE_DW - 2
+            if LUT_COMPRESSION:
+                self.lut = sunderland_lut(lut_width, OUT_DW, SUNDERLAND_A, SUNDERLAND_C)
+            else:
+                self.lut = sine_lut(lut_width, OUT_DW)
         
         self.extra_delay = 5                
-        if self.USE_TAYLOR:
+        if self.USE_CORDIC:
+            self.extra_delay = CORDIC_ITERATIONS + 4
+        elif self.USE_TAYLOR:
             self.extra_delay += 6
             
-        self.data_out_buf = np.zeros(self.extra_delay+1)
-        self.data_out_cos_buf = np.zeros(self.extra_delay+1)
-        self.out_valid = np.zeros(self.extra_delay+1)
-        self.in_valid = 0
-        self.data_in_buf = 0
-
+        self.reset()
 
-    def set_data(self, data_in):
-        self.data_in_buf = data_in
+    def set_data(self, data_in, channel=0):
+        self.data_in_buf = np.asarray(data_in, dtype=np.int64).reshape(self.SAMPLES_PER_CLOCK)
+        self.channel_in_buf = channel
         self.in_valid = 1
         
     def reset(self):
-        self.data_out_buf = np.zeros(self.extra_delay+1)
-        self.data_out_cos_buf = np.zeros(self.extra_delay+1)
-        self.out_valid = np.zeros(self.extra_delay+1)
+        # the pipeline is a ring buffer of extra_delay beats, delay_index points to the oldest one,
+        # which is the current output
+        lanes = self.SAMPLES_PER_CLOCK
+        self.data_out_buf = np.zeros((self.extra_delay, lanes), dtype=np.int64)
+        self.data_out_cos_buf = np.zeros((self.extra_delay, lanes), dtype=np.int64)
+        self.out_valid = np.zeros(self.extra_delay, dtype=bool)
+        self.channel_out_buf = np.zeros(self.extra_delay, dtype=np.int64)
+        self.delay_index = 0
+        self.valid_buf = False
         self.in_valid = 0
-        self.data_in_buf = 0
+        self.data_in_buf = np.zeros(lanes, dtype=np.int64)
+        self.channel_in_buf = 0
+
+    def _beat(self, data):
+        return data[0] if self.SAMPLES_PER_CLOCK == 1 else data.copy()
 
     def data_valid(self):
-        return self.out_valid[self.extra_delay]
+        return self.out_valid[self.delay_index]
 
     def get_data(self):
-        return self.data_out_buf[self.extra_delay]
+        return self._beat(self.data_out_buf[self.delay_index])
 
     def get_data_cos(self):
-        return self.data_out_cos_buf[self.extra_delay]
+        return self._beat(self.data_out_cos_buf[self.delay_index])
+
+    def get_channel(self):
+        return self.channel_out_buf[self.delay_index]
         
     def tick(self):
 
         if self.in_valid == 1:
-            self.out_valid[0] = 1
+            self.valid_buf = True
             self.in_valid = 0
         
+        sin, cos = self._compute(self.data_in_buf)
+        i = self.delay_index
+        self.data_out_buf[i] = sin
+        self.data_out_cos_buf[i] = cos
+        self.out_valid[i] = self.valid_buf
+        self.channel_out_buf[i] = self.channel_in_buf
+        self.delay_index = (i + 1) % self.extra_delay
+
+    def process(self, phases, valid=None, channels=None):
+        # Block version of tick(): element i of the result is what get_data(), get_data_cos()
+        # and data_valid() return after set_data(phases[i]) (only if valid[i]) and tick().
+        # The delay line is shared with tick(), so both can be mixed freely.
+        # With SAMPLES_PER_CLOCK lanes phases is split into beats of SAMPLES_PER_CLOCK samples.
+        # With CHANNELS > 1 channels is the channel number per beat (default 0) and the channel of every
+        # output sample is returned as 4th array.
+        lanes = self.SAMPLES_PER_CLOCK
+        phases = np.asarray(phases, dtype=np.int64).reshape(-1, lanes)
+        n = len(phases)
+        if valid is None:
+            valid = np.ones(n, dtype=bool)
+        else:
+            valid = np.array(valid, dtype=bool)
+        if channels is None:
+            channels = np.zeros(n, dtype=np.int64)
+        else:
+            channels = np.asarray(channels, dtype=np.int64)
+        if n == 0:
+            empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool))
+            return empty + (np.zeros(0, dtype=np.int64),) if self.CHANNELS > 1 else empty
+        valid[0] |= bool(self.in_valid)
+
+        # input data is held while valid is low
+        last = np.where(valid, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        held = np.where((last >= 0)[:, None], phases[np.maximum(last, 0)], self.data_in_buf)
+        held_channels = np.where(last >= 0, channels[np.maximum(last, 0)], self.channel_in_buf)
+        # like in tick(), valid stays set after the first input until reset()
+        valid_in = np.logical_or.accumulate(valid) | self.valid_buf
+
+        sin, cos = self._compute(held.ravel())
+        # the delay line starts with the oldest beat of the ring buffer, output i is beat i + 1
+        i = self.delay_index
+        sin_line = np.concatenate((self.data_out_buf[i:], self.data_out_buf[:i], sin.reshape(n, lanes)))
+        cos_line = np.concatenate((self.data_out_cos_buf[i:], self.data_out_cos_buf[:i], cos.reshape(n, lanes)))
+        valid_line = np.concatenate((self.out_valid[i:], self.out_valid[:i], valid_in))
+        channel_line = np.concatenate((self.channel_out_buf[i:], self.channel_out_buf[:i], held_channels))
+
+        delay = self.extra_delay
+        self.data_out_buf[:] = sin_line[-delay:]
+        self.data_out_cos_buf[:] = cos_line[-delay:]
+        self.out_valid[:] = valid_line[-delay:]
+        self.channel_out_buf[:] = channel_line[-delay:]
+        self.delay_index = 0
+        self.valid_buf = bool(valid_in[-1])
+        self.data_in_buf = held[-1].copy()
+        self.channel_in_buf = held_channels[-1]
+        self.in_valid = 0
+
+        result = sin_line[1:n+1].ravel(), cos_line[1:n+1].ravel(), np.repeat(valid_line[1:n+1], lanes)
+        if self.CHANNELS > 1:
+            return result + (np.repeat(channel_line[1:n+1], lanes),)
+        return result
+
+    def process_channels(self, phases):
+        # Output of every channel for a (CHANNELS x samples) array of phases, row c are the phases of channel c.
+        # The pipeline has no state per channel, so this is computed directly without the delay line.
+        phases = np.asarray(phases, dtype=np.int64)
+        sin, cos = self._compute(phases.ravel())
+        return sin.reshape(phases.shape), cos.reshape(phases.shape)
+
+    def interleave(self, phases):
+        # Time multiplexed input stream of a (CHANNELS x samples) array: one beat of SAMPLES_PER_CLOCK samples
+        # per channel in turn. Returns the phases in time order and the channel number of every beat.
+        phases = np.asarray(phases, dtype=np.int64)
+        channels, samples = phases.shape
+        beats = phases.reshape(channels, samples // self.SAMPLES_PER_CLOCK, self.SAMPLES_PER_CLOCK)
+        return beats.transpose(1, 0, 2).ravel(), np.tile(np.arange(channels), samples // self.SAMPLES_PER_CLOCK)
+
+    def phases(self, fcw, n, phase_offset=0, accumulator=None):
+        # n phases of a constant frequency like the testbenches drive them: fcw is the frequency word of
+        # accumulator, a nco.PhaseAccumulator that continues from its state and is truncated to PHASE_DW bits,
+        # by default a new accumulator of PHASE_DW bits
+        if accumulator is None:
+            accumulator = nco.PhaseAccumulator(self.PHASE_DW)
+        elif accumulator.PHASE_DW != self.PHASE_DW:
+            raise ValueError("the accumulator has to output PHASE_DW bits")
+        return accumulator.ramp(fcw, n, phase_offset)
+
+    def tone(self, fcw, n, phase_offset=0, accumulator=None):
+        # reference of a constant frequency: the phases() and the output sample for every phase,
+        # computed directly without the delay line like process_channels()
+        phases = self.phases(fcw, n, phase_offset, accumulator)
+        sin, cos = self._compute(phases)
+        return phases, sin, cos
+
+    def mix(self, phases, data_i, data_q=None):
+        # Output of the mixer (USE_MIXER) for every phase and input sample, data_q is None for a real input.
+        # Like process_channels() this is computed directly without the delay line.
+        sin, cos = self._compute(np.asarray(phases, dtype=np.int64))
+        return mixer_bit_exact(data_i, data_q, sin, cos, self.OUT_DW)
+
+    def stream(self, chunks):
+        # Generator version of process() for unbounded phase streams, yields (sin, cos, valid) per chunk.
+        # A chunk is an array of phases or a tuple (phases, valid). All state is in the delay line,
+        # so memory does not grow with the length of the stream and reset() can be called in between.
+        for chunk in chunks:
+            if isinstance(chunk, tuple):
+                yield self.process(*chunk)
+            else:
+                yield self.process(chunk)
+
+    def _compute(self, phases):
+        if self.bit_exact and self.USE_CORDIC:
+            return cordic_bit_exact(phases, self.PHASE_DW, self.OUT_DW, self.CORDIC_ITERATIONS,
+                                    self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE)
+        if self.bit_exact:
+            return dds_bit_exact(phases, self.PHASE_DW, self.OUT_DW, self.USE_TAYLOR, self.LUT_DW,
+                                 self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE, self.lut)
         data_in_max = 2**self.PHASE_DW
-        self.data_out_buf[0] = (-1)**(self.NEGATIVE_SINE) * np.round(np.sin(self.data_in_buf*2*np.pi/data_in_max) * (2**(self.OUT_DW-1)-1))
+        sin = (-1)**(self.NEGATIVE_SINE) * np.round(np.sin(phases*2*np.pi/data_in_max) * (2**(self.OUT_DW-1)-1))
         if self.SIN_COS:
-            self.data_out_cos_buf[0] = (-1)**(self.NEGATIVE_COSINE) * np.round(np.cos(self.data_in_buf*2*np.pi/data_in_max) * (2**(self.OUT_DW-1)-1))
+            cos = (-1)**(self.NEGATIVE_COSINE) * np.round(np.cos(phases*2*np.pi/data_in_max) * (2**(self.OUT_DW-1)-1))
         else:
-            self.data_out_cos_buf[0] = 0
-        #if self.out_valid[0]:
-        #    print(F"sin({self.data_in_buf*2*np.pi/data_in_max}) = {np.sin(self.data_in_buf*2*np.pi/data_in_max)* (2**(self.OUT_DW-1)-1)}")
-        for i in np.arange(self.extra_delay-1,-1,-1):
-            self.data_out_buf[i+1] = self.data_out_buf[i]
-            self.data_out_cos_buf[i+1] = self.data_out_cos_buf[i]
-            self.out_valid[i+1] = self.out_valid[i] 
-            
-            
-    
+            cos = np.zeros(len(phases))
+        return sin.astype(np.int64), cos.astype(np.int64)
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Vectorized phase accumulator (NCO) to generate phase words for the dds core.
+# All increments (frequency control words) and phase offsets are given in units of
+# the accumulator LSB, the phase word is the accumulator truncated to PHASE_DW bits.
+
+def frequency_word(f, f_clk, ACCU_DW=32):
+    # frequency control word for the output frequency f at a sample rate of f_clk
+    return int(round((1 << ACCU_DW) / (f_clk / f)))
+
+class PhaseAccumulator:
+    def __init__(self, ACCU_DW=32, PHASE_DW=None, accumulator=0):
+        if ACCU_DW > 64:
+            raise ValueError("ACCU_DW > 64 is not supported")
+        self.ACCU_DW = ACCU_DW
+        self.PHASE_DW = ACCU_DW if PHASE_DW is None else PHASE_DW
+        if self.PHASE_DW > self.ACCU_DW:
+            raise ValueError("PHASE_DW > ACCU_DW does not make sense")
+        self.accumulator = accumulator % (1 << ACCU_DW)
+
+    def run(self, increments, phase_offset=0):
+        # Returns one phase word per increment. Sample i uses the accumulator value before increment i
+        # is added, so the first phase word is the current accumulator value. The accumulator wraps
+        # around modulo 2**ACCU_DW and keeps its state for the next call.
+        increments = np.asarray(increments)
+        n = len(increments)
+        mask = np.uint64((1 << self.ACCU_DW) - 1)
+        accu = np.empty(n, dtype=np.uint64)
+        if n == 0:
+            return accu.astype(np.int64)
+        # uint64 arithmetic wraps around modulo 2**64, which is a multiple of 2**ACCU_DW
+        accu[0] = 0
+        np.cumsum(to_uint64(increments[:-1]), out=accu[1:])
+        accu += np.uint64(self.accumulator)
+        self.accumulator = (int(accu[-1]) + int(to_uint64(increments[-1:])[0])) % (1 << self.ACCU_DW)
+        accu += to_uint64(phase_offset)
+        accu &= mask
+        return (accu >> np.uint64(self.ACCU_DW - self.PHASE_DW)).astype(np.int64)
+
+    def ramp(self, fcw, n, phase_offset=0):
+        # constant frequency
+        return self.run(np.full(n, fcw % (1 << self.ACCU_DW), dtype=np.uint64), phase_offset)
+
+    def hop(self, fcws, lengths, phase_offset=0):
+        # phase continuous frequency hopping, fcws[k] is used for lengths[k] samples
+        fcws = to_uint64(fcws) & np.uint64((1 << self.ACCU_DW) - 1)
+        return self.run(np.repeat(fcws, lengths), phase_offset)
+
+    def linear_chirp(self, fcw_start, fcw_stop, n, phase_offset=0):
+        # frequency word changes linearly from fcw_start to fcw_stop in n samples,
+        # calculated with integers so that long sweeps are exact
+        return self.run(linear_chirp_words(fcw_start, fcw_stop, n), phase_offset)
+
+    def exponential_chirp(self, fcw_start, fcw_stop, n, phase_offset=0):
+        # frequency word changes exponentially from fcw_start to fcw_stop in n samples
+        if fcw_start <= 0 or fcw_stop <= 0:
+            raise ValueError("exponential chirp needs positive frequency words")
+        k = np.arange(n) / max(n - 1, 1)
+        fcws = np.rint(fcw_start * (fcw_stop / fcw_start) ** k)
+        return self.run(fcws.astype(np.uint64), phase_offset)
+
+    def phase_modulation(self, fcw, phase_offsets):
+        # constant carrier with a phase offset per sample, e.g. for PM/PSK stimulus
+        phase_offsets = np.asarray(phase_offsets, dtype=np.int64)
+        return self.ramp(fcw, len(phase_offsets), phase_offsets)
+
+class CoreAccumulator:
+    # Integrated phase accumulator of dds.sv (USE_ACCUMULATOR = 1) with an accumulator, frequency word and phase
+    # offset per channel. Works on one entry per clock: if tuning_valid[i], channel tuning_channels[i] gets
+    # fcws[i] and offsets[i], which are used from clock i + 1 on. If valid[i], the beat of channel channels[i]
+    # is generated, lane k is accu + offset + k * fcw truncated to PHASE_DW bits, then accu advances by
+    # SAMPLES_PER_CLOCK * fcw. The state is kept for the next call like in PhaseAccumulator.
+    def __init__(self, ACCU_DW=48, PHASE_DW=16, SAMPLES_PER_CLOCK=1, CHANNELS=1):
+        self.ACCU_DW = ACCU_DW
+        self.PHASE_DW = PHASE_DW
+        self.SAMPLES_PER_CLOCK = SAMPLES_PER_CLOCK
+        self.CHANNELS = CHANNELS
+        # checks the widths
+        PhaseAccumulator(ACCU_DW, PHASE_DW)
+        self.reset()
+
+    def reset(self):
+        self.accumulators = [PhaseAccumulator(self.ACCU_DW) for c in range(self.CHANNELS)]
+        self.fcw = np.zeros(self.CHANNELS, dtype=np.uint64)
+        self.offset = np.zeros(self.CHANNELS, dtype=np.uint64)
+
+    def run(self, valid, channels=None, tuning_valid=None, fcws=None, offsets=None, tuning_channels=None):
+        # Returns the phases of every clock in time order (SAMPLES_PER_CLOCK per clock),
+        # the phases of clocks without valid are 0.
+        valid = np.asarray(valid, dtype=bool)
+        n = len(valid)
+        zeros = np.zeros(n, dtype=np.int64)
+        channels = zeros if channels is None else np.asarray(channels, dtype=np.int64)
+        tuning_valid = zeros.astype(bool) if tuning_valid is None else np.asarray(tuning_valid, dtype=bool)
+        tuning_channels = zeros if tuning_channels is None else np.asarray(tuning_channels, dtype=np.int64)
+        mask = np.uint64((1 << self.ACCU_DW) - 1)
+        fcws = to_uint64(zeros if fcws is None else fcws) & mask
+        offsets = to_uint64(zeros if offsets is None else offsets) & mask
+        lanes = np.arange(self.SAMPLES_PER_CLOCK, dtype=np.uint64)
+        phases = np.zeros((n, self.SAMPLES_PER_CLOCK), dtype=np.int64)
+        for c in range(self.CHANNELS):
+            beats = np.flatnonzero(valid & (channels == c))
+            tunings = np.flatnonzero(tuning_valid & (tuning_channels == c))
+            # tuning word of the last tuning before every beat, index 0 is the one of the previous call
+            last = np.searchsorted(tunings, beats, side='left')
+            fcw = np.concatenate(([self.fcw[c]], fcws[tunings]))[last]
+            offset = np.concatenate(([self.offset[c]], offsets[tunings]))[last]
+            accu = to_uint64(self.accumulators[c].run(fcw * np.uint64(self.SAMPLES_PER_CLOCK)))
+            lane_accu = (accu[:, None] + offset[:, None] + fcw[:, None] * lanes) & mask
+            phases[beats] = (lane_accu >> np.uint64(self.ACCU_DW - self.PHASE_DW)).astype(np.int64)
+            if len(tunings):
+                self.fcw[c] = fcws[tunings[-1]]
+                self.offset[c] = offsets[tunings[-1]]
+        return phases.ravel()
+
+def linear_chirp_words(fcw_start, fcw_stop, n):
+    # fcw_start + (fcw_stop - fcw_start) * i // (n - 1) without int64 overflow of the product
+    i = np.arange(n, dtype=np.int64)
+    q, r = divmod(int(fcw_stop) - int(fcw_start), max(n - 1, 1))
+    return (int(fcw_start) + q * i + (r * i) // max(n - 1, 1)).astype(np.uint64)
+
+def to_uint64(data):
+    # two's complement conversion, so that negative increments and offsets work modulo 2**64
+    data = np.asarray(data)
+    if data.dtype == np.uint64:
+        return data
+    return data.astype(np.int64).view(np.uint64)
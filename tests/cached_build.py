@@ -0,0 +1,59 @@
+import os
+import json
+import fcntl
+import hashlib
+import cocotb_test.simulator
+
+# cocotb_test.simulator.run() with a build cache. The simulation model is compiled once per hash of
+# (simulator, sources, parameters, defines, compile args, waves) into sim_build/build/<sim>_<hash>,
+# so test cases that only differ in the python testbench or the stimulus share one compiled model.
+# Every test case runs in its own work_dir, so results, waveforms and lut files do not collide.
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+
+def source_files(verilog_sources, includes, compile_args):
+    files = list(verilog_sources)
+    for include in includes:
+        files += sorted(os.path.join(include, f) for f in os.listdir(include) if f.endswith(('.sv', '.v', '.vh', '.svh')))
+    files += [arg for arg in compile_args if os.path.isfile(arg)]
+    return files
+
+def build_key(sim, files, parameters, defines, compile_args, waves):
+    h = hashlib.sha256()
+    h.update(json.dumps([sim, sorted((k, str(v)) for k, v in parameters.items()), defines, compile_args, waves]).encode())
+    for filename in files:
+        h.update(filename.encode())
+        with open(filename, 'rb') as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
+
+def run(verilog_sources, work_dir, sim_build='sim_build', includes=None, parameters=None, defines=None,
+        compile_args=None, waves=None, **kwargs):
+    sim = os.getenv('SIM', 'icarus')
+    includes = [] if includes is None else includes
+    parameters = {} if parameters is None else parameters
+    defines = [] if defines is None else defines
+    compile_args = [] if compile_args is None else list(compile_args)
+    if sim == 'verilator':
+        compile_args.append(os.path.join(tests_dir, 'verilator_waiver.vlt'))
+    # waves are opt-in with WAVES=1
+    waves = bool(int(os.getenv('WAVES', 0))) if waves is None else waves
+
+    files = source_files(verilog_sources, includes, compile_args)
+    build_dir = os.path.join(sim_build, 'build', f'{sim}_{build_key(sim, files, parameters, defines, compile_args, waves)}')
+    os.makedirs(build_dir, exist_ok=True)
+    os.makedirs(work_dir, exist_ok=True)
+    args = dict(verilog_sources=verilog_sources, includes=includes, parameters=parameters, defines=defines,
+                compile_args=compile_args, waves=waves, sim_build=build_dir, **kwargs)
+
+    # Parallel test cases with the same build key wait for the first one to compile. The build is
+    # repeated if a source is newer than the last build, e.g. after a checkout without changes,
+    # so that the simulator's own up-to-date check in the run step never recompiles.
+    done = os.path.join(build_dir, 'build_done')
+    with open(build_dir + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.isfile(done) or any(os.path.getmtime(f) >= os.path.getmtime(done) for f in files):
+            cocotb_test.simulator.run(compile_only=True, force_compile=True, **args)
+            open(done, 'w').close()
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        return cocotb_test.simulator.run(work_dir=work_dir, **args)
@@ -0,0 +1,196 @@
+import numpy as np
+import os
+from cocotb.triggers import RisingEdge
+
+import importlib.util
+
+spec = importlib.util.spec_from_file_location("capture_file", os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools', 'capture_file.py'))
+capture_file = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(capture_file)
+
+# Output checking against a precomputed model output. During simulation the dut outputs are only
+# sampled into preallocated buffers, sign extension and comparison are done with numpy afterwards.
+
+def expected_output(model, phases):
+    # model output for a continuous stream of valid phases, one (sin, cos) sample per phase
+    # phases are in time order, with SAMPLES_PER_CLOCK lanes their number has to be a multiple of the lanes
+    phases = np.asarray(phases, dtype=np.int64)
+    model.reset()
+    padding = np.full(model.extra_delay * model.SAMPLES_PER_CLOCK, phases[-1], dtype=np.int64)
+    sin, cos, valid = model.process(np.concatenate((phases, padding)))[:3]
+    return sin[valid][:len(phases)], cos[valid][:len(phases)]
+
+async def drive_input(dut, phases, PHASE_DW=None, SAMPLES_PER_CLOCK=1, channels=None, mix=None):
+    # one beat of SAMPLES_PER_CLOCK phases per clock, valid is deasserted after the last beat,
+    # channels is the tuser value of every beat, mix the s_axis_mix_tdata word of every beat
+    clk_edge = RisingEdge(dut.clk)
+    if SAMPLES_PER_CLOCK == 1:
+        beats = np.asarray(phases).tolist()
+    else:
+        # lane k of a beat is in bits [k*PHASE_DW +: PHASE_DW]
+        beats = [sum(phase << (k * PHASE_DW) for k, phase in enumerate(beat))
+                 for beat in np.asarray(phases).reshape(-1, SAMPLES_PER_CLOCK).tolist()]
+    for k, beat in enumerate(beats):
+        await clk_edge
+        dut.s_axis_phase_tdata.value = beat
+        if channels is not None:
+            dut.s_axis_phase_tuser.value = int(channels[k])
+        if mix is not None:
+            dut.s_axis_mix_tdata.value = mix[k]
+        dut.s_axis_phase_tvalid.value = 1
+    await clk_edge
+    dut.s_axis_phase_tvalid.value = 0
+
+async def drive_accumulator(dut, valid, channels, tuning_valid, fcws, offsets, tuning_channels, ACCU_DW):
+    # drives the integrated phase accumulator (USE_ACCUMULATOR = 1) clock by clock: s_axis_phase_tvalid and tuser
+    # select the channel of a beat, the tuning stream writes {offset, fcw} of a channel
+    clk_edge = RisingEdge(dut.clk)
+    mask = 2**ACCU_DW - 1
+    for i in range(len(valid)):
+        await clk_edge
+        dut.s_axis_phase_tvalid.value = int(valid[i])
+        dut.s_axis_phase_tuser.value = int(channels[i])
+        dut.s_axis_tuning_tvalid.value = int(tuning_valid[i])
+        if tuning_valid[i]:
+            dut.s_axis_tuning_tdata.value = ((int(offsets[i]) & mask) << ACCU_DW) | (int(fcws[i]) & mask)
+            dut.s_axis_tuning_tuser.value = int(tuning_channels[i])
+    await clk_edge
+    dut.s_axis_phase_tvalid.value = 0
+    dut.s_axis_tuning_tvalid.value = 0
+
+def split_lanes(words, OUT_DW, SAMPLES_PER_CLOCK):
+    # splits the captured bus words into signed samples in time order, lane 0 first
+    words = np.array(words, dtype=object)
+    lanes = [((words >> (k * OUT_DW)) & (2**OUT_DW - 1)).astype(np.int64) for k in range(SAMPLES_PER_CLOCK)]
+    data = np.stack(lanes, axis=1).ravel()
+    return np.where(data >= 2**(OUT_DW - 1), data - 2**OUT_DW, data)
+
+def capture_writers(directory, OUT_DW, *names):
+    # one appendable directory/<name>.npy per trace for capture_output(writers=...)
+    os.makedirs(directory, exist_ok=True)
+    return [capture_file.CaptureWriter(os.path.join(directory, name + '.npy'), capture_file.sample_dtype(OUT_DW))
+            for name in names]
+
+async def capture_output(dut, num_items, OUT_DW, SIN_COS, SAMPLES_PER_CLOCK=1, CHANNELS=1, writers=None, chunk_size=2**14):
+    # returns the first num_items valid sin and cos samples, cos is 0 if SIN_COS = 0,
+    # with CHANNELS > 1 the tuser value of every sample is returned as 3rd array.
+    # With writers = (sin writer, cos writer) every chunk of chunk_size beats is appended and flushed to the
+    # capture files as soon as it is captured, only one chunk is kept in memory and the returned sin and cos
+    # are the memory mapped files.
+    num_beats = -(-num_items // SAMPLES_PER_CLOCK)
+    chunk_beats = num_beats if writers is None else max(min(chunk_size, num_beats), 1)
+    channel = np.zeros(num_beats, dtype=np.int64)
+    if SAMPLES_PER_CLOCK == 1:
+        sin = np.zeros(chunk_beats, dtype=np.int64)
+        cos = np.zeros(chunk_beats, dtype=np.int64)
+    else:
+        # the bus can be wider than 64 bits
+        sin = [0] * chunk_beats
+        cos = [0] * chunk_beats
+    chunks = []
+
+    def convert(beats, samples):
+        if SAMPLES_PER_CLOCK > 1:
+            return split_lanes(sin[:beats], OUT_DW, SAMPLES_PER_CLOCK)[:samples], split_lanes(cos[:beats], OUT_DW, SAMPLES_PER_CLOCK)[:samples]
+        return (np.where(sin[:beats] >= 2**(OUT_DW - 1), sin[:beats] - 2**OUT_DW, sin[:beats]),
+                np.where(cos[:beats] >= 2**(OUT_DW - 1), cos[:beats] - 2**OUT_DW, cos[:beats]))
+
+    def store(beats, samples):
+        chunk = convert(beats, samples)
+        if writers is None:
+            chunks.append(chunk)
+            return
+        for writer, data in zip(writers, chunk):
+            writer.append(data)
+            writer.flush()
+
+    clk_edge = RisingEdge(dut.clk)
+    count = 0
+    k = 0
+    while count < num_beats:
+        await clk_edge
+        if dut.m_axis_out_sin_tvalid.value == 1:
+            sin[k] = dut.m_axis_out_sin_tdata.value.integer
+            if SIN_COS:
+                cos[k] = dut.m_axis_out_cos_tdata.value.integer
+            if CHANNELS > 1:
+                channel[count] = dut.m_axis_out_tuser.value.integer
+            count += 1
+            k += 1
+            if k == chunk_beats or count == num_beats:
+                store(k, num_items - (count - k) * SAMPLES_PER_CLOCK)
+                k = 0
+    if writers is None:
+        sin, cos = chunks[0] if chunks else (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    else:
+        sin, cos = (capture_file.read_window(writer.filename) for writer in writers)
+    if CHANNELS > 1:
+        return sin, cos, np.repeat(channel, SAMPLES_PER_CLOCK)[:num_items]
+    return sin, cos
+
+def mix_words(data_i, data_q, MIXER_DW, SAMPLES_PER_CLOCK=1):
+    # s_axis_mix_tdata of every beat, {q, i} per sample and lane 0 in the lsbs
+    mask = 2**MIXER_DW - 1
+    data_q = np.zeros(len(data_i), dtype=np.int64) if data_q is None else data_q
+    samples = [((int(q) & mask) << MIXER_DW) | (int(i) & mask) for i, q in zip(data_i, data_q)]
+    return [sum(sample << (k * 2 * MIXER_DW) for k, sample in enumerate(samples[b:b + SAMPLES_PER_CLOCK]))
+            for b in range(0, len(samples), SAMPLES_PER_CLOCK)]
+
+async def capture_mix(dut, num_items, MIXER_DW, SAMPLES_PER_CLOCK=1):
+    # returns the first num_items valid i and q samples of m_axis_mix, each MIXER_DW + 1 bits
+    num_beats = -(-num_items // SAMPLES_PER_CLOCK)
+    words = [0] * num_beats
+    clk_edge = RisingEdge(dut.clk)
+    count = 0
+    while count < num_beats:
+        await clk_edge
+        if dut.m_axis_mix_tvalid.value == 1:
+            words[count] = dut.m_axis_mix_tdata.value.integer
+            count += 1
+    # i and q are interleaved like two lanes per sample
+    data = split_lanes(words, MIXER_DW + 1, 2 * SAMPLES_PER_CLOCK)
+    return data[0::2][:num_items], data[1::2][:num_items]
+
+def error_stats(output, expected, tolerance=0, offset=0):
+    # error statistics as sums, so that the statistics of several runs can be merged,
+    # first_mismatch is the index of the first sample that is out of tolerance plus offset
+    error = np.asarray(output, dtype=np.int64) - np.asarray(expected, dtype=np.int64)
+    mismatch = np.abs(error) > tolerance
+    return {
+        'samples': len(error),
+        'mismatches': int(np.count_nonzero(mismatch)),
+        'first_mismatch': int(np.argmax(mismatch)) + offset if mismatch.any() else None,
+        'max_error': int(np.abs(error).max(initial=0)),
+        'error_sum': int(error.sum()),
+        'error_sq_sum': int((error**2).sum()),
+    }
+
+def merge_stats(stats):
+    return {
+        'samples': sum(s['samples'] for s in stats),
+        'mismatches': sum(s['mismatches'] for s in stats),
+        'first_mismatch': min((s['first_mismatch'] for s in stats if s['first_mismatch'] is not None), default=None),
+        'max_error': max((s['max_error'] for s in stats), default=0),
+        'error_sum': sum(s['error_sum'] for s in stats),
+        'error_sq_sum': sum(s['error_sq_sum'] for s in stats),
+    }
+
+def format_stats(name, stats):
+    n = max(stats['samples'], 1)
+    return (f"{name}: {stats['samples']} samples, max error = {stats['max_error']}, "
+            f"mean error = {stats['error_sum'] / n:.3f}, rms error = {np.sqrt(stats['error_sq_sum'] / n):.3f}")
+
+def compare(name, output, expected, tolerance=0):
+    # asserts that all samples are within tolerance, returns a line with error statistics
+    stats = error_stats(output, expected, tolerance)
+    if stats['mismatches']:
+        i = stats['first_mismatch']
+        assert False, (f"{name}: {stats['mismatches']} samples differ by more than {tolerance}, "
+                       f"first at [{i}] hdl: {output[i]} \t model: {expected[i]}\n{format_stats(name, stats)}")
+    return format_stats(name, stats)
+
+def dump_capture(directory, OUT_DW, **captures):
+    # writes every capture to directory/<name>.npy, the files can be plotted with tools/plot_sim_output.py
+    os.makedirs(directory, exist_ok=True)
+    for name, data in captures.items():
+        capture_file.save(os.path.join(directory, name + '.npy'), data, capture_file.sample_dtype(OUT_DW))
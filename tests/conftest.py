@@ -0,0 +1,18 @@
+import os
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+spec = importlib.util.spec_from_file_location("exhaustive", os.path.join(tests_dir, 'exhaustive.py'))
+exhaustive = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(exhaustive)
+
+def pytest_configure(config):
+    # the report must only merge the shards of this session, the shards of earlier sessions are removed
+    # by the controller before the xdist workers start
+    if exhaustive.ENABLED and not hasattr(config, 'workerinput'):
+        exhaustive.clear()
+
+def pytest_sessionfinish(session, exitstatus):
+    # merged report of the exhaustive phase sweep, the shards may have run on different workers
+    if exhaustive.ENABLED:
+        exhaustive.report()
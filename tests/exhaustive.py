@@ -0,0 +1,81 @@
+import os
+import sys
+import glob
+import shutil
+import json
+import importlib.util
+
+# Exhaustive phase sweep: the phase range 0 .. 2**PHASE_DW-1 is split into shards of 2**SHARD_DW phases,
+# every shard is a separate simulation that writes its error statistics to a json file.
+# report() merges the statistics of all shards of a configuration and checks that every phase was covered,
+# clear() removes the shards of earlier sessions before a new sweep.
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+checker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(checker)
+
+ENABLED = os.getenv('DDS_EXHAUSTIVE', '0') == '1'
+# 2**16 phases per shard takes a few seconds in Verilator, a 24 bit sweep has 256 shards per configuration
+SHARD_DW = int(os.getenv('DDS_EXHAUSTIVE_SHARD_DW', 16))
+RESULT_DIR = os.path.join('sim_build', 'exhaustive')
+
+def num_shards(PHASE_DW, shard_dw=SHARD_DW):
+    return 2**max(PHASE_DW - shard_dw, 0)
+
+def shard_range(PHASE_DW, shard, shard_dw=SHARD_DW):
+    size = 2**min(shard_dw, PHASE_DW)
+    return shard * size, (shard + 1) * size
+
+def config_dir(parameters, shard_dw=SHARD_DW, result_dir=RESULT_DIR):
+    return os.path.join(result_dir, "_".join("{}={}".format(*i) for i in parameters.items()) + f"_SHARD_DW={shard_dw}")
+
+def write_shard(filename, parameters, start, stop, seconds, sin_stats, cos_stats):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as f:
+        json.dump({'parameters': parameters, 'start': start, 'stop': stop, 'seconds': seconds,
+                   'sin': sin_stats, 'cos': cos_stats}, f)
+
+def merge(directory):
+    shards = []
+    for filename in sorted(glob.glob(os.path.join(directory, 'shard_*.json'))):
+        with open(filename) as f:
+            shards.append(json.load(f))
+    if not shards:
+        return None
+    shards.sort(key=lambda s: s['start'])
+    parameters = shards[0]['parameters']
+    covered = sum(s['stop'] - s['start'] for s in shards)
+    return {
+        'parameters': parameters,
+        'phases': 2**parameters['PHASE_DW'],
+        'covered': covered,
+        'complete': covered == 2**parameters['PHASE_DW'] and all(a['stop'] == b['start'] for a, b in zip(shards, shards[1:])),
+        'shards': len(shards),
+        'seconds': sum(s['seconds'] for s in shards),
+        'sin': checker.merge_stats([s['sin'] for s in shards]),
+        'cos': checker.merge_stats([s['cos'] for s in shards]),
+    }
+
+def clear(result_dir=RESULT_DIR):
+    shutil.rmtree(result_dir, ignore_errors=True)
+
+def report(result_dir=RESULT_DIR):
+    # merges all configurations in result_dir, writes report.json and returns the merged results
+    merged = [m for m in (merge(d) for d in sorted(glob.glob(os.path.join(result_dir, '*')))) if m is not None]
+    if not merged:
+        return merged
+    with open(os.path.join(result_dir, 'report.json'), 'w') as f:
+        json.dump(merged, f, indent=2)
+    for m in merged:
+        print(" ".join("{}={}".format(*i) for i in m['parameters'].items()))
+        print(f"    {m['covered']} of {m['phases']} phases in {m['shards']} shards{'' if m['complete'] else ' (INCOMPLETE)'}, "
+              f"{m['seconds']:.1f} s simulation time")
+        for name in ('sin', 'cos'):
+            first = m[name]['first_mismatch']
+            print(f"    {checker.format_stats(name, m[name])}, {m[name]['mismatches']} mismatches"
+                  + ("" if first is None else f", first at phase {first}"))
+    return merged
+
+if __name__ == '__main__':
+    report(sys.argv[1] if len(sys.argv) > 1 else RESULT_DIR)
@@ -0,0 +1,123 @@
+// C interface of the verilated dds core for tests/native_sim.py (ctypes). dds_run() simulates a whole block
+// of clocks over numpy buffers, so python is only called once per block instead of once per clock.
+// DDS_PHASE_DW, DDS_OUT_DW, DDS_SAMPLES_PER_CLOCK and DDS_ACCU_DW are set by native_sim.py and must match
+// the parameters the core was verilated with.
+
+#include <cstdint>
+#include <algorithm>
+#include "verilated.h"
+#include "Vdds.h"
+
+// bit fields of ports up to 64 bits
+template <typename T>
+static void set_bits(T& port, int lsb, int width, uint64_t value) {
+    uint64_t mask = width >= 64 ? ~0ULL : (1ULL << width) - 1;
+    port = (T)((port & ~(mask << lsb)) | ((value & mask) << lsb));
+}
+
+template <typename T>
+static uint64_t get_bits(const T& port, int lsb, int width) {
+    uint64_t mask = width >= 64 ? ~0ULL : (1ULL << width) - 1;
+    return ((uint64_t)port >> lsb) & mask;
+}
+
+// bit fields of wide ports, which are arrays of 32 bit words
+template <std::size_t N>
+static void set_bits(VlWide<N>& port, int lsb, int width, uint64_t value) {
+    for (int b = 0; b < width;) {
+        int word = (lsb + b) / 32, offset = (lsb + b) % 32, n = std::min(32 - offset, width - b);
+        uint32_t mask = n == 32 ? ~0U : (1U << n) - 1;
+        port[word] = (port[word] & ~(mask << offset)) | ((uint32_t)(value >> b) & mask) << offset;
+        b += n;
+    }
+}
+
+template <std::size_t N>
+static uint64_t get_bits(const VlWide<N>& port, int lsb, int width) {
+    uint64_t value = 0;
+    for (int b = 0; b < width;) {
+        int word = (lsb + b) / 32, offset = (lsb + b) % 32, n = std::min(32 - offset, width - b);
+        uint32_t mask = n == 32 ? ~0U : (1U << n) - 1;
+        value |= (uint64_t)((port[word] >> offset) & mask) << b;
+        b += n;
+    }
+    return value;
+}
+
+static int64_t to_signed(uint64_t value, int width) {
+    return (int64_t)(value << (64 - width)) >> (64 - width);
+}
+
+struct Dds {
+    VerilatedContext context;
+    Vdds* top;
+};
+
+static void tick(Dds* dds) {
+    dds->top->clk = 1;
+    dds->top->eval();
+    dds->top->clk = 0;
+    dds->top->eval();
+}
+
+extern "C" {
+
+void* dds_new() {
+    Dds* dds = new Dds;
+    dds->top = new Vdds{&dds->context};
+    dds->top->clk = 0;
+    dds->top->s_axis_phase_tvalid = 0;
+    dds->top->s_axis_tuning_tvalid = 0;
+    dds->top->eval();
+    return dds;
+}
+
+void dds_delete(void* handle) {
+    Dds* dds = (Dds*)handle;
+    dds->top->final();
+    delete dds->top;
+    delete dds;
+}
+
+void dds_reset(void* handle, int clocks) {
+    Dds* dds = (Dds*)handle;
+    dds->top->reset_n = 0;
+    dds->top->s_axis_phase_tvalid = 0;
+    dds->top->s_axis_tuning_tvalid = 0;
+    for (int i = 0; i < clocks; i++)
+        tick(dds);
+    dds->top->reset_n = 1;
+    tick(dds);
+}
+
+// Simulates n clocks. The inputs of clock i are sampled at rising edge i, the outputs are read after it.
+// phases, sin and cos have DDS_SAMPLES_PER_CLOCK samples per clock (lane 0 first), valid, channels,
+// out_valid and out_channels one value per clock. channels and the tuning arrays may be null.
+void dds_run(void* handle, int64_t n, const int64_t* phases, const uint8_t* valid, const int64_t* channels,
+             const uint8_t* tuning_valid, const uint64_t* fcws, const uint64_t* offsets, const int64_t* tuning_channels,
+             int64_t* sin, int64_t* cos, uint8_t* out_valid, int64_t* out_channels) {
+    Dds* dds = (Dds*)handle;
+    Vdds* top = dds->top;
+    const int lanes = DDS_SAMPLES_PER_CLOCK;
+    for (int64_t i = 0; i < n; i++) {
+        for (int k = 0; k < lanes; k++)
+            set_bits(top->s_axis_phase_tdata, k * DDS_PHASE_DW, DDS_PHASE_DW, (uint64_t)phases[i * lanes + k]);
+        top->s_axis_phase_tvalid = valid[i];
+        top->s_axis_phase_tuser = channels ? channels[i] : 0;
+        top->s_axis_tuning_tvalid = tuning_valid ? tuning_valid[i] : 0;
+        if (tuning_valid && tuning_valid[i]) {
+            set_bits(top->s_axis_tuning_tdata, 0, DDS_ACCU_DW, fcws[i]);
+            set_bits(top->s_axis_tuning_tdata, DDS_ACCU_DW, DDS_ACCU_DW, offsets[i]);
+            top->s_axis_tuning_tuser = tuning_channels[i];
+        }
+        tick(dds);
+        for (int k = 0; k < lanes; k++) {
+            sin[i * lanes + k] = to_signed(get_bits(top->m_axis_out_sin_tdata, k * DDS_OUT_DW, DDS_OUT_DW), DDS_OUT_DW);
+            cos[i * lanes + k] = to_signed(get_bits(top->m_axis_out_cos_tdata, k * DDS_OUT_DW, DDS_OUT_DW), DDS_OUT_DW);
+        }
+        out_valid[i] = top->m_axis_out_sin_tvalid;
+        out_channels[i] = top->m_axis_out_sin_tuser;
+    }
+}
+
+}
@@ -0,0 +1,199 @@
+import os
+import sys
+import time
+import fcntl
+import ctypes
+import argparse
+import subprocess
+import numpy as np
+
+import importlib.util
+
+# Native simulation of dds.sv without cocotb: the core is verilated together with native/dds_shim.cpp into a
+# shared library that is loaded with ctypes. NativeDds.run() passes numpy buffers for a whole block of clocks
+# to the library, so there is no python call per clock and the simulation runs at the speed of the verilated
+# model. The library is built once per hash of sources and parameters into sim_build/native/<hash>.
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+rtl_dir = os.path.abspath(os.path.join(tests_dir, '..', 'hdl'))
+SHIM = os.path.join(tests_dir, 'native', 'dds_shim.cpp')
+BUILD_DIR = os.path.join(tests_dir, 'sim_build', 'native')
+
+spec = importlib.util.spec_from_file_location("cached_build", os.path.join(tests_dir, 'cached_build.py'))
+cached_build = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cached_build)
+
+# default values of the dds.sv parameters that the shim needs to know
+DEFAULTS = dict(PHASE_DW=16, OUT_DW=16, SAMPLES_PER_CLOCK=1, ACCU_DW=48)
+
+i64 = np.ctypeslib.ndpointer(dtype=np.int64, flags='C_CONTIGUOUS')
+u64 = np.ctypeslib.ndpointer(dtype=np.uint64, flags='C_CONTIGUOUS')
+u8 = np.ctypeslib.ndpointer(dtype=np.uint8, flags='C_CONTIGUOUS')
+
+def optional(pointer):
+    # ndpointer argument that also accepts None (null)
+    class Optional(pointer):
+        @classmethod
+        def from_param(cls, obj):
+            return obj if obj is None else pointer.from_param(obj)
+    return Optional
+
+def build(parameters, build_dir=BUILD_DIR, lut_path=None):
+    # verilates dds.sv with the shim and links the shared library, returns its filename
+    if parameters.get('USE_MIXER', 0):
+        raise ValueError("the native shim has no s_axis_mix / m_axis_mix ports, USE_MIXER is only simulated with cocotb")
+    files = cached_build.source_files([os.path.join(rtl_dir, 'dds.sv'), SHIM], [], [])
+    shim_parameters = {**DEFAULTS, **{k: v for k, v in parameters.items() if k in DEFAULTS}}
+    key = cached_build.build_key('native', files, parameters, [lut_path], [], False)
+    directory = os.path.join(build_dir, key)
+    library = os.path.join(directory, 'libdds_native.so')
+    obj = os.path.join(directory, 'obj')
+    os.makedirs(obj, exist_ok=True)
+    with open(directory + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.isfile(library):
+            cflags = ['-fPIC', '-O2'] + [f'-DDDS_{k}={v}' for k, v in shim_parameters.items()]
+            # --output-split 0 builds one file without precompiled header
+            args = ['verilator', '--cc', '--build', '-j', '0', '-O3', '--x-assign', 'fast', '--x-initial', 'fast',
+                    '--output-split', '0', '--Mdir', obj, '--top-module', 'dds', '-CFLAGS', ' '.join(cflags)]
+            args += [f'-G{k}={v}' for k, v in parameters.items()]
+            if lut_path is not None:
+                args.append(f'-DLUT_PATH="{lut_path}"')
+            args += [os.path.join(tests_dir, 'verilator_waiver.vlt'), os.path.join(rtl_dir, 'dds.sv'), SHIM]
+            subprocess.run(args, check=True, stdout=subprocess.DEVNULL)
+            # -Bsymbolic keeps libraries of different parameters that are loaded at the same time apart
+            subprocess.run(['g++', '-shared', '-Wl,-Bsymbolic', '-o', library + '.tmp', os.path.join(obj, 'dds_shim.o'),
+                            os.path.join(obj, 'libVdds.a'), os.path.join(obj, 'libverilated.a'), '-pthread'], check=True)
+            os.replace(library + '.tmp', library)
+    return library
+
+class NativeDds:
+    def __init__(self, parameters=None, build_dir=BUILD_DIR, lut_path=None):
+        self.parameters = {} if parameters is None else dict(parameters)
+        p = {**DEFAULTS, **self.parameters}
+        self.PHASE_DW = p['PHASE_DW']
+        self.OUT_DW = p['OUT_DW']
+        self.SAMPLES_PER_CLOCK = p['SAMPLES_PER_CLOCK']
+        self.ACCU_DW = p['ACCU_DW']
+        # clocks from s_axis_phase to the output, like LATENCY in dds.sv (the dds.sv default of USE_TAYLOR is 1)
+        if p.get('USE_CORDIC', 0):
+            self.latency = p.get('CORDIC_ITERATIONS', 18) + 3
+        else:
+            self.latency = 9 if p.get('USE_TAYLOR', 1) else 4
+        self.lib = ctypes.CDLL(build(self.parameters, build_dir, lut_path))
+        self.lib.dds_new.restype = ctypes.c_void_p
+        self.lib.dds_delete.argtypes = [ctypes.c_void_p]
+        self.lib.dds_reset.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.lib.dds_run.argtypes = [ctypes.c_void_p, ctypes.c_int64, i64, u8, optional(i64),
+                                     optional(u8), optional(u64), optional(u64), optional(i64),
+                                     i64, i64, u8, i64]
+        self.handle = self.lib.dds_new()
+        self.reset()
+
+    def reset(self, clocks=2):
+        self.lib.dds_reset(self.handle, clocks)
+
+    def close(self):
+        if self.handle is not None:
+            self.lib.dds_delete(self.handle)
+            self.handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, phases, valid=None, channels=None, tuning_valid=None, fcws=None, offsets=None, tuning_channels=None):
+        # Simulates one clock per beat of SAMPLES_PER_CLOCK phases, returns the output of every clock like
+        # Model.process(): (sin, cos, valid, channel), valid and channel are repeated for every sample.
+        # The tuning stream (USE_ACCUMULATOR = 1) is optional, channels and tuning values are per clock.
+        lanes = self.SAMPLES_PER_CLOCK
+        phases = np.ascontiguousarray(phases, dtype=np.int64)
+        n = len(phases) // lanes
+        valid = np.ones(n, dtype=np.uint8) if valid is None else np.ascontiguousarray(valid, dtype=np.uint8)
+        if channels is not None:
+            channels = np.ascontiguousarray(channels, dtype=np.int64)
+        if tuning_valid is not None:
+            mask = np.uint64((1 << self.ACCU_DW) - 1)
+            tuning_valid = np.ascontiguousarray(tuning_valid, dtype=np.uint8)
+            fcws = np.ascontiguousarray(np.asarray(fcws).astype(np.int64).view(np.uint64) & mask)
+            offsets = np.ascontiguousarray(np.asarray(offsets).astype(np.int64).view(np.uint64) & mask)
+            tuning_channels = np.ascontiguousarray(np.zeros(n) if tuning_channels is None else tuning_channels, dtype=np.int64)
+        sin = np.empty(n * lanes, dtype=np.int64)
+        cos = np.empty(n * lanes, dtype=np.int64)
+        out_valid = np.empty(n, dtype=np.uint8)
+        out_channels = np.empty(n, dtype=np.int64)
+        self.lib.dds_run(self.handle, n, phases, valid, channels, tuning_valid, fcws, offsets, tuning_channels,
+                         sin, cos, out_valid, out_channels)
+        return sin, cos, np.repeat(out_valid.astype(bool), lanes), np.repeat(out_channels, lanes)
+
+    def output(self, phases, flush=None):
+        # first len(phases) valid samples for a continuous stream of valid phases, like
+        # checker.expected_output() for the model, flush is the number of idle clocks after the stream,
+        # by default the latency of the core, which is enough for the last sample to pass the pipeline
+        lanes = self.SAMPLES_PER_CLOCK
+        flush = self.latency if flush is None else flush
+        phases = np.asarray(phases, dtype=np.int64)
+        valid = np.concatenate((np.ones(len(phases) // lanes, dtype=np.uint8), np.zeros(flush, dtype=np.uint8)))
+        padding = np.full(flush * lanes, phases[-1] if len(phases) else 0, dtype=np.int64)
+        sin, cos, out_valid, _ = self.run(np.concatenate((phases, padding)), valid)
+        received = np.count_nonzero(out_valid)
+        assert received >= len(phases), f"only {received} of {len(phases)} samples arrived within {flush} clocks after the stream"
+        return sin[out_valid][:len(phases)], cos[out_valid][:len(phases)]
+
+def sweep(parameters, chunk_dw=20, shard=None, lut_path=None):
+    # Exhaustive phase sweep of one configuration through the verilated core, compared chunk by chunk against
+    # the bit exact model. Returns the merged error statistics of sin and cos and the simulation time.
+    spec = importlib.util.spec_from_file_location("dds_model", os.path.join(tests_dir, '..', 'model', 'dds_model.py'))
+    dds_model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dds_model)
+    spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+    checker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(checker)
+
+    p = dict(USE_TAYLOR=1, LUT_DW=10, SIN_COS=0, NEGATIVE_SINE=0, NEGATIVE_COSINE=0, **DEFAULTS)
+    p.update(parameters)
+    model = dds_model.Model(p['PHASE_DW'], p['OUT_DW'], p['USE_TAYLOR'], p['LUT_DW'], p['SIN_COS'], p['NEGATIVE_SINE'],
+                            p['NEGATIVE_COSINE'], bit_exact=True, SAMPLES_PER_CLOCK=p['SAMPLES_PER_CLOCK'],
+                            LUT_COMPRESSION=p.get('LUT_COMPRESSION', 0), SUNDERLAND_A=p.get('SUNDERLAND_A', 8),
+                            SUNDERLAND_C=p.get('SUNDERLAND_C', 3), USE_CORDIC=p.get('USE_CORDIC', 0),
+                            CORDIC_ITERATIONS=p.get('CORDIC_ITERATIONS', 18))
+    start, stop = (0, 2**p['PHASE_DW']) if shard is None else shard
+    chunk = 2**chunk_dw
+    sin_stats, cos_stats = [], []
+    seconds = 0.0
+    with NativeDds(parameters, lut_path=lut_path) as dds:
+        for first in range(start, stop, chunk):
+            phases = np.arange(first, min(first + chunk, stop), dtype=np.int64)
+            begin = time.perf_counter()
+            sin, cos = dds.output(phases)
+            seconds += time.perf_counter() - begin
+            expected_sin, expected_cos = checker.expected_output(model, phases)
+            sin_stats.append(checker.error_stats(sin, expected_sin, offset=first))
+            cos_stats.append(checker.error_stats(cos, expected_cos, offset=first))
+    return checker.merge_stats(sin_stats), checker.merge_stats(cos_stats), seconds
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Exhaustive phase sweep of dds.sv in a native Verilator simulation')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE', help='dds.sv parameter, can be repeated')
+    parser.add_argument('--start', type=int, default=None, help='first phase')
+    parser.add_argument('--stop', type=int, default=None, help='last phase + 1')
+    parser.add_argument('--chunk_dw', type=int, default=20, help='phases per call are 2**chunk_dw')
+    args = parser.parse_args(args)
+
+    parameters = {name: int(value) for name, value in (p.split('=') for p in args.param)}
+    PHASE_DW = parameters.get('PHASE_DW', DEFAULTS['PHASE_DW'])
+    shard = (args.start or 0, args.stop or 2**PHASE_DW)
+    sin_stats, cos_stats, seconds = sweep(parameters, args.chunk_dw, shard)
+    print(" ".join("{}={}".format(*i) for i in parameters.items()))
+    print(f"    {sin_stats['samples']} phases in {seconds:.1f} s, {sin_stats['samples'] / max(seconds, 1e-9):.3g} samples/s")
+    ok = True
+    for name, stats in (('sin', sin_stats), ('cos', cos_stats)):
+        first = stats['first_mismatch']
+        print(f"    {name}: {stats['mismatches']} mismatches against the model" + ("" if first is None else f", first at phase {first}"))
+        ok = ok and stats['mismatches'] == 0
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import cProfile
+import contextlib
+
+import cocotb.handle
+import cocotb.utils
+
+# Opt-in profiling of the cocotb testbenches, enabled with DDS_PROFILE=1. A Profiler measures the wall time of
+# testbench sections (plain python like generate_input) and coroutines (only the time the coroutine runs, not
+# the time it waits for a trigger), the scheduler wakeups of the coroutines, the reads and writes of every
+# signal, and the simulated clocks per second. write_report() or the end of a with block writes one json file
+# per test to DDS_PROFILE_DIR/<build directory>/<test>.json, DDS_PROFILE_CPROFILE=1 additionally dumps a
+# cProfile file next to it (view with python -m pstats or snakeviz). Disabled profilers return everything unchanged.
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+
+ENABLED = os.getenv('DDS_PROFILE', '0') == '1'
+CPROFILE = os.getenv('DDS_PROFILE_CPROFILE', '0') == '1'
+PROFILE_DIR = os.getenv('DDS_PROFILE_DIR', os.path.join(tests_dir, 'sim_build', 'profile'))
+
+# handle classes with their own value property
+HANDLE_CLASSES = [cls for cls in vars(cocotb.handle).values()
+                  if isinstance(cls, type) and issubclass(cls, cocotb.handle.SimHandleBase)
+                  and isinstance(cls.__dict__.get('value'), property)]
+
+class Profiler:
+    def __init__(self, name, clk_period_ns, enabled=ENABLED, cprofile=CPROFILE, directory=None, sim_time=None):
+        self.name = name
+        self.clk_period_ns = clk_period_ns
+        self.enabled = enabled
+        self.directory = directory if directory is not None else os.path.join(PROFILE_DIR, os.path.basename(os.getcwd()))
+        self.sim_time = sim_time if sim_time is not None else (lambda: cocotb.utils.get_sim_time('ns'))
+        self.sections = {}
+        self.coroutines = {}
+        self.reads = {}
+        self.writes = {}
+        self.patched = []
+        self.cprofile = None
+        if not self.enabled:
+            return
+        self.start_wall = time.perf_counter()
+        self.start_sim = self.sim_time()
+        self._count_signal_access()
+        if cprofile:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def _count_signal_access(self):
+        # the value property of the handle classes is replaced by a counting one until stop()
+        reads, writes = self.reads, self.writes
+        for cls in HANDLE_CLASSES:
+            prop = cls.__dict__['value']
+            def fget(handle, fget=prop.fget):
+                reads[handle._name] = reads.get(handle._name, 0) + 1
+                return fget(handle)
+            def fset(handle, value, fset=prop.fset):
+                writes[handle._name] = writes.get(handle._name, 0) + 1
+                fset(handle, value)
+            setattr(cls, 'value', property(fget, fset if prop.fset is not None else None, None, prop.__doc__))
+            self.patched.append((cls, prop))
+
+    def section(self, name):
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._section(name)
+
+    @contextlib.contextmanager
+    def _section(self, name):
+        stats = self.sections.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats['calls'] += 1
+            stats['seconds'] += time.perf_counter() - start
+
+    def coroutine(self, name, coro):
+        # use like cocotb.start_soon(profiler.coroutine('drive', drive(dut))) or await profiler.coroutine(...)
+        if not self.enabled:
+            return coro
+        return self._timed(self.coroutines.setdefault(name, {'seconds': 0.0, 'wakeups': 0}), coro)
+
+    async def _timed(self, stats, coro):
+        # runs coro step by step and awaits its triggers in its place, so only the steps are timed
+        value, error = None, None
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    trigger = coro.send(value) if error is None else coro.throw(error)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    stats['seconds'] += time.perf_counter() - start
+                    stats['wakeups'] += 1
+                try:
+                    value, error = await trigger, None
+                except Exception as e:
+                    value, error = None, e
+        finally:
+            coro.close()
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        for cls, prop in reversed(self.patched):
+            setattr(cls, 'value', prop)
+        self.patched = []
+
+    def report(self, error=None):
+        wall = time.perf_counter() - self.start_wall
+        clocks = (self.sim_time() - self.start_sim) / self.clk_period_ns
+        python = sum(s['seconds'] for s in self.sections.values()) + sum(c['seconds'] for c in self.coroutines.values())
+        wakeups = sum(c['wakeups'] for c in self.coroutines.values())
+        return {
+            'test': self.name,
+            'wall_seconds': wall,
+            'clocks': clocks,
+            'clocks_per_second': clocks / wall if wall > 0 else 0.0,
+            # time of the measured python code, the rest is simulator, scheduler and unmeasured code
+            'python_seconds': python,
+            'other_seconds': wall - python,
+            'wakeups_per_clock': wakeups / clocks if clocks > 0 else 0.0,
+            'sections': self.sections,
+            'coroutines': self.coroutines,
+            'signal_reads': self.reads,
+            'signal_writes': self.writes,
+            # exception of a failed test, None if it passed
+            'error': error,
+        }
+
+    def write_report(self, error=None):
+        # stops profiling, writes <test>.json (and <test>.prof) and returns the report, None if disabled
+        if not self.enabled:
+            return None
+        self.stop()
+        report = self.report(error)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.name + '.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(os.path.join(self.directory, self.name + '.prof'))
+        return report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # use the profiler as context of the whole test body, so that the report is also written
+        # and the signal handles are restored if the test fails
+        self.write_report(None if exc is None else f"{exc_type.__name__}: {exc}")
@@ -1,29 +1,19 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import Timer
-from cocotb.triggers import RisingEdge, ReadOnly
+from cocotb.triggers import RisingEdge
 
 import random
-import warnings
 import os
 import logging
-import cocotb_test.simulator
-import math
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import signal
 
 import importlib.util
 
 CLK_PERIOD_S = (1/500E6)  # 500 MHz
 
-def dB20(array):
-    with np.errstate(divide='ignore'):
-        return 20 * np.log10(array)
-        
 def dB10(array):
     with np.errstate(divide='ignore'):
-        return 10 * np.log10(array)        
+        return 10 * np.log10(array)
 
 class TB(object):
     def __init__(self,dut):
@@ -36,6 +26,12 @@ class TB(object):
         self.SIN_COS = int(dut.SIN_COS)
         self.NEGATIVE_SINE = int(dut.NEGATIVE_SINE)
         self.NEGATIVE_COSINE = int(dut.NEGATIVE_COSINE)
+        self.SAMPLES_PER_CLOCK = int(dut.SAMPLES_PER_CLOCK)
+        self.LUT_COMPRESSION = int(dut.LUT_COMPRESSION)
+        self.SUNDERLAND_A = int(dut.SUNDERLAND_A)
+        self.SUNDERLAND_C = int(dut.SUNDERLAND_C)
+        self.USE_CORDIC = int(dut.USE_CORDIC)
+        self.CORDIC_ITERATIONS = int(dut.CORDIC_ITERATIONS)
 
         self.log = logging.getLogger("cocotb.tb")
         self.log.setLevel(logging.DEBUG)        
@@ -46,47 +42,59 @@ class TB(object):
         if self.f_clk != 1/CLK_PERIOD_S:
             print("Warning: time stamps in waveform are not accurate, because f_clk != 1/CLK_PERIOD_S !")
         self.accum_width = 32
-        self.phase_increment = np.uint32(round((1<<self.accum_width)/(self.f_clk/(self.f_mhz*1E6))))
 
         tests_dir = os.path.abspath(os.path.dirname(__file__))
         model_dir = os.path.abspath(os.path.join(tests_dir, '../model/dds_model.py'))
         spec = importlib.util.spec_from_file_location("dds_model", model_dir)
         foo = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(foo)
-        self.model = foo.Model(self.PHASE_DW, self.OUT_DW, self.USE_TAYLOR, self.LUT_DW, self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE) 
-        cocotb.fork(Clock(self.dut.clk, CLK_PERIOD_S * 1E9, units='ns').start())
-        cocotb.fork(self.model_clk(CLK_PERIOD_S * 1E9, 'ns'))    
-          
-    async def model_clk(self, period, period_units):
-        timer = Timer(period, period_units)
-        while True:
-            self.model.tick()
-            await timer
+        nco_dir = os.path.abspath(os.path.join(tests_dir, '../model/nco.py'))
+        spec = importlib.util.spec_from_file_location("nco", nco_dir)
+        self.nco = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.nco)
+        spec = importlib.util.spec_from_file_location("spectral_metrics", os.path.join(tests_dir, '../tools/spectral_metrics.py'))
+        self.spectral_metrics = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.spectral_metrics)
+        # Captures up to FFT_SIZE samples are analyzed with one rfft, longer captures with a welch average
+        # over segments of FFT_SIZE samples. The frequency is adjusted so that a segment has an odd number
+        # of periods (coherent sampling).
+        self.num_items = int(os.getenv('NUM_SAMPLES', 2**14))
+        self.fft_size = min(self.num_items, int(os.getenv('FFT_SIZE', 2**16)))
+        self.phase_increment = self.spectral_metrics.coherent_word(self.f_mhz*1E6, self.f_clk, self.fft_size, self.accum_width)
+        self.model = foo.Model(self.PHASE_DW, self.OUT_DW, self.USE_TAYLOR, self.LUT_DW, self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE, bit_exact=True,
+                              SAMPLES_PER_CLOCK=self.SAMPLES_PER_CLOCK, LUT_COMPRESSION=self.LUT_COMPRESSION,
+                              SUNDERLAND_A=self.SUNDERLAND_A, SUNDERLAND_C=self.SUNDERLAND_C,
+                              USE_CORDIC=self.USE_CORDIC, CORDIC_ITERATIONS=self.CORDIC_ITERATIONS)
+        spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+        self.checker = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.checker)
+        spec = importlib.util.spec_from_file_location("profiling", os.path.join(tests_dir, 'profiling.py'))
+        profiling = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(profiling)
+        # DDS_PROFILE=1 enables profiling, the test runs in a with block of the profiler,
+        # which writes the report at the end of the test, also if it fails
+        self.profiler = profiling.Profiler(os.getenv('TESTCASE', 'test'), CLK_PERIOD_S * 1E9)
+        cocotb.start_soon(Clock(self.dut.clk, CLK_PERIOD_S * 1E9, units='ns').start())
 
-    async def generate_input(self):
-        phase = 0
-        self.input = []
-        accumulator = np.uint32(0)
-        while True:
+    def generate_input(self, num_items):
+        accumulator = self.nco.PhaseAccumulator(ACCU_DW=self.accum_width, PHASE_DW=self.PHASE_DW)
+        self.input = self.model.phases(self.phase_increment, num_items, accumulator=accumulator)
+        return self.input
 
-            await RisingEdge(self.dut.clk)
-            self.model.set_data(phase) 
-            self.input.append(phase)
-            self.dut.s_axis_phase_tdata <= int(phase)
-            self.dut.s_axis_phase_tvalid <= 1
-            
-            with np.errstate(over='ignore'):
-                accumulator += self.phase_increment
-            phase = (accumulator >> (self.accum_width - self.PHASE_DW)) & ((1 << self.PHASE_DW)-1)
-            #print(F"accum = {accumulator}   phase = {phase}")
+    def spectrum(self, output):
+        if len(output) == self.fft_size:
+            return self.spectral_metrics.power_spectrum(output), None
+        # the capture is passed in chunks like it would be read from disk with spectral_metrics.read_chunks()
+        chunks = (output[i:i + 2**20] for i in range(0, len(output), 2**20))
+        return self.spectral_metrics.welch(chunks, self.fft_size, 'kaiser'), 'kaiser'
 
     async def cycle_reset(self):
-        self.dut.s_axis_phase_tvalid <= 0
-        self.dut.reset_n <= 0
+        self.dut.s_axis_phase_tvalid.value = 0
+        self.dut.reset_n.value = 0
         await RisingEdge(self.dut.clk)
-        self.dut.reset_n <= 0
+        self.dut.reset_n.value = 0
         await RisingEdge(self.dut.clk)
-        self.dut.reset_n <= 1
+        self.dut.reset_n.value = 1
         await RisingEdge(self.dut.clk)
         self.model.reset()
         
@@ -94,87 +102,49 @@ class TB(object):
 @cocotb.test()
 async def simple_spectrum(dut):
     tb = TB(dut)
-    await tb.cycle_reset()
-    num_items = 500*2**tb.accum_width//tb.phase_increment  # n complete waves
-    #num_items = 2**int(dut.PHASE_DW)//tb.freq//2  # one half wave
-    #num_items = 1000
-    gen = cocotb.fork(tb.generate_input())
-    output = []
-    output_model = []
-    output_cos = []
-    output_model_cos = []
-    count = 0
-    tolerance = 0
-    if tb.USE_TAYLOR:
-        tolerance = 10
-    print(F"tolerance = {tolerance}")
-    while len(output_model) < num_items or len(output) < num_items:
-        await RisingEdge(dut.clk)
-        if(tb.model.data_valid()):
-            output_model.append(int(tb.model.get_data()))
-            output_model_cos.append(int(tb.model.get_data_cos()))
-            #print(f"model:\t[{len(output_model)-1}]\t {output_model[-1]} \t {output_model_cos[-1]}")
-
-        if dut.m_axis_out_sin_tvalid == 1:
-            a=dut.m_axis_out_sin_tdata.value.integer
-            if (a & (1 << (tb.OUT_DW - 1))) != 0:
-                a = a - (1 << tb.OUT_DW)
-            output.append(int(a))
+    with tb.profiler:
+        await tb.cycle_reset()
+        num_items = tb.num_items
+        # the expected output is calculated from the whole stimulus before the simulation starts
+        with tb.profiler.section('generate_input'):
+            phases = tb.generate_input(num_items)
+        with tb.profiler.section('expected_output'):
+            output_model, output_model_cos = tb.checker.expected_output(tb.model, phases)
+        tolerance = 0  # model is bit exact
+        print(F"tolerance = {tolerance}")
+        cocotb.start_soon(tb.profiler.coroutine('drive_input', tb.checker.drive_input(dut, phases, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK)))
+        output, output_cos = await tb.profiler.coroutine('capture_output',
+            tb.checker.capture_output(dut, num_items, tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK))
+        with tb.profiler.section('compare'):
+            tb.log.info(tb.checker.compare("sin", output, output_model, tolerance))
             if tb.SIN_COS:
-                a=dut.m_axis_out_cos_tdata.value.integer
-                if (a & (1 << (tb.OUT_DW - 1))) != 0:
-                    a = a - (1 << tb.OUT_DW)
-            else:
-                a=0
-            output_cos.append(int(a))
-            #print(f"hdl: \t[{len(output)-1}]\t {output[-1]} \t {output_cos[-1]} ")
-        #print(f"{int(tb.model.data_valid())} {dut.m_axis_out_tvalid}")
-        count += 1
-    if False:
-        with open('../../out_sin.txt', 'w') as outfile:
-            np.savetxt(outfile, output, fmt='%d')
-        with open('../../out_cos.txt', 'w') as outfile:
-            np.savetxt(outfile, output_cos, fmt='%d')
-        with open('../../out_model_sin.txt', 'w') as outfile:
-            np.savetxt(outfile, output_model, fmt='%d')
-        with open('../../out_model_cos.txt', 'w') as outfile:
-            np.savetxt(outfile, output_model_cos, fmt='%d')
-    if True:
-        use_window = True
-        window_text = "none"
-        if use_window:
-            window = signal.hann(len(output))
-            window_text = "hann"
-            output *= window
-            output /= sum(window)/len(output)
+                tb.log.info(tb.checker.compare("cos", output_cos, output_model_cos, tolerance))
+
+        # limits are given by the test runner, e.g. SFDR_MIN=90 SINAD_MIN=80
+        sfdr_min = float(os.getenv('SFDR_MIN', '-inf'))
+        sinad_min = float(os.getenv('SINAD_MIN', '-inf'))
+        channels = [("sin", output)] + ([("cos", output_cos)] if tb.SIN_COS else [])
+        for name, data in channels:
+            with tb.profiler.section('spectrum'):
+                S, window = tb.spectrum(data)
+                m = tb.spectral_metrics.metrics(S, tb.f_clk, window)
+            tb.log.info(f"{name}: f = {m['frequency']*1E-6:.4f} MHz, SFDR = {m['sfdr_db']:.2f} dBc (spur at {m['spur_frequency']*1E-6:.4f} MHz), "
+                        f"SNR = {m['snr_db']:.2f} dB, SINAD = {m['sinad_db']:.2f} dB, ENOB = {m['enob']:.2f}")
+            assert m['sfdr_db'] >= sfdr_min, f"{name}: SFDR {m['sfdr_db']:.2f} dBc < {sfdr_min} dBc"
+            assert m['sinad_db'] >= sinad_min, f"{name}: SINAD {m['sinad_db']:.2f} dB < {sinad_min} dB"
+
+    if os.getenv('PLOTS', '0') == '1':
+        import matplotlib.pyplot as plt
+        S, window = tb.spectrum(output)
+        freq = np.fft.rfftfreq(2 * (len(S) - 1), d=1/tb.f_clk)
         fig1 = plt.figure()
-        plt.title(F"DDS output\nf_clk = {tb.f_clk*1E-6} MHz, f_signal = {tb.f_mhz} Mhz, n = {num_items}, window = {window_text}")
-        plt.plot(range(len(output)),output)
-        #plt.plot(range(len(output_model)),output_model)
+        plt.title(F"DDS output\nf_clk = {tb.f_clk*1E-6} MHz, f_signal = {tb.f_mhz} Mhz, n = {num_items}")
+        plt.plot(range(min(len(output), 1000)), output[:1000])
         fig2 = plt.figure()
-        plt.title(F"Two-sided Spectrum of DDS output\nf_clk = {tb.f_clk*1E-6} MHz, f_signal = {tb.f_mhz} Mhz, n = {num_items}, window = {window_text}")
-        output_float = np.array(output) / (2**(tb.OUT_DW-1)-1)
-        S = np.fft.fftshift(np.fft.fft(output_float))
-        freq = np.fft.fftshift(np.fft.fftfreq(n=len(output_float), d=1/tb.f_clk))
-        tiny_offset = 1E-10
-        ydata = dB20(np.abs(S+tiny_offset)/(len(output_float)))
-        plt.plot(freq,ydata)
-        plt.ylim(np.maximum(-200,ydata.min()), ydata.max()+10)        
-        fig3 = plt.figure()
-        plt.title(F"Power Spectrum of DDS output\nf_clk = {tb.f_clk*1E-6} MHz, f_signal = {tb.f_mhz} Mhz, n = {num_items}, window = {window_text}")
-        ydata_onesided = ydata[int(len(ydata)/2):] + 6
-        ydata_onesided[0] -= 6
-        plt.plot(freq[int(len(ydata)/2):],ydata_onesided)
-        plt.ylim(np.maximum(-200,ydata_onesided.min()), ydata_onesided.max()+10)        
+        plt.title(F"Power Spectrum of DDS output\nf_clk = {tb.f_clk*1E-6} MHz, f_signal = {tb.f_mhz} Mhz, n = {num_items}, window = {window}")
+        ydata = dB10(S / S.max())
+        plt.plot(freq, ydata)
+        plt.ylim(np.maximum(-200, ydata.min()), 10)
         plt.xlabel("Hz")
-        plt.ylabel("Normalized Power in dB")
+        plt.ylabel("Power relative to carrier in dB")
         plt.show()
-    for i in range(num_items):
-        assert np.abs(output[i] - output_model[i]) <= tolerance, f"[{i}] hdl: {output[i]} \t model: {output_model[i]}"
-        if tb.SIN_COS:
-            assert np.abs(output_cos[i] - output_model_cos[i]) <= tolerance, f"[{i}] hdl: {output_cos[i]} \t model: {output_model_cos[i]}"
-    #print(f"received {len(output)} samples")
-    gen.kill()
-    tb.dut.s_axis_phase_tvalid <= 0
-# cocotb-test
-    
\ No newline at end of file
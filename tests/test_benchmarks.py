@@ -0,0 +1,48 @@
+import os
+import pytest
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+benchmarks_dir = os.path.abspath(os.path.join(tests_dir, '..', 'benchmarks'))
+
+spec = importlib.util.spec_from_file_location("common", os.path.join(benchmarks_dir, 'common.py'))
+common = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(common)
+
+
+def test_compare():
+    baseline = {}
+    common.result(baseline, 'model', 'process', dict(bit_exact=1), 100, 'samples/s')
+    common.result(baseline, 'lut', 'time', dict(PHASE_DW=8), 2.0, 's', higher_is_better=False)
+    common.result(baseline, 'lut', 'time', dict(PHASE_DW=10), 2.0, 's', higher_is_better=False)
+    results = {}
+    common.result(results, 'model', 'process', dict(bit_exact=1), 85, 'samples/s')
+    common.result(results, 'lut', 'time', dict(PHASE_DW=8), 1.0, 's', higher_is_better=False)
+    common.result(results, 'lut', 'peak_memory', dict(PHASE_DW=8), 1.0, 'MiB', higher_is_better=False)
+    rows = {row[0]: row[1:] for row in common.compare(results, baseline, threshold=0.1)}
+    assert sorted(rows) == ['lut.time[PHASE_DW=8]', 'model.process[bit_exact=1]']
+    assert rows['lut.time[PHASE_DW=8]'] == (2.0, 1.0, 2.0, False)
+    assert rows['model.process[bit_exact=1]'][2] == pytest.approx(0.85)
+    assert rows['model.process[bit_exact=1]'][3]
+    assert not common.compare(results, baseline, threshold=0.2)[1][4]
+
+
+def test_save_load(tmp_path):
+    results = {}
+    common.result(results, 'nco', 'ramp', dict(ACCU_DW=32), 1e6, 'samples/s')
+    common.save(str(tmp_path / 'results.json'), results)
+    assert common.load(str(tmp_path / 'results.json')) == results
+
+
+def test_quick_run(tmp_path, monkeypatch):
+    # the suites import common like a script from the benchmarks directory
+    monkeypatch.syspath_prepend(benchmarks_dir)
+    spec = importlib.util.spec_from_file_location("run_benchmarks", os.path.join(benchmarks_dir, 'run_benchmarks.py'))
+    run_benchmarks = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(run_benchmarks)
+    output = str(tmp_path / 'results.json')
+    assert run_benchmarks.main(['--quick', '--suites', 'lut', '--output', output]) == 0
+    results = common.load(output)
+    assert 'lut.time[PHASE_DW=12,OUT_DW=16,formats=all]' in results
+    assert run_benchmarks.main(['--quick', '--suites', 'lut', '--output', output, '--compare', output]) == 0
@@ -0,0 +1,61 @@
+import os
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
+
+spec = importlib.util.spec_from_file_location("capture_file", os.path.join(tools_dir, 'capture_file.py'))
+capture_file = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(capture_file)
+
+spec = importlib.util.spec_from_file_location("plot_sim_output", os.path.join(tools_dir, 'plot_sim_output.py'))
+plot_sim_output = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(plot_sim_output)
+
+
+@pytest.mark.parametrize("OUT_DW, dtype", [(8, np.int8), (12, np.int16), (16, np.int16), (20, np.int32), (40, np.int64)])
+def test_sample_dtype(OUT_DW, dtype):
+    assert capture_file.sample_dtype(OUT_DW) == dtype
+
+
+def test_writer(tmp_path):
+    filename = str(tmp_path / 'out.npy')
+    rng = np.random.default_rng(30)
+    data = rng.integers(-2**15, 2**15, 10000)
+    with capture_file.CaptureWriter(filename, np.int16) as writer:
+        writer.append(data[:3000])
+        writer.flush()
+        # a reader sees the samples written up to the last flush
+        assert np.array_equal(np.load(filename), data[:3000])
+        writer.append(data[3000:])
+    assert os.path.getsize(filename) == capture_file.HEADER_SIZE + 2 * len(data)
+    loaded = np.load(filename, mmap_mode='r')
+    assert loaded.dtype == np.int16 and np.array_equal(loaded, data)
+    with pytest.raises(ValueError):
+        capture_file.CaptureWriter(str(tmp_path / 'x.npy')).append(np.zeros((2, 2)))
+
+
+def test_read_window(tmp_path):
+    data = np.arange(-5000, 5000)
+    capture_file.save(str(tmp_path / 'out.npy'), data, chunk_size=999)
+    np.savetxt(str(tmp_path / 'out.txt'), data, fmt='%d')
+    for name in ['out.npy', 'out.txt']:
+        assert np.array_equal(capture_file.read_window(str(tmp_path / name), 100, 200), data[100:200])
+        assert np.array_equal(capture_file.read_window(str(tmp_path / name), 9990), data[9990:])
+
+
+def test_minmax_decimate():
+    data = np.sin(np.arange(1000001) / 5000)
+    data[123457] = 5  # single sample glitch
+    x, y = plot_sim_output.minmax_decimate(data, 2000, offset=10)
+    assert len(x) <= 2002
+    assert np.all(np.diff(x) > 0)
+    assert np.array_equal(y, data[x - 10])
+    assert y.max() == 5 and x[np.argmax(y)] == 123457 + 10
+    assert y.min() == data.min()
+    # short traces are not decimated
+    x, y = plot_sim_output.minmax_decimate(data[:100], 2000)
+    assert np.array_equal(x, np.arange(100)) and np.array_equal(y, data[:100])
@@ -1,5 +1,7 @@
 import random
 import os
+import shutil
+import time
 import logging
 import pytest
 import numpy as np
@@ -7,9 +9,7 @@ from pathlib import Path
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import Timer
 from cocotb.triggers import RisingEdge
-import cocotb_test.simulator
 
 import importlib.util
 
@@ -28,6 +28,17 @@ class TB(object):
         self.NEGATIVE_SINE = int(dut.NEGATIVE_SINE)
         self.NEGATIVE_COSINE = int(dut.NEGATIVE_COSINE)
         self.USE_LUT_FILE = int(dut.USE_LUT_FILE)
+        self.SAMPLES_PER_CLOCK = int(dut.SAMPLES_PER_CLOCK)
+        self.LUT_COMPRESSION = int(dut.LUT_COMPRESSION)
+        self.SUNDERLAND_A = int(dut.SUNDERLAND_A)
+        self.SUNDERLAND_C = int(dut.SUNDERLAND_C)
+        self.USE_CORDIC = int(dut.USE_CORDIC)
+        self.CORDIC_ITERATIONS = int(dut.CORDIC_ITERATIONS)
+        self.CHANNELS = int(dut.CHANNELS)
+        self.USE_ACCUMULATOR = int(dut.USE_ACCUMULATOR)
+        self.ACCU_DW = int(dut.ACCU_DW)
+        self.USE_MIXER = int(dut.USE_MIXER)
+        self.MIXER_DW = int(dut.MIXER_DW)
 
         self.log = logging.getLogger("cocotb.tb")
         self.log.setLevel(logging.DEBUG)
@@ -43,31 +54,33 @@ class TB(object):
         spec = importlib.util.spec_from_file_location("dds_model", model_dir)
         foo = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(foo)
-        self.model = foo.Model(self.PHASE_DW, self.OUT_DW, self.USE_TAYLOR, self.LUT_DW, self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE) 
+        self.model = foo.Model(self.PHASE_DW, self.OUT_DW, self.USE_TAYLOR, self.LUT_DW, self.SIN_COS, self.NEGATIVE_SINE, self.NEGATIVE_COSINE, bit_exact=True,
+                                SAMPLES_PER_CLOCK=self.SAMPLES_PER_CLOCK, LUT_COMPRESSION=self.LUT_COMPRESSION,
+                                SUNDERLAND_A=self.SUNDERLAND_A, SUNDERLAND_C=self.SUNDERLAND_C, CHANNELS=self.CHANNELS,
+                                USE_CORDIC=self.USE_CORDIC, CORDIC_ITERATIONS=self.CORDIC_ITERATIONS)
+        nco_dir = os.path.abspath(os.path.join(tests_dir, '../model/nco.py'))
+        spec = importlib.util.spec_from_file_location("nco", nco_dir)
+        self.nco = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.nco)
+        spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+        self.checker = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.checker)
+        spec = importlib.util.spec_from_file_location("profiling", os.path.join(tests_dir, 'profiling.py'))
+        profiling = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(profiling)
+        # DDS_PROFILE=1 enables profiling, the tests run in a with block of the profiler,
+        # which writes the report at the end of the test, also if it fails
+        self.profiler = profiling.Profiler(os.getenv('TESTCASE', 'test'), CLK_PERIOD_NS)
         cocotb.start_soon(Clock(self.dut.clk, CLK_PERIOD_NS, units='ns').start())
-        cocotb.start_soon(self.model_clk(CLK_PERIOD_NS, 'ns'))
-          
-    async def model_clk(self, period, period_units):
-        timer = Timer(period, period_units)
-        while True:
-            self.model.tick()
-            await timer
-
-    async def generate_input(self):
-        phase = 0
-        self.input = []
-        while True:
-            if phase >= 2**self.PHASE_DW:
-                phase = (2**self.PHASE_DW-1) % phase # do wrap around
-            await RisingEdge(self.dut.clk)
-            self.model.set_data(phase)
-            self.input.append(phase)
-            self.dut.s_axis_phase_tdata.value = phase
-            self.dut.s_axis_phase_tvalid.value = 1
-            phase += self.freq
+
+    def generate_input(self, num_items):
+        self.input = self.model.phases(self.freq, num_items)
+        return self.input
 
     async def cycle_reset(self):
         self.dut.s_axis_phase_tvalid.value = 0
+        self.dut.s_axis_phase_tuser.value = 0
+        self.dut.s_axis_tuning_tvalid.value = 0
         self.dut.reset_n.value = 0
         await RisingEdge(self.dut.clk)
         self.dut.reset_n.value = 0
@@ -79,58 +92,149 @@ class TB(object):
 @cocotb.test()
 async def simple_test(dut):
     tb = TB(dut)
-    await tb.cycle_reset()
-    #num_items = 2**int(dut.PHASE_DW)//tb.freq  # one complete wave
-    num_items = 2**int(dut.PHASE_DW)//tb.freq//2  # one half wave
-    #num_items = 100
-    gen = cocotb.fork(tb.generate_input())
-    output = []
-    output_model = []
-    output_cos = []
-    output_model_cos = []
-    count = 0
-    tolerance = 0
-    if tb.USE_TAYLOR:
-        tolerance = 10
-    print(F"tolerance = {tolerance}")
-    while len(output_model) < num_items or len(output) < num_items:
-        await RisingEdge(dut.clk)
-        if(tb.model.data_valid()):
-            output_model.append(int(tb.model.get_data()))
-            output_model_cos.append(int(tb.model.get_data_cos()))
-            #print(f"model:\t[{len(output_model)-1}]\t {output_model[-1]} \t {output_model_cos[-1]}")
-
-        if dut.m_axis_out_sin_tvalid.value == 1:
-            a = dut.m_axis_out_sin_tdata.value.integer
-            if (a & (1 << (tb.OUT_DW - 1))) != 0:
-                a = a - (1 << tb.OUT_DW)
-            output.append(int(a))
+    with tb.profiler:
+        await tb.cycle_reset()
+        #num_items = 2**int(dut.PHASE_DW)//tb.freq  # one complete wave
+        num_items = 2**int(dut.PHASE_DW)//tb.freq//2  # one half wave
+        num_items -= num_items % tb.SAMPLES_PER_CLOCK  # whole beats
+        #num_items = 100
+        # the expected output is calculated from the whole stimulus before the simulation starts
+        with tb.profiler.section('generate_input'):
+            phases = tb.generate_input(num_items)
+        with tb.profiler.section('expected_output'):
+            output_model, output_model_cos = tb.checker.expected_output(tb.model, phases)
+        tolerance = 0  # model is bit exact
+        print(F"tolerance = {tolerance}")
+        writers = None
+        if 'DUMP_CAPTURE' in os.environ:
+            # the model output is known before the simulation, the dut output is appended while it is captured
+            tb.checker.dump_capture(os.environ['DUMP_CAPTURE'], tb.OUT_DW, out_model=output_model, out_model_cos=output_model_cos)
+            writers = tb.checker.capture_writers(os.environ['DUMP_CAPTURE'], tb.OUT_DW, 'out', 'out_cos')
+        cocotb.start_soon(tb.profiler.coroutine('drive_input', tb.checker.drive_input(dut, phases, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK)))
+        try:
+            output, output_cos = await tb.profiler.coroutine('capture_output',
+                tb.checker.capture_output(dut, num_items, tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK, writers=writers,
+                                        chunk_size=int(os.getenv('DUMP_CHUNK', 2**14))))
+        finally:
+            for writer in writers or []:
+                writer.close()
+        with tb.profiler.section('compare'):
+            tb.log.info(tb.checker.compare("sin", output, output_model, tolerance))
+            if tb.SIN_COS:
+                tb.log.info(tb.checker.compare("cos", output_cos, output_model_cos, tolerance))
+
+@cocotb.test()
+async def channels_test(dut):
+    # every channel is an nco with its own frequency, the channels are interleaved beat by beat
+    tb = TB(dut)
+    with tb.profiler:
+        await tb.cycle_reset()
+        num_items = 2**tb.PHASE_DW // tb.freq // 2 // tb.CHANNELS
+        num_items -= num_items % tb.SAMPLES_PER_CLOCK
+        phases = np.stack([tb.model.phases(tb.freq * (c + 1), num_items) for c in range(tb.CHANNELS)])
+        with tb.profiler.section('expected_output'):
+            expected_sin, expected_cos = tb.model.process_channels(phases)
+            stream, channels = tb.model.interleave(phases)
+        cocotb.start_soon(tb.profiler.coroutine('drive_input',
+            tb.checker.drive_input(dut, stream, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK, channels)))
+        output, output_cos, output_channel = await tb.profiler.coroutine('capture_output',
+            tb.checker.capture_output(dut, len(stream), tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK, tb.CHANNELS))
+        with tb.profiler.section('compare'):
+            assert np.array_equal(output_channel, np.repeat(channels, tb.SAMPLES_PER_CLOCK)), "tuser is not aligned with the data"
+            for c in range(tb.CHANNELS):
+                tb.log.info(tb.checker.compare(f"sin {c}", output[output_channel == c], expected_sin[c]))
+                if tb.SIN_COS:
+                    tb.log.info(tb.checker.compare(f"cos {c}", output_cos[output_channel == c], expected_cos[c]))
+
+@cocotb.test()
+async def accumulator_test(dut):
+    # integrated phase accumulator: random beats with gaps and frequency hops of random channels at random clocks
+    tb = TB(dut)
+    with tb.profiler:
+        await tb.cycle_reset()
+        rng = np.random.default_rng(30)
+        num_clocks = 4000
+        valid = rng.random(num_clocks) < 0.8
+        channels = rng.integers(0, tb.CHANNELS, num_clocks)
+        # every channel is tuned before its first beat
+        tuning_valid = rng.random(num_clocks) < 0.01
+        tuning_valid[:tb.CHANNELS] = True
+        tuning_channels = rng.integers(0, tb.CHANNELS, num_clocks)
+        tuning_channels[:tb.CHANNELS] = np.arange(tb.CHANNELS)
+        valid[:tb.CHANNELS] = False
+        fcws = rng.integers(0, 2**min(tb.ACCU_DW, 62), num_clocks) >> rng.integers(0, 12, num_clocks)
+        offsets = rng.integers(0, 2**min(tb.ACCU_DW, 62), num_clocks)
+        with tb.profiler.section('generate_input'):
+            accumulator = tb.nco.CoreAccumulator(tb.ACCU_DW, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK, tb.CHANNELS)
+            phases = accumulator.run(valid, channels, tuning_valid, fcws, offsets, tuning_channels)
+            phases = phases.reshape(num_clocks, tb.SAMPLES_PER_CLOCK)[valid].ravel()
+        with tb.profiler.section('expected_output'):
+            output_model, output_model_cos = tb.checker.expected_output(tb.model, phases)
+        cocotb.start_soon(tb.profiler.coroutine('drive_input',
+            tb.checker.drive_accumulator(dut, valid, channels, tuning_valid, fcws, offsets, tuning_channels, tb.ACCU_DW)))
+        output = await tb.profiler.coroutine('capture_output',
+            tb.checker.capture_output(dut, len(phases), tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK, tb.CHANNELS))
+        with tb.profiler.section('compare'):
+            if tb.CHANNELS > 1:
+                assert np.array_equal(output[2], np.repeat(channels[valid], tb.SAMPLES_PER_CLOCK)), "tuser is not aligned with the data"
+            tb.log.info(tb.checker.compare("sin", output[0], output_model))
             if tb.SIN_COS:
-                a = dut.m_axis_out_cos_tdata.value.integer
-                if (a & (1 << (tb.OUT_DW - 1))) != 0:
-                    a = a - (1 << tb.OUT_DW)
-            else:
-                a = 0
-            output_cos.append(int(a))
-            #print(f"hdl: \t[{len(output)-1}]\t {output[-1]} \t {output_cos[-1]} ")
-        #print(f"{int(tb.model.data_valid())} {dut.m_axis_out_tvalid}")
-        count += 1
-    if False:
-        with open('../../out.txt', 'w') as outfile:
-            np.savetxt(outfile, output, fmt='%d')
-        with open('../../out_cos.txt', 'w') as outfile:
-            np.savetxt(outfile, output_cos, fmt='%d')
-        with open('../../out_model.txt', 'w') as outfile:
-            np.savetxt(outfile, output_model, fmt='%d')
-        with open('../../out_model_cos.txt', 'w') as outfile:
-            np.savetxt(outfile, output_model_cos, fmt='%d')
-    for i in range(num_items):
-        assert np.abs(output[i] - output_model[i]) <= tolerance, f"[{i}] hdl: {output[i]} \t model: {output_model[i]}"
+                tb.log.info(tb.checker.compare("cos", output[1], output_model_cos))
+
+@cocotb.test()
+async def mixer_test(dut):
+    # random mixer input, the dds output is checked as well, because the mixer is an extra output
+    tb = TB(dut)
+    with tb.profiler:
+        await tb.cycle_reset()
+        rng = np.random.default_rng(30)
+        num_items = 3000 - 3000 % tb.SAMPLES_PER_CLOCK
+        phases = tb.generate_input(num_items)
+        data_i = rng.integers(-2**(tb.MIXER_DW - 1), 2**(tb.MIXER_DW - 1), num_items)
+        data_q = rng.integers(-2**(tb.MIXER_DW - 1), 2**(tb.MIXER_DW - 1), num_items) if tb.USE_MIXER == 2 else None
+        # full scale corners
+        data_i[:4] = -2**(tb.MIXER_DW - 1)
+        with tb.profiler.section('expected_output'):
+            expected_i, expected_q = tb.model.mix(phases, data_i, data_q)
+            output_model, output_model_cos = tb.checker.expected_output(tb.model, phases)
+            mix = tb.checker.mix_words(data_i, data_q, tb.MIXER_DW, tb.SAMPLES_PER_CLOCK)
+        cocotb.start_soon(tb.profiler.coroutine('drive_input',
+            tb.checker.drive_input(dut, phases, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK, mix=mix)))
+        capture = cocotb.start_soon(tb.profiler.coroutine('capture_output',
+            tb.checker.capture_output(dut, num_items, tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK)))
+        output_i, output_q = await tb.profiler.coroutine('capture_mix',
+            tb.checker.capture_mix(dut, num_items, tb.MIXER_DW, tb.SAMPLES_PER_CLOCK))
+        output, output_cos = await capture
+        with tb.profiler.section('compare'):
+            tb.log.info(tb.checker.compare("sin", output, output_model))
+            tb.log.info(tb.checker.compare("cos", output_cos, output_model_cos))
+            tb.log.info(tb.checker.compare("mix i", output_i, expected_i))
+            tb.log.info(tb.checker.compare("mix q", output_q, expected_q))
+
+@cocotb.test()
+async def exhaustive_test(dut):
+    # one shard of the exhaustive phase sweep, drives every phase from SHARD_START to SHARD_STOP - 1
+    tb = TB(dut)
+    with tb.profiler:
+        await tb.cycle_reset()
+        start, stop = int(os.environ['SHARD_START']), int(os.environ['SHARD_STOP'])
+        phases = np.arange(start, stop, dtype=np.int64)
+        with tb.profiler.section('expected_output'):
+            output_model, output_model_cos = tb.checker.expected_output(tb.model, phases)
+        begin = time.perf_counter()
+        cocotb.start_soon(tb.profiler.coroutine('drive_input', tb.checker.drive_input(dut, phases, tb.PHASE_DW, tb.SAMPLES_PER_CLOCK)))
+        output, output_cos = await tb.profiler.coroutine('capture_output',
+            tb.checker.capture_output(dut, len(phases), tb.OUT_DW, tb.SIN_COS, tb.SAMPLES_PER_CLOCK))
+        seconds = time.perf_counter() - begin
+        sin_stats = tb.checker.error_stats(output, output_model, offset=start)
+        cos_stats = tb.checker.error_stats(output_cos, output_model_cos, offset=start)
+        parameters = dict(PHASE_DW=tb.PHASE_DW, OUT_DW=tb.OUT_DW, USE_TAYLOR=tb.USE_TAYLOR, LUT_DW=tb.LUT_DW, SIN_COS=tb.SIN_COS,
+                          NEGATIVE_SINE=tb.NEGATIVE_SINE, NEGATIVE_COSINE=tb.NEGATIVE_COSINE, USE_LUT_FILE=tb.USE_LUT_FILE)
+        exhaustive.write_shard(os.environ['SHARD_RESULT'], parameters, start, stop, seconds, sin_stats, cos_stats)
+        tb.log.info(tb.checker.compare("sin", output, output_model))
         if tb.SIN_COS:
-            assert np.abs(output_cos[i] - output_model_cos[i]) <= tolerance, f"[{i}] hdl: {output_cos[i]} \t model: {output_model_cos[i]}"
-    #print(f"received {len(output)} samples")
-    gen.kill()
-    tb.dut.s_axis_phase_tvalid.value = 0
+            tb.log.info(tb.checker.compare("cos", output_cos, output_model_cos))
+
 # cocotb-test
 
 
@@ -138,15 +242,37 @@ tests_dir = os.path.abspath(os.path.dirname(__file__))
 rtl_dir = os.path.abspath(os.path.join(tests_dir, '..', 'hdl'))
 tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
 
-@pytest.mark.parametrize("PHASE_DW", [20, 24])
-@pytest.mark.parametrize("OUT_DW", [16])
-@pytest.mark.parametrize("USE_TAYLOR", [1])
-@pytest.mark.parametrize("LUT_DW", [9, 11])
-@pytest.mark.parametrize("SIN_COS", [1])
-@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
-@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
-@pytest.mark.parametrize("USE_LUT_FILE", [0, 1])
-def test_dds_taylor(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, USE_LUT_FILE):
+spec = importlib.util.spec_from_file_location("generate_sine_lut", os.path.join(tools_dir, 'generate_sine_lut.py'))
+generate_sine_lut = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_sine_lut)
+
+spec = importlib.util.spec_from_file_location("cached_build", os.path.join(tests_dir, 'cached_build.py'))
+cached_build = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cached_build)
+
+spec = importlib.util.spec_from_file_location("exhaustive", os.path.join(tests_dir, 'exhaustive.py'))
+exhaustive = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(exhaustive)
+
+def copy_lut_file(work_dir, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, LUT_COMPRESSION=0, SUNDERLAND_A=8, SUNDERLAND_C=3):
+    # the lut is generated only once and then shared by all tests and pytest workers,
+    # dds.sv reads it from the directory the simulation runs in
+    lut_width = LUT_DW if USE_TAYLOR else PHASE_DW - 2
+    if LUT_COMPRESSION:
+        cache_dir = os.path.abspath(os.path.join('sim_build', 'lut_cache'))
+        lut_filename = generate_sine_lut.cached_sunderland_files(lut_width, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, cache_dir=cache_dir)
+        for part in ('coarse', 'fine'):
+            shutil.copyfile(f'{lut_filename}_{part}.hex', os.path.join(work_dir, f'{os.path.basename(lut_filename)}_{part}.hex'))
+        return
+    lut_filename = generate_sine_lut.cached_lut_file(lut_width, OUT_DW, cache_dir=os.path.abspath(os.path.join('sim_build', 'lut_cache')))
+    shutil.copyfile(lut_filename + '.hex', os.path.join(work_dir, f'sine_lut_{lut_width}_{OUT_DW}.hex'))
+
+def dds_work_dir(name, parameters):
+    # the compiled model is cached in sim_build/build, work_dir only holds the results of this test case
+    return f"sim_build/{name}_" + "_".join(("{}={}".format(*i) for i in parameters.items()))
+
+def run_dds(name, parameters, testcase, extra_env=None, work_dir=None):
+    # runs testcase of this module on dds.sv, every parameter is also passed to the testbench as PARAM_<name>
     dut = "dds"
     module = os.path.splitext(os.path.basename(__file__))[0]
     toplevel = dut
@@ -158,44 +284,38 @@ def test_dds_taylor(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE
         os.path.join(rtl_dir, ""),
     ]
 
-    parameters = {}
-
-    parameters['PHASE_DW'] = PHASE_DW
-    parameters['OUT_DW'] = OUT_DW
-    parameters['USE_TAYLOR'] = USE_TAYLOR
-    parameters['LUT_DW'] = LUT_DW
-    parameters['SIN_COS'] = SIN_COS
-    parameters['NEGATIVE_SINE'] = NEGATIVE_SINE
-    parameters['NEGATIVE_COSINE'] = NEGATIVE_COSINE
-    parameters['USE_LUT_FILE'] = USE_LUT_FILE
-
-    extra_env = {f'PARAM_{k}': str(v) for k, v in parameters.items()}
-    sim_build="sim_build/dds_taylor_" + "_".join(("{}={}".format(*i) for i in parameters.items()))
-    Path(sim_build).mkdir(parents=True, exist_ok=True)
-
-    if USE_LUT_FILE:
-        file_path = os.path.abspath(os.path.join(tests_dir, '../tools/generate_sine_lut.py'))
-        spec = importlib.util.spec_from_file_location("generate_sine_lut", file_path)
-        generate_sine_lut = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(generate_sine_lut)
-        lut_width = PHASE_DW -2
-        if USE_TAYLOR:
-            lut_width = LUT_DW
-        lut_filename = os.path.abspath(os.path.join(sim_build, 'sine_lut_'+str(lut_width)+'_'+str(OUT_DW)))
-        generate_sine_lut.main(['--PHASE_DW',str(lut_width),'--OUT_DW',str(OUT_DW),'--filename',lut_filename])
-
-    cocotb_test.simulator.run(
+    extra_env = {**{f'PARAM_{k}': str(v) for k, v in parameters.items()}, **(extra_env or {})}
+    work_dir = work_dir or dds_work_dir(name, parameters)
+    Path(work_dir).mkdir(parents=True, exist_ok=True)
+
+    if parameters.get('USE_LUT_FILE'):
+        copy_lut_file(work_dir, parameters['PHASE_DW'], parameters['OUT_DW'], parameters['USE_TAYLOR'], parameters['LUT_DW'],
+                      parameters.get('LUT_COMPRESSION', 0), parameters.get('SUNDERLAND_A', 8), parameters.get('SUNDERLAND_C', 3))
+
+    cached_build.run(
         python_search=[tests_dir],
         verilog_sources=verilog_sources,
         includes=includes,
         toplevel=toplevel,
         module=module,
         parameters=parameters,
-        sim_build=sim_build,
+        work_dir=work_dir,
         extra_env=extra_env,
-        testcase="simple_test",
+        testcase=testcase,
     )
 
+@pytest.mark.parametrize("PHASE_DW", [20, 24])
+@pytest.mark.parametrize("OUT_DW", [16])
+@pytest.mark.parametrize("USE_TAYLOR", [1])
+@pytest.mark.parametrize("LUT_DW", [9, 11])
+@pytest.mark.parametrize("SIN_COS", [1])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
+@pytest.mark.parametrize("USE_LUT_FILE", [0, 1])
+def test_dds_taylor(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, USE_LUT_FILE):
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=NEGATIVE_SINE, NEGATIVE_COSINE=NEGATIVE_COSINE, USE_LUT_FILE=USE_LUT_FILE)
+    run_dds("dds_taylor", parameters, "simple_test")
 
 @pytest.mark.parametrize("PHASE_DW", [16, 8])
 @pytest.mark.parametrize("OUT_DW", [16, 3])
@@ -206,56 +326,114 @@ def test_dds_taylor(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE
 @pytest.mark.parametrize("NEGATIVE_COSINE", [1, 0])
 @pytest.mark.parametrize("USE_LUT_FILE", [1, 0])
 def test_dds(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, USE_LUT_FILE):
-    dut = "dds"
-    module = os.path.splitext(os.path.basename(__file__))[0]
-    toplevel = dut
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=NEGATIVE_SINE, NEGATIVE_COSINE=NEGATIVE_COSINE, USE_LUT_FILE=USE_LUT_FILE)
+    run_dds("dds", parameters, "simple_test")
 
-    verilog_sources = [
-        os.path.join(rtl_dir, f"{dut}.sv"),
-    ]
-    includes = [
-        os.path.join(rtl_dir, ""),
-    ]
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW", [(16, 16, 0, 6), (20, 16, 1, 9)])
+@pytest.mark.parametrize("SIN_COS", [1, 0])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [2, 3, 4])
+@pytest.mark.parametrize("USE_LUT_FILE", [1, 0])
+def test_dds_lanes(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, SAMPLES_PER_CLOCK, USE_LUT_FILE):
+    # lane builds with SAMPLES_PER_CLOCK samples per beat, an odd number of lanes leaves one lut port unused
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=0, NEGATIVE_COSINE=0, USE_LUT_FILE=USE_LUT_FILE, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK)
+    run_dds("dds_lanes", parameters, "simple_test")
 
-    parameters = {}
-    parameters['PHASE_DW'] = PHASE_DW
-    parameters['OUT_DW'] = OUT_DW
-    parameters['USE_TAYLOR'] = USE_TAYLOR
-    parameters['LUT_DW'] = LUT_DW
-    parameters['SIN_COS'] = SIN_COS
-    parameters['NEGATIVE_SINE'] = NEGATIVE_SINE
-    parameters['NEGATIVE_COSINE'] = NEGATIVE_COSINE
-    parameters['USE_LUT_FILE'] = USE_LUT_FILE
-
-    extra_env = {f'PARAM_{k}': str(v) for k, v in parameters.items()}
-    sim_build="sim_build/dds_" + "_".join(("{}={}".format(*i) for i in parameters.items()))
-    Path(sim_build).mkdir(parents=True, exist_ok=True)
-
-    if USE_LUT_FILE:
-        file_path = os.path.abspath(os.path.join(tests_dir, '../tools/generate_sine_lut.py'))
-        spec = importlib.util.spec_from_file_location("generate_sine_lut", file_path)
-        generate_sine_lut = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(generate_sine_lut)
-        lut_width = PHASE_DW - 2
-        if USE_TAYLOR:
-            lut_width = LUT_DW
-        lut_filename = os.path.abspath(os.path.join(sim_build, 'sine_lut_'+str(lut_width)+'_'+str(OUT_DW)))
-        print(lut_filename)
-        generate_sine_lut.main(['--PHASE_DW',str(lut_width),'--OUT_DW',str(OUT_DW),'--filename',lut_filename])
-
-    cocotb_test.simulator.run(
-        python_search=[tests_dir],
-        verilog_sources=verilog_sources,
-        includes=includes,
-        toplevel=toplevel,
-        module=module,
-        parameters=parameters,
-        sim_build=sim_build,
-        extra_env=extra_env,
-        testcase="simple_test",
-        waves=True,
-        force_compile=True
-    )
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 3])
+def test_dds_dump_capture(SAMPLES_PER_CLOCK):
+    # DUMP_CAPTURE with a small DUMP_CHUNK, so that the captured output is appended in many chunks
+    parameters = dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, LUT_DW=6, SIN_COS=1, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK)
+    capture_dir = os.path.abspath(os.path.join(dds_work_dir("dds_dump_capture", parameters), 'capture'))
+    shutil.rmtree(capture_dir, ignore_errors=True)
+    run_dds("dds_dump_capture", parameters, "simple_test", extra_env=dict(DUMP_CAPTURE=capture_dir, DUMP_CHUNK='37'))
+
+    for name in ('out', 'out_cos'):
+        output = np.load(os.path.join(capture_dir, name + '.npy'), mmap_mode='r')
+        expected = np.load(os.path.join(capture_dir, name.replace('out', 'out_model') + '.npy'), mmap_mode='r')
+        assert len(output) == len(expected) > 37 * SAMPLES_PER_CLOCK
+        assert np.array_equal(output, expected)
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SUNDERLAND_A, SUNDERLAND_C", [
+    (16, 16, 0, 6, 8, 3),
+    (16, 12, 0, 6, 3, 6),
+    (20, 16, 1, 11, 4, 3),
+])
+@pytest.mark.parametrize("SIN_COS", [1, 0])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+@pytest.mark.parametrize("USE_LUT_FILE", [1, 0])
+def test_dds_compressed(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SUNDERLAND_A, SUNDERLAND_C, SIN_COS, SAMPLES_PER_CLOCK, USE_LUT_FILE):
+    # coarse + fine lut (LUT_COMPRESSION = 1), the model reads the same luts, so the output is bit exact
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=0, NEGATIVE_COSINE=0, USE_LUT_FILE=USE_LUT_FILE, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK,
+                      LUT_COMPRESSION=1, SUNDERLAND_A=SUNDERLAND_A, SUNDERLAND_C=SUNDERLAND_C)
+    run_dds("dds_compressed", parameters, "simple_test")
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW", [(16, 16, 0, 6), (20, 16, 1, 9)])
+@pytest.mark.parametrize("SIN_COS", [1, 0])
+@pytest.mark.parametrize("CHANNELS", [3, 8])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_dds_channels(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS, CHANNELS, SAMPLES_PER_CLOCK):
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=0, NEGATIVE_COSINE=0, USE_LUT_FILE=0, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK, CHANNELS=CHANNELS)
+    run_dds("dds_channels", parameters, "channels_test")
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, CORDIC_ITERATIONS", [(16, 16, 18), (20, 20, 22), (24, 24, 26)])
+@pytest.mark.parametrize("SIN_COS", [1, 0])
+@pytest.mark.parametrize("NEGATIVE_SINE, NEGATIVE_COSINE", [(0, 1), (1, 0)])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_dds_cordic(PHASE_DW, OUT_DW, CORDIC_ITERATIONS, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE, SAMPLES_PER_CLOCK):
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=0, SIN_COS=SIN_COS, NEGATIVE_SINE=NEGATIVE_SINE,
+                      NEGATIVE_COSINE=NEGATIVE_COSINE, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK, USE_CORDIC=1,
+                      CORDIC_ITERATIONS=CORDIC_ITERATIONS)
+    run_dds("dds_cordic", parameters, "simple_test")
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, ACCU_DW", [(16, 16, 0, 6, 48), (20, 16, 1, 9, 32), (24, 16, 1, 11, 64)])
+@pytest.mark.parametrize("CHANNELS", [1, 3])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_dds_accumulator(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, ACCU_DW, CHANNELS, SAMPLES_PER_CLOCK):
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=1,
+                      NEGATIVE_SINE=0, NEGATIVE_COSINE=0, USE_LUT_FILE=0, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK,
+                      CHANNELS=CHANNELS, USE_ACCUMULATOR=1, ACCU_DW=ACCU_DW)
+    run_dds("dds_accumulator", parameters, "accumulator_test")
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, USE_CORDIC, MIXER_DW", [
+    (16, 16, 0, 6, 0, 16), (20, 16, 1, 9, 0, 12), (20, 18, 0, 6, 1, 24)])
+@pytest.mark.parametrize("USE_MIXER", [1, 2])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_dds_mixer(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, USE_CORDIC, MIXER_DW, USE_MIXER, NEGATIVE_SINE, SAMPLES_PER_CLOCK):
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=1,
+                      NEGATIVE_SINE=NEGATIVE_SINE, NEGATIVE_COSINE=0, USE_LUT_FILE=0, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK,
+                      USE_CORDIC=USE_CORDIC, CORDIC_ITERATIONS=OUT_DW + 2, USE_MIXER=USE_MIXER, MIXER_DW=MIXER_DW)
+    run_dds("dds_mixer", parameters, "mixer_test")
+
+# PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW of the exhaustive phase sweep
+EXHAUSTIVE_CONFIGS = [
+    (16, 16, 0, 6),
+    (24, 16, 1, 11),
+]
+
+def exhaustive_shards():
+    if not exhaustive.ENABLED:
+        return []
+    return [(*config, shard) for config in EXHAUSTIVE_CONFIGS for shard in range(exhaustive.num_shards(config[0]))]
+
+@pytest.mark.skipif(not exhaustive.ENABLED, reason="exhaustive phase sweep is enabled with DDS_EXHAUSTIVE=1")
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SHARD", exhaustive_shards())
+@pytest.mark.parametrize("SIN_COS", [1, 0])
+@pytest.mark.parametrize("NEGATIVE_SINE", [1, 0])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [1, 0])
+def test_dds_exhaustive(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SHARD, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE):
+    # Every shard is a separate simulation, so the shards of a sweep are distributed over the pytest workers.
+    # The statistics of all shards are merged by exhaustive.report() at the end of the session.
+    parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=USE_TAYLOR, LUT_DW=LUT_DW, SIN_COS=SIN_COS,
+                      NEGATIVE_SINE=NEGATIVE_SINE, NEGATIVE_COSINE=NEGATIVE_COSINE, USE_LUT_FILE=0)
+    start, stop = exhaustive.shard_range(PHASE_DW, SHARD)
+    extra_env = dict(SHARD_START=str(start), SHARD_STOP=str(stop),
+                     SHARD_RESULT=os.path.abspath(os.path.join(exhaustive.config_dir(parameters), f"shard_{SHARD:05d}.json")))
+    run_dds("dds_exhaustive", parameters, "exhaustive_test", extra_env=extra_env,
+            work_dir=dds_work_dir("dds_exhaustive", parameters) + f"_SHARD={SHARD}")
 
 if __name__ == '__main__':
     os.environ['PLOTS'] = '0'
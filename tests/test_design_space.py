@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
+
+spec = importlib.util.spec_from_file_location("design_space", os.path.join(tools_dir, 'design_space.py'))
+design_space = importlib.util.module_from_spec(spec)
+# the process pool pickles the worker function by module name
+sys.modules["design_space"] = design_space
+spec.loader.exec_module(design_space)
+
+
+def test_grid():
+    points = design_space.grid([10, 12], [16], [0, 1], [6, 8, 9, 10])
+    assert dict(PHASE_DW=10, OUT_DW=16, USE_TAYLOR=0, LUT_DW=8) in points
+    # taylor correction needs at least one phase error bit
+    assert all(p['LUT_DW'] <= p['PHASE_DW'] - 3 for p in points if p['USE_TAYLOR'])
+    assert sorted(p['LUT_DW'] for p in points if p['USE_TAYLOR']) == [6, 6, 8, 9]
+
+
+def test_parse_list():
+    assert design_space.parse_list("16,20,24") == [16, 20, 24]
+    assert design_space.parse_list("6-9,12") == [6, 7, 8, 9, 12]
+
+
+def test_resources():
+    r = design_space.resources(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, LUT_DW=9)
+    assert r['lut_bits'] == 2**14 * 16 and r['multipliers'] == 0 and r['dsp48'] == 0
+    r = design_space.resources(PHASE_DW=24, OUT_DW=16, USE_TAYLOR=1, LUT_DW=11)
+    assert r['lut_bits'] == 2**11 * 16 and r['multipliers'] == 3
+    assert r['multiplier_widths'][1] == (16, 11 + 18 - 14)
+
+
+def test_evaluate_exhaustive():
+    # without taylor correction the lut is the rounded sine, so the error is at most half an LSB
+    r = design_space.evaluate(dict(PHASE_DW=12, OUT_DW=12, USE_TAYLOR=0, LUT_DW=10))
+    assert r['exhaustive'] and r['phases'] == 2**12
+    assert r['max_error'] <= 0.5 + 1e-9
+    assert r['sfdr_db'] == pytest.approx(71.3, abs=0.5)
+
+
+def test_evaluate_sampled():
+    r = design_space.evaluate(dict(PHASE_DW=24, OUT_DW=16, USE_TAYLOR=1, LUT_DW=11), max_phases=2**16)
+    assert not r['exhaustive'] and r['phases'] == 2**16
+    assert r['max_error'] < 2
+    assert r['sfdr_db'] > 96
+
+
+def test_sample_phases():
+    phases = design_space.sample_phases(20, 2**10)
+    assert len(phases) == 2**10 and len(np.unique(phases)) == 2**10
+    assert phases.min() >= 0 and phases.max() < 2**20
+
+
+def test_cheapest():
+    points = design_space.grid([12, 16], [16], [0, 1], [8, 9])
+    results = design_space.explore(points, jobs=2, max_phases=2**14, fft_size=2**12)
+    assert [(r['PHASE_DW'], r['USE_TAYLOR'], r['LUT_DW']) for r in results] == \
+           [(p['PHASE_DW'], p['USE_TAYLOR'], p['LUT_DW']) for p in points]
+    best = design_space.cheapest(results, sfdr=100)
+    assert best['sfdr_db'] >= 100
+    assert all(design_space.cost(r) >= design_space.cost(best) for r in results if r['sfdr_db'] >= 100)
+    # only the configurations without taylor correction are within half an LSB, the 12 bit phase has the smaller lut
+    best = design_space.cheapest(results, max_error=0.5)
+    assert (best['PHASE_DW'], best['USE_TAYLOR']) == (12, 0)
+    assert design_space.cheapest(results, sfdr=200) is None
+
+
+def test_main(tmp_path):
+    output = str(tmp_path / "results.json")
+    best = design_space.main(["--PHASE_DW", "12", "--LUT_DW", "8-9", "--max_error", "0.5", "--jobs", "1",
+                              "--fft_size", "4096", "--output", output])
+    assert (best['USE_TAYLOR'], best['LUT_DW']) == (0, 10)
+    with open(output) as f:
+        data = json.load(f)
+    assert len(data['results']) == 3 and data['cheapest'] == best
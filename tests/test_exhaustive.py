@@ -0,0 +1,64 @@
+import os
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+spec = importlib.util.spec_from_file_location("exhaustive", os.path.join(tests_dir, 'exhaustive.py'))
+exhaustive = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(exhaustive)
+
+
+def test_shards_cover_phase_range():
+    for PHASE_DW, shard_dw in [(8, 16), (16, 16), (20, 16), (12, 3)]:
+        ranges = [exhaustive.shard_range(PHASE_DW, shard, shard_dw) for shard in range(exhaustive.num_shards(PHASE_DW, shard_dw))]
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == 2**PHASE_DW
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_merge(tmp_path):
+    checker = exhaustive.checker
+    parameters = dict(PHASE_DW=4, OUT_DW=8)
+    directory = exhaustive.config_dir(parameters, 2, str(tmp_path))
+    expected = np.arange(16)
+    output = expected.copy()
+    output[[6, 13]] += [2, -1]
+    for shard in [3, 0, 2]:
+        start, stop = exhaustive.shard_range(4, shard, 2)
+        stats = checker.error_stats(output[start:stop], expected[start:stop], offset=start)
+        exhaustive.write_shard(os.path.join(directory, f"shard_{shard:05d}.json"), parameters, start, stop, 1.0, stats, stats)
+
+    merged = exhaustive.merge(directory)
+    assert merged['covered'] == 12
+    assert not merged['complete']
+    assert merged['sin']['mismatches'] == 1
+    assert merged['sin']['first_mismatch'] == 13
+
+    start, stop = exhaustive.shard_range(4, 1, 2)
+    stats = checker.error_stats(output[start:stop], expected[start:stop], offset=start)
+    exhaustive.write_shard(os.path.join(directory, "shard_00001.json"), parameters, start, stop, 1.0, stats, stats)
+    merged = exhaustive.report(str(tmp_path))[0]
+    assert merged['complete']
+    assert merged['seconds'] == 4.0
+    assert merged['sin'] == checker.error_stats(output, expected)
+    assert os.path.isfile(tmp_path / 'report.json')
+
+
+def test_clear(tmp_path):
+    # shards of an earlier session are not merged after clear()
+    checker = exhaustive.checker
+    stats = checker.error_stats(np.zeros(4), np.zeros(4))
+    for PHASE_DW in [2, 3]:
+        parameters = dict(PHASE_DW=PHASE_DW, OUT_DW=8)
+        exhaustive.write_shard(os.path.join(exhaustive.config_dir(parameters, 2, str(tmp_path)), "shard_00000.json"),
+                               parameters, 0, 4, 1.0, stats, stats)
+    assert len(exhaustive.report(str(tmp_path))) == 2
+
+    exhaustive.clear(str(tmp_path))
+    parameters = dict(PHASE_DW=2, OUT_DW=8)
+    exhaustive.write_shard(os.path.join(exhaustive.config_dir(parameters, 2, str(tmp_path)), "shard_00000.json"),
+                           parameters, 0, 4, 1.0, stats, stats)
+    merged = exhaustive.report(str(tmp_path))
+    assert [m['parameters'] for m in merged] == [parameters]
+    assert merged[0]['complete']
@@ -0,0 +1,126 @@
+import os
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
+lut_dir = os.path.abspath(os.path.join(tests_dir, '..', 'lut_data'))
+
+spec = importlib.util.spec_from_file_location("generate_sine_lut", os.path.join(tools_dir, 'generate_sine_lut.py'))
+generate_sine_lut = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_sine_lut)
+
+
+def reference_files(PHASE_DW, OUT_DW):
+    # file format of the original generator which wrote every entry separately
+    MAX_OUT_VAL = 2 ** (OUT_DW - 1) - 1
+    hex_file, packed, mem_file = "", 0, ""
+    for p in range(2**PHASE_DW):
+        lut_val = int(np.round(np.sin(2 * np.pi * p / (2**PHASE_DW) / 4) * MAX_OUT_VAL))
+        if p % 8 == 0:
+            if p != 0:
+                hex_file += "\n"
+            hex_file += F"@{p:08x} "
+        hex_file += "{0:0{1}x} ".format(lut_val, int(np.ceil(OUT_DW / 4)))
+        mem_file += "{0:0{1}x}\n".format(lut_val, int(np.ceil(OUT_DW / 4)))
+        packed |= lut_val << (p * OUT_DW)
+    width = 2**PHASE_DW * OUT_DW
+    sv_file = "localparam [{0}-1:0] SINE_LUT = {0}'h{1:0{2}x};\n".format(width, packed, -(-width // 4))
+    return hex_file, sv_file, mem_file
+
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW", [(0, 8), (2, 3), (6, 3), (9, 16), (12, 18), (11, 32)])
+def test_file_format(tmp_path, PHASE_DW, OUT_DW):
+    filename = str(tmp_path / 'lut')
+    generate_sine_lut.create_lut_file(filename, PHASE_DW, OUT_DW, formats=generate_sine_lut.FORMATS)
+    hex_file, sv_file, mem_file = reference_files(PHASE_DW, OUT_DW)
+    assert open(filename + '.hex').read() == hex_file
+    assert open(filename + '.vh').read() == sv_file
+    assert open(filename + '.mem').read() == mem_file
+    coe_file = open(filename + '.coe').read()
+    assert coe_file == ("memory_initialization_radix=16;\nmemory_initialization_vector=\n"
+                        + mem_file.replace("\n", ",\n")[:-2] + ";\n")
+
+
+@pytest.mark.parametrize("OUT_DW, dtype", [(3, '<i1'), (8, '<i1'), (9, '<i2'), (16, '<i2'), (18, '<i4'), (33, '<i8')])
+def test_binary_formats(tmp_path, OUT_DW, dtype):
+    filename = str(tmp_path / 'lut')
+    generate_sine_lut.create_lut_file(filename, 10, OUT_DW, formats=['bin', 'npy'])
+    assert sorted(os.listdir(tmp_path)) == ['lut.bin', 'lut.npy']
+    lut = generate_sine_lut.lut_values(10, OUT_DW)
+    data = np.fromfile(filename + '.bin', dtype=dtype)
+    assert np.array_equal(data, lut)
+    data = np.load(filename + '.npy', mmap_mode='r')
+    assert isinstance(data, np.memmap)
+    assert data.dtype == np.dtype(dtype)
+    assert np.array_equal(data, lut)
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        generate_sine_lut.create_lut_file(str(tmp_path / 'lut'), 4, 8, formats=['hex', 'txt'])
+    assert os.listdir(tmp_path) == []
+
+
+def test_lut_data():
+    lut = generate_sine_lut.lut_values(9, 16)
+    with open(os.path.join(lut_dir, 'sine_lut_9_16.hex')) as f:
+        values = [int(v, 16) for v in f.read().split() if not v.startswith('@')]
+    assert list(lut) == values
+
+
+def test_rounding():
+    x = np.sin(2 * np.pi * np.arange(2**10) / 2**10 / 4) * (2**15 - 1)
+    assert np.array_equal(generate_sine_lut.lut_values(10, 16, 'even'), np.round(x))
+    assert np.array_equal(generate_sine_lut.lut_values(10, 16, 'away'), np.floor(x + 0.5))
+    with pytest.raises(ValueError):
+        generate_sine_lut.lut_values(10, 16, 'up')
+
+
+def test_cache(tmp_path):
+    filename = generate_sine_lut.cached_lut_file(10, 16, cache_dir=str(tmp_path))
+    assert os.path.basename(filename) == 'sine_lut_10_16_even'
+    mtime = os.path.getmtime(filename + '.hex')
+    assert generate_sine_lut.cached_lut_file(10, 16, cache_dir=str(tmp_path)) == filename
+    assert os.path.getmtime(filename + '.hex') == mtime
+    assert generate_sine_lut.cached_lut_file(10, 16, 'away', cache_dir=str(tmp_path)) != filename
+    # no temporary files are left behind
+    assert sorted(os.listdir(tmp_path)) == ['sine_lut_10_16_away.hex', 'sine_lut_10_16_away.vh',
+                                            'sine_lut_10_16_even.hex', 'sine_lut_10_16_even.vh']
+    # only missing formats are added
+    assert generate_sine_lut.cached_lut_file(10, 16, cache_dir=str(tmp_path), formats=['hex', 'npy']) == filename
+    assert os.path.getmtime(filename + '.hex') == mtime
+    assert os.path.isfile(filename + '.npy')
+
+
+def read_hex(filename, width):
+    with open(filename) as f:
+        values = np.array([int(v, 16) for v in f.read().split() if not v.startswith('@')])
+    return np.where(values >= 2**(width - 1), values - 2**width, values)
+
+
+def test_sunderland_files(tmp_path):
+    filename = str(tmp_path / 'lut')
+    generate_sine_lut.create_sunderland_files(filename, 12, 16, 5, 3, formats=['hex', 'vh', 'npy'])
+    assert sorted(os.listdir(tmp_path)) == ['lut_coarse.hex', 'lut_coarse.npy', 'lut_coarse.vh',
+                                            'lut_fine.hex', 'lut_fine.npy', 'lut_fine.vh']
+    coarse, fine = generate_sine_lut.dds_model.sunderland_luts(12, 16, 5, 3)
+    FINE_DW = generate_sine_lut.dds_model.sunderland_fine_width(12, 16, 3)
+    assert np.array_equal(read_hex(filename + '_coarse.hex', generate_sine_lut.dds_model.sunderland_coarse_width(16)), coarse)
+    # negative fine entries are written with FINE_DW bits, so that $readmemh does not truncate
+    assert (fine < 0).any()
+    assert np.array_equal(read_hex(filename + '_fine.hex', FINE_DW), fine)
+    assert np.array_equal(np.load(filename + '_fine.npy'), fine)
+    assert open(filename + '_fine.vh').read().startswith(f"localparam [{len(fine) * FINE_DW}-1:0] SINE_LUT_FINE = ")
+    with pytest.raises(ValueError):
+        generate_sine_lut.create_sunderland_files(filename, 8, 16, 5, 4)
+
+
+def test_sunderland_cache(tmp_path):
+    filename = generate_sine_lut.cached_sunderland_files(11, 16, 4, 3, cache_dir=str(tmp_path), formats=['hex'])
+    assert os.path.basename(filename) == f'sine_lut_11_16_sunderland_4_3_{generate_sine_lut.dds_model.SUNDERLAND_GUARD}'
+    mtime = os.path.getmtime(filename + '_fine.hex')
+    assert generate_sine_lut.cached_sunderland_files(11, 16, 4, 3, cache_dir=str(tmp_path), formats=['hex']) == filename
+    assert os.path.getmtime(filename + '_fine.hex') == mtime
@@ -0,0 +1,354 @@
+import os
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+model_dir = os.path.abspath(os.path.join(tests_dir, '..', 'model'))
+
+spec = importlib.util.spec_from_file_location("dds_model", os.path.join(model_dir, 'dds_model.py'))
+dds_model = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dds_model)
+
+spec = importlib.util.spec_from_file_location("nco", os.path.join(model_dir, 'nco.py'))
+nco = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nco)
+
+spec = importlib.util.spec_from_file_location("spectral_metrics", os.path.join(tests_dir, '..', 'tools', 'spectral_metrics.py'))
+spectral_metrics = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(spectral_metrics)
+
+
+def run_ticks(model, phases, valid):
+    sin, cos, out_valid = [], [], []
+    for phase, v in zip(phases, valid):
+        if v:
+            model.set_data(int(phase))
+        model.tick()
+        sin.append(int(model.get_data()))
+        cos.append(int(model.get_data_cos()))
+        out_valid.append(bool(model.data_valid()))
+    return np.array(sin), np.array(cos), np.array(out_valid)
+
+
+@pytest.mark.parametrize("USE_TAYLOR", [0, 1])
+@pytest.mark.parametrize("SIN_COS", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
+def test_process_matches_tick(USE_TAYLOR, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE):
+    PHASE_DW = 12
+    rng = np.random.default_rng(30)
+    phases = rng.integers(0, 2**PHASE_DW, 300)
+    valid = rng.random(300) > 0.2
+    valid[:5] = False
+    params = (PHASE_DW, 16, USE_TAYLOR, 8, SIN_COS, NEGATIVE_SINE, NEGATIVE_COSINE)
+
+    expected = run_ticks(dds_model.Model(*params), phases, valid)
+
+    model = dds_model.Model(*params)
+    # split into blocks shorter and longer than the pipeline to check that state is carried over
+    blocks = [model.process(phases[a:b], valid[a:b]) for a, b in [(0, 3), (3, 40), (40, 41), (41, 300)]]
+    for k in range(3):
+        assert np.array_equal(np.concatenate([b[k] for b in blocks]), expected[k])
+
+
+def test_process_mixed_with_tick():
+    params = (10, 12, 0, 8, 1, 0, 0)
+    phases = np.arange(0, 2**10, 7)
+    valid = np.ones(len(phases), dtype=bool)
+    expected = run_ticks(dds_model.Model(*params), phases, valid)
+
+    model = dds_model.Model(*params)
+    head = run_ticks(model, phases[:20], valid[:20])
+    tail = model.process(phases[20:])
+    for k in range(3):
+        assert np.array_equal(np.concatenate((head[k], tail[k])), expected[k])
+
+
+
+@pytest.mark.parametrize("USE_TAYLOR", [0, 1])
+def test_stream_matches_process(USE_TAYLOR):
+    params = (16, 16, USE_TAYLOR, 10, 1, 0, 1)
+    rng = np.random.default_rng(30)
+    phases = rng.integers(0, 2**16, 5000)
+    valid = rng.random(5000) > 0.1
+    expected = dds_model.Model(*params, bit_exact=True).process(phases, valid)
+
+    model = dds_model.Model(*params, bit_exact=True)
+    bounds = np.concatenate(([0], np.sort(rng.integers(0, 5000, 40)), [5000]))
+    chunks = ((phases[a:b], valid[a:b]) for a, b in zip(bounds[:-1], bounds[1:]))
+    result = list(model.stream(chunks))
+    for k in range(3):
+        assert np.array_equal(np.concatenate([r[k] for r in result]), expected[k])
+    # state does not grow with the stream
+    assert len(model.data_out_buf) == model.extra_delay
+
+
+def test_stream_reset():
+    params = (12, 12, 1, 8, 1, 0, 0)
+    phases = np.arange(0, 2**12, 5)
+    valid = np.ones(len(phases), dtype=bool)
+    tick_model = dds_model.Model(*params)
+    head = run_ticks(tick_model, phases[:100], valid[:100])
+    tick_model.reset()
+    tail = run_ticks(tick_model, phases[100:], valid[100:])
+
+    model = dds_model.Model(*params)
+    stream = model.stream(phases[a:b] for a, b in [(0, 50), (50, 100), (100, 400), (400, len(phases))])
+    result = [next(stream), next(stream)]
+    model.reset()
+    result += list(stream)
+    for k in range(3):
+        assert np.array_equal(np.concatenate([r[k] for r in result]), np.concatenate((head[k], tail[k])))
+
+
+def test_tone():
+    model = dds_model.Model(16, 16, 1, 10, 1, 0, 0, bit_exact=True)
+    phases, sin, cos = model.tone(100, 1000)
+    assert np.array_equal(phases, nco.PhaseAccumulator(16).ramp(100, 1000))
+    # same as the delayed output of process()
+    out_sin, out_cos, valid = model.process(np.concatenate((phases, np.zeros(model.extra_delay, dtype=np.int64))))
+    assert np.array_equal(out_sin[valid][:1000], sin)
+    assert np.array_equal(out_cos[valid][:1000], cos)
+    # an accumulator wider than PHASE_DW continues from its state
+    accumulator = nco.PhaseAccumulator(32, 16)
+    first = model.phases(2**20 + 5, 100, accumulator=accumulator)
+    second = model.phases(2**20 + 5, 100, accumulator=accumulator)
+    assert np.array_equal(np.concatenate((first, second)), nco.PhaseAccumulator(32, 16).ramp(2**20 + 5, 200))
+    with pytest.raises(ValueError):
+        model.phases(1, 10, accumulator=nco.PhaseAccumulator(32, 20))
+
+
+@pytest.mark.parametrize("USE_TAYLOR", [0, 1])
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [2, 4])
+def test_lanes_match_single_lane(USE_TAYLOR, SAMPLES_PER_CLOCK):
+    # a lane build with continuous input outputs the same samples as the single lane core
+    params = (16, 16, USE_TAYLOR, 10, 1, 0, 0)
+    phases = np.arange(0, 2**16, 37)[:SAMPLES_PER_CLOCK * 500]
+    single = dds_model.Model(*params, bit_exact=True).process(phases)
+    sin, cos, valid = dds_model.Model(*params, bit_exact=True, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK).process(phases)
+    assert len(sin) == len(phases)
+    # the pipeline delay is extra_delay beats, i.e. extra_delay * SAMPLES_PER_CLOCK samples
+    delay = dds_model.Model(*params).extra_delay
+    assert not valid[:(delay - 1) * SAMPLES_PER_CLOCK].any() and valid[(delay - 1) * SAMPLES_PER_CLOCK:].all()
+    assert np.array_equal(sin[valid], single[0][single[2]][:np.count_nonzero(valid)])
+    assert np.array_equal(cos[valid], single[1][single[2]][:np.count_nonzero(valid)])
+
+
+def test_lanes_process_matches_tick():
+    lanes = 3
+    params = (12, 16, 1, 8, 1, 0, 0)
+    rng = np.random.default_rng(30)
+    phases = rng.integers(0, 2**12, (100, lanes))
+    valid = rng.random(100) > 0.2
+    model = dds_model.Model(*params, bit_exact=True, SAMPLES_PER_CLOCK=lanes)
+    sin, cos, out_valid = [], [], []
+    for beat, v in zip(phases, valid):
+        if v:
+            model.set_data(beat)
+        model.tick()
+        sin.append(model.get_data())
+        cos.append(model.get_data_cos())
+        out_valid.append(model.data_valid())
+    block = dds_model.Model(*params, bit_exact=True, SAMPLES_PER_CLOCK=lanes).process(phases.ravel(), valid)
+    assert np.array_equal(block[0], np.concatenate(sin))
+    assert np.array_equal(block[1], np.concatenate(cos))
+    assert np.array_equal(block[2], np.repeat(out_valid, lanes))
+
+@pytest.mark.parametrize("PHASE_DW", [8, 16])
+@pytest.mark.parametrize("OUT_DW", [16, 3])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
+def test_bit_exact_lut_only(PHASE_DW, OUT_DW, NEGATIVE_SINE, NEGATIVE_COSINE):
+    # without taylor correction the quarter wave lut gives the ideal rounded sin/cos
+    phases = np.arange(2**PHASE_DW)
+    params = (PHASE_DW, OUT_DW, 0, 6, 1, NEGATIVE_SINE, NEGATIVE_COSINE)
+    ideal = dds_model.Model(*params).process(phases)
+    exact = dds_model.Model(*params, bit_exact=True).process(phases)
+    for k in range(3):
+        assert np.array_equal(exact[k], ideal[k])
+
+
+@pytest.mark.parametrize("PHASE_DW", [20, 24])
+@pytest.mark.parametrize("LUT_DW", [9, 11])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
+def test_bit_exact_taylor(PHASE_DW, LUT_DW, NEGATIVE_SINE, NEGATIVE_COSINE):
+    OUT_DW = 16
+    phases = np.arange(0, 2**PHASE_DW, 97)
+    sin, cos = dds_model.dds_bit_exact(phases, PHASE_DW, OUT_DW, 1, LUT_DW, 1, NEGATIVE_SINE, NEGATIVE_COSINE)
+    assert sin.dtype == np.int64 and cos.dtype == np.int64
+    # taylor correction truncates, so the error is small but not zero
+    ideal_sin, ideal_cos = dds_model.Model(PHASE_DW, OUT_DW, 1, LUT_DW, 1, NEGATIVE_SINE, NEGATIVE_COSINE)._compute(phases)
+    assert np.abs(sin - ideal_sin).max() <= 3
+    assert np.abs(cos - ideal_cos).max() <= 3
+
+
+def test_bit_exact_lut_index():
+    # full scale special case: mirrored index 0 in 2nd quadrant is not in the lut
+    sin, cos = dds_model.dds_bit_exact([0, 2**6, 2**7, 3 * 2**6], 8, 8, 0, 6, 1, 0, 0)
+    assert list(sin) == [0, 127, 0, -127]
+    assert list(cos) == [127, 0, -127, 0]
+
+
+# the coarse and fine lut approximate the sine, so an entry can only round to the other side of a rounding boundary
+# than the quarter wave lut if its ideal value is closer than this to the boundary
+SUNDERLAND_MARGIN = 1 / 16
+
+@pytest.mark.parametrize("LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, min_reduction", [
+    (14, 16, 8, 3, 3.5),
+    (16, 16, 7, 4, 9),
+    (14, 12, 6, 4, 7),
+    (16, 18, 8, 3, 5),
+])
+def test_sunderland_lut(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, min_reduction):
+    # the quarter wave bound of 0.5 LSB, apart from entries within SUNDERLAND_MARGIN of a rounding boundary
+    lut = dds_model.sunderland_lut(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C)
+    ideal = np.sin(2 * np.pi * np.arange(2**LUT_WIDTH) / 2**LUT_WIDTH / 4) * (2**(OUT_DW - 1) - 1)
+    far = np.abs(ideal - np.floor(ideal) - 0.5) > SUNDERLAND_MARGIN
+    assert np.abs(lut - ideal)[far].max() <= 0.5
+    assert np.array_equal(lut[far], dds_model.sine_lut(LUT_WIDTH, OUT_DW)[far])
+    assert np.abs(lut - ideal).max() <= 0.5 + SUNDERLAND_MARGIN
+    assert lut.max() <= 2**(OUT_DW - 1) - 1
+    # fine lut entries fit into the signed width of dds_lut
+    coarse, fine = dds_model.sunderland_luts(LUT_WIDTH, OUT_DW, SUNDERLAND_A, SUNDERLAND_C)
+    COARSE_DW = dds_model.sunderland_coarse_width(OUT_DW)
+    FINE_DW = dds_model.sunderland_fine_width(LUT_WIDTH, OUT_DW, SUNDERLAND_C)
+    assert np.abs(coarse).max() < 2**(COARSE_DW - 1)
+    assert np.abs(fine).max() < 2**(FINE_DW - 1)
+    bits = len(coarse) * COARSE_DW + len(fine) * FINE_DW
+    assert 2**LUT_WIDTH * OUT_DW / bits >= min_reduction
+
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW", [(16, 16), (18, 16), (16, 12)])
+def test_sunderland_precision(PHASE_DW, OUT_DW):
+    # the default split (SUNDERLAND_A = 8, SUNDERLAND_C = 3) keeps the precision of the quarter wave lut,
+    # exhaustive max error of sin and cos and SFDR of a coherent tone
+    def precision(lut):
+        phases = np.arange(2**PHASE_DW)
+        sin, cos = dds_model.dds_bit_exact(phases, PHASE_DW, OUT_DW, 0, 10, 1, 0, 0, lut)
+        angle = 2 * np.pi * phases / 2**PHASE_DW
+        max_val = 2**(OUT_DW - 1) - 1
+        error = max(np.abs(sin - np.sin(angle) * max_val).max(), np.abs(cos - np.cos(angle) * max_val).max())
+        fcw = spectral_metrics.coherent_word(0.1234567, 1.0, 2**14, 32)
+        sin, _ = dds_model.dds_bit_exact(nco.PhaseAccumulator(32, PHASE_DW).ramp(fcw, 2**14), PHASE_DW, OUT_DW, 0, 10, 1, 0, 0, lut)
+        return error, spectral_metrics.metrics(spectral_metrics.power_spectrum(sin))['sfdr_db']
+
+    quarter_error, quarter_sfdr = precision(dds_model.sine_lut(PHASE_DW - 2, OUT_DW))
+    error, sfdr = precision(dds_model.sunderland_lut(PHASE_DW - 2, OUT_DW, 8, 3))
+    assert quarter_error <= 0.5 + 1e-9
+    assert error <= 0.5 + SUNDERLAND_MARGIN
+    assert sfdr >= quarter_sfdr - 1
+
+
+def test_sunderland_model():
+    params = (16, 16, 1, 12, 1, 0, 0)
+    phases = np.arange(0, 2**16, 3)
+    model = dds_model.Model(*params, bit_exact=True, LUT_COMPRESSION=1, SUNDERLAND_A=5, SUNDERLAND_C=3)
+    assert np.array_equal(model.lut, dds_model.sunderland_lut(12, 16, 5, 3))
+    sin, cos, valid = model.process(phases)
+    ideal_sin, ideal_cos, _ = dds_model.Model(*params).process(phases)
+    assert np.abs(sin - ideal_sin)[valid].max() <= 4
+    assert np.abs(cos - ideal_cos)[valid].max() <= 4
+
+
+def test_channels_process_matches_tick():
+    params = (12, 16, 1, 8, 1, 0, 0)
+    rng = np.random.default_rng(30)
+    phases = rng.integers(0, 2**12, 200)
+    channels = rng.integers(0, 5, 200)
+    valid = rng.random(200) > 0.2
+    model = dds_model.Model(*params, bit_exact=True, CHANNELS=5)
+    expected = [], [], [], []
+    for phase, channel, v in zip(phases, channels, valid):
+        if v:
+            model.set_data(int(phase), int(channel))
+        model.tick()
+        for k, value in enumerate((model.get_data(), model.get_data_cos(), model.data_valid(), model.get_channel())):
+            expected[k].append(value)
+    model = dds_model.Model(*params, bit_exact=True, CHANNELS=5)
+    blocks = [model.process(phases[a:b], valid[a:b], channels[a:b]) for a, b in [(0, 7), (7, 150), (150, 200)]]
+    for k in range(4):
+        assert np.array_equal(np.concatenate([b[k] for b in blocks]), expected[k])
+
+
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_channels_interleaved(SAMPLES_PER_CLOCK):
+    # the time multiplexed stream gives the same samples per channel as process_channels()
+    CHANNELS = 3
+    params = (16, 16, 1, 10, 1, 0, 0)
+    phases = np.stack([np.arange(0, 200) * (1000 * c + 77) % 2**16 for c in range(CHANNELS)])
+    model = dds_model.Model(*params, bit_exact=True, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK, CHANNELS=CHANNELS)
+    expected_sin, expected_cos = model.process_channels(phases)
+    assert expected_sin.shape == (CHANNELS, 200)
+    stream, channels = model.interleave(phases)
+    padding = np.zeros(model.extra_delay * SAMPLES_PER_CLOCK, dtype=np.int64)
+    sin, cos, valid, channel = model.process(np.concatenate((stream, padding)),
+                                             channels=np.concatenate((channels, np.zeros(model.extra_delay, dtype=np.int64))))
+    sin, cos, channel = sin[valid][:len(stream)], cos[valid][:len(stream)], channel[valid][:len(stream)]
+    assert np.array_equal(channel, np.repeat(channels, SAMPLES_PER_CLOCK))
+    for c in range(CHANNELS):
+        assert np.array_equal(sin[channel == c], expected_sin[c])
+        assert np.array_equal(cos[channel == c], expected_cos[c])
+
+
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, CORDIC_ITERATIONS, max_error", [
+    (16, 16, 18, 0.8),
+    (20, 20, 22, 0.8),
+    (32, 24, 26, 0.8),
+    (12, 12, 10, 5.0),
+])
+@pytest.mark.parametrize("NEGATIVE_SINE", [0, 1])
+@pytest.mark.parametrize("NEGATIVE_COSINE", [0, 1])
+def test_cordic(PHASE_DW, OUT_DW, CORDIC_ITERATIONS, max_error, NEGATIVE_SINE, NEGATIVE_COSINE):
+    phases = np.arange(0, 2**PHASE_DW, max(2**PHASE_DW // 2**16, 1) + 1)
+    sin, cos = dds_model.cordic_bit_exact(phases, PHASE_DW, OUT_DW, CORDIC_ITERATIONS, 1, NEGATIVE_SINE, NEGATIVE_COSINE)
+    angle = 2 * np.pi * phases / 2**PHASE_DW
+    max_val = 2**(OUT_DW - 1) - 1
+    assert np.abs(sin - (-1)**NEGATIVE_SINE * np.sin(angle) * max_val).max() <= max_error
+    assert np.abs(cos - (-1)**NEGATIVE_COSINE * np.cos(angle) * max_val).max() <= max_error
+    assert np.abs(sin).max() <= max_val and np.abs(cos).max() <= max_val
+
+
+def test_cordic_model():
+    params = (16, 16, 0, 6, 1, 0, 1)
+    phases = np.arange(0, 2**16, 7)
+    model = dds_model.Model(*params, bit_exact=True, USE_CORDIC=1, CORDIC_ITERATIONS=16)
+    assert not hasattr(model, 'lut')
+    sin, cos, valid = model.process(phases)
+    expected = dds_model.cordic_bit_exact(phases, 16, 16, 16, 1, 0, 1)
+    assert np.array_equal(sin[valid], expected[0][:np.count_nonzero(valid)])
+    assert np.array_equal(cos[valid], expected[1][:np.count_nonzero(valid)])
+    # without cos output the cos bus stays 0 like in dds.sv
+    assert not dds_model.cordic_bit_exact(phases, 16, 16, 16, 0, 0, 0)[1].any()
+
+
+@pytest.mark.parametrize("complex_input", [False, True])
+def test_mixer(complex_input):
+    # mixing a tone with the dds at the same frequency gives its complex amplitude
+    rng = np.random.default_rng(22)
+    params = (20, 16, 1, 10, 1, 0, 0)
+    model = dds_model.Model(*params, bit_exact=True)
+    # 37 periods in 4096 samples, so that the tone at twice the frequency averages out
+    phases = np.arange(4096) * 37 * 256 % 2**20
+    angle = 2 * np.pi * phases / 2**20
+    amplitude = 0.6 * np.exp(1j * 0.7)
+    signal = amplitude * np.exp(1j * angle) * (2**15 - 1)
+    data_i = np.round(signal.real).astype(np.int64)
+    data_q = np.round(signal.imag).astype(np.int64) if complex_input else None
+    i, q = model.mix(phases, data_i, data_q)
+    # real input: half of the amplitude at 0 Hz plus a tone at twice the frequency
+    expected = amplitude * (2**15 - 1) * (1 if complex_input else 0.5)
+    assert abs(np.mean(i) - expected.real) < 2 and abs(np.mean(q) - expected.imag) < 2
+    # bit exact against python integers
+    sin, cos = model.process_channels(phases[None, :])
+    data_q = np.zeros(4096, dtype=np.int64) if data_q is None else data_q
+    k = rng.integers(0, 4096, 50)
+    for n in k:
+        assert i[n] == (int(data_i[n]) * int(cos[0, n]) + int(data_q[n]) * int(sin[0, n])) >> 15
+        assert q[n] == (int(data_q[n]) * int(cos[0, n]) - int(data_i[n]) * int(sin[0, n])) >> 15
+    # the output fits into MIXER_DW + 1 bits for full scale inputs
+    full = np.full(4096, -2**15)
+    i, q = model.mix(phases, full, full)
+    assert np.all(np.abs(i) <= 2**16) and np.all(np.abs(q) <= 2**16)
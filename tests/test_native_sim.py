@@ -0,0 +1,106 @@
+import os
+import shutil
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+
+spec = importlib.util.spec_from_file_location("native_sim", os.path.join(tests_dir, 'native_sim.py'))
+native_sim = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(native_sim)
+
+spec = importlib.util.spec_from_file_location("dds_model", os.path.join(tests_dir, '..', 'model', 'dds_model.py'))
+dds_model = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dds_model)
+
+spec = importlib.util.spec_from_file_location("nco", os.path.join(tests_dir, '..', 'model', 'nco.py'))
+nco = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nco)
+
+spec = importlib.util.spec_from_file_location("checker", os.path.join(tests_dir, 'checker.py'))
+checker = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(checker)
+
+pytestmark = pytest.mark.skipif(shutil.which('verilator') is None, reason="verilator is not installed")
+
+def model(parameters):
+    p = dict(USE_TAYLOR=1, LUT_DW=10, SIN_COS=0, NEGATIVE_SINE=0, NEGATIVE_COSINE=0, **native_sim.DEFAULTS)
+    p.update(parameters)
+    return dds_model.Model(p['PHASE_DW'], p['OUT_DW'], p['USE_TAYLOR'], p['LUT_DW'], p['SIN_COS'], p['NEGATIVE_SINE'],
+                           p['NEGATIVE_COSINE'], bit_exact=True, SAMPLES_PER_CLOCK=p['SAMPLES_PER_CLOCK'],
+                           CHANNELS=p.get('CHANNELS', 1), USE_CORDIC=p.get('USE_CORDIC', 0),
+                           CORDIC_ITERATIONS=p.get('CORDIC_ITERATIONS', 18))
+
+
+@pytest.mark.parametrize("parameters", [
+    dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, SIN_COS=1, NEGATIVE_SINE=1),
+    dict(PHASE_DW=20, OUT_DW=16, USE_TAYLOR=1, LUT_DW=9, SIN_COS=1),
+    # 96 bit output buses
+    dict(PHASE_DW=24, OUT_DW=24, USE_CORDIC=1, CORDIC_ITERATIONS=26, SIN_COS=1, SAMPLES_PER_CLOCK=4),
+])
+def test_native_sweep(parameters):
+    # 2**18 phases through the verilated core in 4 calls
+    start = 2**parameters['PHASE_DW'] - 2**18
+    sin_stats, cos_stats, seconds = native_sim.sweep(parameters, chunk_dw=16, shard=(start, 2**parameters['PHASE_DW']))
+    assert sin_stats['samples'] == 2**18
+    assert sin_stats['mismatches'] == 0 and cos_stats['mismatches'] == 0
+
+
+@pytest.mark.parametrize("SAMPLES_PER_CLOCK", [1, 2])
+def test_native_gaps_and_channels(SAMPLES_PER_CLOCK):
+    parameters = dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, SIN_COS=1, CHANNELS=3, SAMPLES_PER_CLOCK=SAMPLES_PER_CLOCK)
+    rng = np.random.default_rng(30)
+    n = 5000
+    phases = rng.integers(0, 2**16, n * SAMPLES_PER_CLOCK)
+    valid = rng.random(n) < 0.7
+    channels = rng.integers(0, 3, n)
+    with native_sim.NativeDds(parameters) as dds:
+        sin, cos, out_valid, out_channels = dds.run(np.concatenate((phases, np.zeros(20 * SAMPLES_PER_CLOCK, dtype=np.int64))),
+                                                    np.concatenate((valid, np.zeros(20, dtype=bool))),
+                                                    np.concatenate((channels, np.zeros(20, dtype=np.int64))))
+    expected_sin, expected_cos = dds_model.Model(16, 16, 0, 6, 1, 0, 0, bit_exact=True).process_channels(
+        phases.reshape(n, SAMPLES_PER_CLOCK)[valid].ravel())
+    assert np.array_equal(out_channels[out_valid], np.repeat(channels[valid], SAMPLES_PER_CLOCK))
+    assert np.array_equal(sin[out_valid], expected_sin)
+    assert np.array_equal(cos[out_valid], expected_cos)
+
+
+def test_native_accumulator():
+    parameters = dict(PHASE_DW=20, OUT_DW=16, USE_TAYLOR=1, LUT_DW=9, USE_ACCUMULATOR=1, ACCU_DW=64, SAMPLES_PER_CLOCK=2)
+    rng = np.random.default_rng(31)
+    n = 20000
+    valid = rng.random(n) < 0.9
+    tuning_valid = rng.random(n) < 0.001
+    tuning_valid[0] = True
+    fcws = rng.integers(-2**62, 2**62, n) >> rng.integers(0, 20, n)
+    offsets = rng.integers(-2**62, 2**62, n)
+    accumulator = nco.CoreAccumulator(64, 20, 2)
+    phases = accumulator.run(valid, tuning_valid=tuning_valid, fcws=fcws, offsets=offsets)
+    with native_sim.NativeDds(parameters) as dds:
+        sin, _, out_valid, _ = dds.run(np.zeros(2 * (n + 20), dtype=np.int64), np.concatenate((valid, np.zeros(20, dtype=bool))),
+                                       tuning_valid=np.concatenate((tuning_valid, np.zeros(20, dtype=bool))),
+                                       fcws=np.concatenate((fcws, np.zeros(20, dtype=np.int64))),
+                                       offsets=np.concatenate((offsets, np.zeros(20, dtype=np.int64))))
+    expected_sin, _ = checker.expected_output(model(parameters), phases.reshape(n, 2)[valid].ravel())
+    assert np.array_equal(sin[out_valid], expected_sin)
+
+
+def test_native_output_flush():
+    # a cordic with more stages than the idle clocks of a fixed flush, output() waits for the whole pipeline
+    parameters = dict(PHASE_DW=24, OUT_DW=24, USE_CORDIC=1, CORDIC_ITERATIONS=70, SIN_COS=1)
+    phases = np.arange(0, 2**24, 2**14, dtype=np.int64)
+    with native_sim.NativeDds(parameters) as dds:
+        assert dds.latency == 73
+        sin, cos = dds.output(phases)
+        with pytest.raises(AssertionError, match="samples arrived"):
+            dds.output(phases, flush=dds.latency - 2)
+    expected_sin, expected_cos = checker.expected_output(model(parameters), phases)
+    assert np.array_equal(sin, expected_sin)
+    assert np.array_equal(cos, expected_cos)
+
+
+def test_native_rejects_mixer():
+    with pytest.raises(ValueError, match="USE_MIXER"):
+        native_sim.NativeDds(dict(SIN_COS=1, USE_MIXER=1))
@@ -0,0 +1,105 @@
+import os
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+model_dir = os.path.abspath(os.path.join(tests_dir, '..', 'model'))
+
+spec = importlib.util.spec_from_file_location("nco", os.path.join(model_dir, 'nco.py'))
+nco = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(nco)
+
+
+def reference(increments, ACCU_DW, PHASE_DW, accumulator=0, offsets=None):
+    phases = []
+    for i, inc in enumerate(increments):
+        offset = 0 if offsets is None else int(offsets[i])
+        phases.append(((accumulator + offset) % 2**ACCU_DW) >> (ACCU_DW - PHASE_DW))
+        accumulator = (accumulator + int(inc)) % 2**ACCU_DW
+    return np.array(phases), accumulator
+
+
+@pytest.mark.parametrize("ACCU_DW, PHASE_DW", [(32, 24), (48, 20), (64, 32), (16, 16)])
+def test_ramp(ACCU_DW, PHASE_DW):
+    fcw = nco.frequency_word(20.0001E6, 122.88E6, ACCU_DW)
+    expected, accumulator = reference([fcw] * 5000, ACCU_DW, PHASE_DW)
+    acc = nco.PhaseAccumulator(ACCU_DW, PHASE_DW)
+    # state is carried over between blocks
+    phases = np.concatenate([acc.ramp(fcw, 1234), acc.ramp(fcw, 3766)])
+    assert np.array_equal(phases, expected)
+    assert acc.accumulator == accumulator
+
+
+def test_hop_is_phase_continuous():
+    fcws = [1000, 2**31 + 7, 5, 2**32 - 100]
+    lengths = [10, 200, 3, 50]
+    expected, _ = reference(np.repeat(fcws, lengths), 32, 24)
+    assert np.array_equal(nco.PhaseAccumulator(32, 24).hop(fcws, lengths), expected)
+
+
+def test_linear_chirp_exact():
+    n = 1001
+    words = nco.linear_chirp_words(1 << 20, 1 << 40, n)
+    assert words[0] == 1 << 20 and words[-1] == 1 << 40
+    expected = [(1 << 20) + ((1 << 40) - (1 << 20)) * i // (n - 1) for i in range(n)]
+    assert [int(w) for w in words] == expected
+    expected_phases, _ = reference(expected, 48, 24)
+    assert np.array_equal(nco.PhaseAccumulator(48, 24).linear_chirp(1 << 20, 1 << 40, n), expected_phases)
+
+
+def test_exponential_chirp():
+    phases = nco.PhaseAccumulator(32, 32).exponential_chirp(1000, 1000000, 4)
+    assert list(phases) == [0, 1000, 1000 + 10000, 1000 + 10000 + 100000]
+
+
+def test_phase_modulation():
+    offsets = np.array([0, 2**31, -2**30, 5])
+    expected, _ = reference([12345] * 4, 32, 16, offsets=offsets)
+    assert np.array_equal(nco.PhaseAccumulator(32, 16).phase_modulation(12345, offsets), expected)
+
+
+def core_reference(valid, channels, tuning_valid, fcws, offsets, tuning_channels, ACCU_DW, PHASE_DW, lanes, CHANNELS):
+    # clock by clock like the always_ff block of the accumulator in dds.sv
+    accu, fcw, offset = [0] * CHANNELS, [0] * CHANNELS, [0] * CHANNELS
+    phases = []
+    for i in range(len(valid)):
+        c = channels[i]
+        if valid[i]:
+            phases += [((accu[c] + offset[c] + k * fcw[c]) % 2**ACCU_DW) >> (ACCU_DW - PHASE_DW) for k in range(lanes)]
+            accu[c] = (accu[c] + lanes * fcw[c]) % 2**ACCU_DW
+        else:
+            phases += [0] * lanes
+        if tuning_valid[i]:
+            fcw[tuning_channels[i]] = int(fcws[i]) % 2**ACCU_DW
+            offset[tuning_channels[i]] = int(offsets[i]) % 2**ACCU_DW
+    return np.array(phases)
+
+
+@pytest.mark.parametrize("ACCU_DW, PHASE_DW, SAMPLES_PER_CLOCK, CHANNELS", [(48, 16, 1, 1), (48, 20, 2, 3), (64, 24, 4, 2), (24, 24, 1, 4)])
+def test_core_accumulator(ACCU_DW, PHASE_DW, SAMPLES_PER_CLOCK, CHANNELS):
+    rng = np.random.default_rng(ACCU_DW + PHASE_DW)
+    n = 3000
+    valid = rng.random(n) < 0.8
+    channels = rng.integers(0, CHANNELS, n)
+    tuning_valid = rng.random(n) < 0.02
+    fcws = rng.integers(-2**62, 2**62, n)
+    offsets = rng.integers(-2**62, 2**62, n)
+    tuning_channels = rng.integers(0, CHANNELS, n)
+    args = (valid, channels, tuning_valid, fcws, offsets, tuning_channels)
+    expected = core_reference(*args, ACCU_DW, PHASE_DW, SAMPLES_PER_CLOCK, CHANNELS)
+    accumulator = nco.CoreAccumulator(ACCU_DW, PHASE_DW, SAMPLES_PER_CLOCK, CHANNELS)
+    # state is carried over between blocks
+    phases = np.concatenate([accumulator.run(*[a[:1000] for a in args]), accumulator.run(*[a[1000:] for a in args])])
+    assert np.array_equal(phases, expected)
+
+
+def test_core_accumulator_hop_is_phase_continuous():
+    # a tuning word written in the same clock as a beat is used from the next beat on
+    accumulator = nco.CoreAccumulator(48, 24)
+    valid = np.ones(8, dtype=bool)
+    tuning_valid = np.array([1, 0, 0, 1, 0, 0, 0, 0], dtype=bool)
+    fcws = np.array([2**30, 0, 0, 2**32, 0, 0, 0, 0])
+    phases = accumulator.run(valid, tuning_valid=tuning_valid, fcws=fcws)
+    assert np.array_equal(phases << 24, [0, 0, 2**30, 2**31, 3 * 2**30, 3 * 2**30 + 2**32, 3 * 2**30 + 2**33, 3 * 2**30 + 3 * 2**32])
@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import pstats
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+spec = importlib.util.spec_from_file_location("profiling", os.path.join(tests_dir, 'profiling.py'))
+profiling = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(profiling)
+
+
+class Trigger:
+    # stands in for a cocotb trigger, the scheduler resumes the coroutine with the trigger
+    def __await__(self):
+        return (yield self)
+
+
+def run(coro):
+    # minimal scheduler, returns the result and the number of triggers
+    triggers = 0
+    value = None
+    while True:
+        try:
+            trigger = coro.send(value)
+        except StopIteration as e:
+            return e.value, triggers
+        triggers += 1
+        value = trigger
+
+
+async def worker(steps):
+    total = 0
+    for i in range(steps):
+        time.sleep(0.002)
+        await Trigger()
+        total += i
+    return total
+
+
+def test_disabled(tmp_path):
+    profiler = profiling.Profiler('test', 2, enabled=False, directory=str(tmp_path))
+    coro = worker(3)
+    assert profiler.coroutine('worker', coro) is coro
+    coro.close()
+    with profiler.section('section'):
+        pass
+    assert profiler.write_report() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_report(tmp_path):
+    sim_time = [0]
+    profiler = profiling.Profiler('simple_test', 2, enabled=True, cprofile=True, directory=str(tmp_path),
+                                  sim_time=lambda: sim_time[0])
+    try:
+        with profiler.section('generate_input'):
+            time.sleep(0.01)
+        assert run(profiler.coroutine('worker', worker(5))) == (10, 5)
+        sim_time[0] = 200
+    finally:
+        profiler.stop()
+    report = profiler.write_report()
+    assert report['clocks'] == 100
+    assert report['sections']['generate_input']['calls'] == 1
+    assert report['sections']['generate_input']['seconds'] >= 0.01
+    # the coroutine runs 6 times, once at the start and after every trigger
+    assert report['coroutines']['worker']['wakeups'] == 6
+    assert report['coroutines']['worker']['seconds'] >= 0.01
+    assert report['wakeups_per_clock'] == 0.06
+    with open(tmp_path / 'simple_test.json') as f:
+        assert json.load(f)['clocks'] == 100
+    pstats.Stats(str(tmp_path / 'simple_test.prof'))
+
+
+def test_exception_is_passed_to_coroutine():
+    async def catcher():
+        try:
+            await Trigger()
+        except RuntimeError:
+            return 'caught'
+        return 'not caught'
+
+    profiler = profiling.Profiler('test', 2, enabled=True, sim_time=lambda: 0)
+    try:
+        timed = profiler.coroutine('catcher', catcher())
+        trigger = timed.send(None)
+        assert isinstance(trigger, Trigger)
+        try:
+            timed.throw(RuntimeError("trigger failed"))
+        except StopIteration as e:
+            assert e.value == 'caught'
+    finally:
+        profiler.stop()
+
+
+def test_signal_access_is_restored():
+    before = [cls.__dict__['value'] for cls in profiling.HANDLE_CLASSES]
+    profiler = profiling.Profiler('test', 2, enabled=True, sim_time=lambda: 0)
+    assert [cls.__dict__['value'] for cls in profiling.HANDLE_CLASSES] != before
+    profiler.stop()
+    assert [cls.__dict__['value'] for cls in profiling.HANDLE_CLASSES] == before
+
+
+def test_report_of_failed_test(tmp_path):
+    before = [cls.__dict__['value'] for cls in profiling.HANDLE_CLASSES]
+    profiler = profiling.Profiler('failing_test', 2, enabled=True, directory=str(tmp_path), sim_time=lambda: 0)
+    try:
+        with profiler:
+            with profiler.section('compare'):
+                assert False, "mismatch"
+    except AssertionError:
+        pass
+    assert [cls.__dict__['value'] for cls in profiling.HANDLE_CLASSES] == before
+    with open(tmp_path / 'failing_test.json') as f:
+        report = json.load(f)
+    assert report['error'].startswith("AssertionError: mismatch")
+    assert report['sections']['compare']['calls'] == 1
@@ -0,0 +1,107 @@
+import os
+import pytest
+from pathlib import Path
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+rtl_dir = os.path.abspath(os.path.join(tests_dir, '..', 'hdl'))
+
+spec = importlib.util.spec_from_file_location("cached_build", os.path.join(tests_dir, 'cached_build.py'))
+cached_build = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cached_build)
+
+# limits are a few dB below the values of the bit exact model for a 20 MHz tone at 122.88 MHz,
+# phase truncation limits the SFDR of the configurations without taylor correction
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SFDR_MIN, SINAD_MIN", [
+    (20, 16, 1, 9, 105, 92),
+    (24, 16, 1, 11, 96, 92),
+    (12, 12, 0, 6, 68, 64),
+    (10, 8, 0, 6, 57, 46),
+])
+@pytest.mark.parametrize("SIN_COS", [1])
+def test_spectrum(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SFDR_MIN, SINAD_MIN, SIN_COS):
+    dut = "dds"
+    module = "spectral_analysis"
+    toplevel = dut
+
+    verilog_sources = [
+        os.path.join(rtl_dir, f"{dut}.sv"),
+    ]
+    includes = [
+        os.path.join(rtl_dir, ""),
+    ]
+
+    parameters = {}
+    parameters['PHASE_DW'] = PHASE_DW
+    parameters['OUT_DW'] = OUT_DW
+    parameters['USE_TAYLOR'] = USE_TAYLOR
+    parameters['LUT_DW'] = LUT_DW
+    parameters['SIN_COS'] = SIN_COS
+    parameters['NEGATIVE_SINE'] = 0
+    parameters['NEGATIVE_COSINE'] = 0
+    parameters['USE_LUT_FILE'] = 0
+
+    extra_env = {f'PARAM_{k}': str(v) for k, v in parameters.items()}
+    extra_env['SFDR_MIN'] = str(SFDR_MIN)
+    extra_env['SINAD_MIN'] = str(SINAD_MIN)
+    work_dir="sim_build/spectrum_" + "_".join(("{}={}".format(*i) for i in parameters.items()))
+    Path(work_dir).mkdir(parents=True, exist_ok=True)
+
+    cached_build.run(
+        python_search=[tests_dir],
+        verilog_sources=verilog_sources,
+        includes=includes,
+        toplevel=toplevel,
+        module=module,
+        parameters=parameters,
+        work_dir=work_dir,
+        extra_env=extra_env,
+        testcase="simple_spectrum",
+    )
+
+
+# the cordic is limited by the number of iterations, not by the phase width
+@pytest.mark.parametrize("PHASE_DW, OUT_DW, CORDIC_ITERATIONS, SFDR_MIN, SINAD_MIN", [
+    (20, 16, 18, 112, 94),
+    (24, 20, 22, 136, 116),
+])
+def test_spectrum_cordic(PHASE_DW, OUT_DW, CORDIC_ITERATIONS, SFDR_MIN, SINAD_MIN):
+    dut = "dds"
+    module = "spectral_analysis"
+    toplevel = dut
+
+    verilog_sources = [
+        os.path.join(rtl_dir, f"{dut}.sv"),
+    ]
+    includes = [
+        os.path.join(rtl_dir, ""),
+    ]
+
+    parameters = {}
+    parameters['PHASE_DW'] = PHASE_DW
+    parameters['OUT_DW'] = OUT_DW
+    parameters['USE_TAYLOR'] = 0
+    parameters['SIN_COS'] = 1
+    parameters['NEGATIVE_SINE'] = 0
+    parameters['NEGATIVE_COSINE'] = 0
+    parameters['USE_CORDIC'] = 1
+    parameters['CORDIC_ITERATIONS'] = CORDIC_ITERATIONS
+
+    extra_env = {f'PARAM_{k}': str(v) for k, v in parameters.items()}
+    extra_env['SFDR_MIN'] = str(SFDR_MIN)
+    extra_env['SINAD_MIN'] = str(SINAD_MIN)
+    work_dir="sim_build/spectrum_cordic_" + "_".join(("{}={}".format(*i) for i in parameters.items()))
+    Path(work_dir).mkdir(parents=True, exist_ok=True)
+
+    cached_build.run(
+        python_search=[tests_dir],
+        verilog_sources=verilog_sources,
+        includes=includes,
+        toplevel=toplevel,
+        module=module,
+        parameters=parameters,
+        work_dir=work_dir,
+        extra_env=extra_env,
+        testcase="simple_spectrum",
+    )
@@ -0,0 +1,84 @@
+import os
+import pytest
+import numpy as np
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
+
+spec = importlib.util.spec_from_file_location("spectral_metrics", os.path.join(tools_dir, 'spectral_metrics.py'))
+spectral_metrics = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(spectral_metrics)
+
+
+def tone(n, periods, bits, spur_periods=None, spur_dbc=None):
+    x = np.sin(2 * np.pi * np.arange(n) * periods / n)
+    if spur_periods is not None:
+        x += 10**(spur_dbc / 20) * np.sin(2 * np.pi * np.arange(n) * spur_periods / n + 0.3)
+    return np.round(x / np.abs(x).max() * (2**(bits - 1) - 1))
+
+
+def test_coherent_word():
+    fcw = spectral_metrics.coherent_word(20e6, 122.88e6, 2**14)
+    periods = fcw * 2**14 / 2**32
+    assert periods == int(periods) and periods % 2 == 1
+    assert abs(periods / 2**14 * 122.88e6 - 20e6) < 122.88e6 / 2**14
+    with pytest.raises(ValueError):
+        spectral_metrics.coherent_word(20e6, 122.88e6, 1000)
+
+
+@pytest.mark.parametrize("bits", [8, 12, 16])
+def test_quantization_noise(bits):
+    # ideal quantizer: SINAD = 6.02 * bits + 1.76 dB
+    n = 2**14
+    m = spectral_metrics.metrics(spectral_metrics.power_spectrum(tone(n, 1001, bits)), f_clk=n)
+    assert m['frequency'] == 1001
+    assert m['sinad_db'] == pytest.approx(6.02 * bits + 1.76, abs=0.5)
+    assert m['enob'] == pytest.approx(bits, abs=0.1)
+
+
+@pytest.mark.parametrize("window", [None, 'hann', 'kaiser'])
+def test_spur(window):
+    n = 2**14
+    x = tone(n, 1001, 16, spur_periods=3333, spur_dbc=-70)
+    m = spectral_metrics.metrics(spectral_metrics.power_spectrum(x, window), f_clk=n, window=window)
+    assert m['sfdr_db'] == pytest.approx(70, abs=0.5)
+    assert m['spur_frequency'] == 3333
+
+
+def test_welch():
+    n = 2**17
+    x = tone(n, 8 * 1001, 16, spur_periods=8 * 2501, spur_dbc=-85)
+    chunked = spectral_metrics.welch((x[i:i + 12345] for i in range(0, n, 12345)), 2**14)
+    assert np.allclose(chunked, spectral_metrics.welch([x], 2**14))
+    m = spectral_metrics.metrics(chunked, f_clk=n, window='kaiser')
+    assert m['frequency'] == 8 * 1001
+    assert m['sfdr_db'] == pytest.approx(85, abs=1)
+    # spur and quantization noise
+    assert m['sinad_db'] == pytest.approx(-10 * np.log10(10**-8.5 + 10**-(6.02 * 16 + 1.76) / 10), abs=0.5)
+    with pytest.raises(ValueError):
+        spectral_metrics.welch([x[:100]], 2**14)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1000, 4096])
+@pytest.mark.parametrize("noverlap", [None, 0, 1000])
+def test_welch_chunk_sizes(chunk_size, noverlap):
+    # chunks shorter and longer than a segment give the average of the same segments
+    n, nperseg = 10000, 1024
+    step = nperseg - (nperseg // 2 if noverlap is None else noverlap)
+    x = tone(n, 101, 12)
+    expected = np.mean([spectral_metrics.power_spectrum(x[i:i + nperseg], 'hann') for i in range(0, n - nperseg + 1, step)], axis=0)
+    chunked = spectral_metrics.welch((x[i:i + chunk_size] for i in range(0, n, chunk_size)), nperseg, 'hann', noverlap)
+    assert np.allclose(chunked, expected)
+
+def test_read_chunks(tmp_path):
+    x = tone(10000, 11, 16).astype(np.int16)
+    np.save(tmp_path / 'capture.npy', x)
+    x.tofile(tmp_path / 'capture.bin')
+    for filename in ['capture.npy', 'capture.bin']:
+        chunks = list(spectral_metrics.read_chunks(str(tmp_path / filename), 3000))
+        assert [len(c) for c in chunks] == [3000, 3000, 3000, 1000]
+        assert np.array_equal(np.concatenate(chunks), x)
+    chunks = list(spectral_metrics.read_chunks(str(tmp_path / 'capture.bin'), 3000, np.int16, start=500, stop=4000))
+    assert np.array_equal(np.concatenate(chunks), x[500:4000])
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import shutil
+import pytest
+
+import importlib.util
+
+tests_dir = os.path.abspath(os.path.dirname(__file__))
+tools_dir = os.path.abspath(os.path.join(tests_dir, '..', 'tools'))
+
+spec = importlib.util.spec_from_file_location("synth_sweep", os.path.join(tools_dir, 'synth_sweep.py'))
+synth_sweep = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(synth_sweep)
+
+# shortened output of stat -json after synth_xilinx
+STAT = {
+    "creator": "Yosys 0.17",
+    "modules": {
+        "\\dds": {
+            "num_cells": 29,
+            "num_cells_by_type": {"CARRY4": 4, "DSP48E1": 2, "FDRE": 12, "LUT2": 3, "LUT6": 5, "RAMB18E1": 1,
+                                  "RAMB36E1": 1, "SRL16E": 1},
+        }
+    },
+}
+
+
+def test_grid():
+    points = synth_sweep.grid([16], [16], [0, 1], [10, 14], [0, 1])
+    assert len(points) == 4
+    assert dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=1, LUT_DW=10, SIN_COS=0) in points
+    assert synth_sweep.point_key(points[0]) == "PHASE_DW=16,OUT_DW=16,USE_TAYLOR=0,LUT_DW=14,SIN_COS=0"
+
+
+def test_yosys_script():
+    script = synth_sweep.yosys_script(dict(PHASE_DW=20, OUT_DW=16, USE_TAYLOR=1, LUT_DW=10, SIN_COS=1))
+    assert "chparam -set PHASE_DW 20 -set OUT_DW 16 -set USE_TAYLOR 1 -set LUT_DW 10 -set SIN_COS 1 dds" in script
+    assert "synth_xilinx -flatten -abc9 -arch xc7 -top dds" in script
+    assert script.index("read_verilog") < script.index("chparam") < script.index("synth_xilinx") < script.index("stat -json")
+
+
+def test_parse():
+    r = synth_sweep.parse_stat(STAT)
+    assert (r['cells'], r['luts'], r['ffs'], r['carry4'], r['bram18'], r['dsp48'], r['srl']) == (29, 8, 12, 4, 3, 2, 1)
+    text = "\n12. Executing LTP pass (find longest path).\nLongest topological path in dds (length=17):\n"
+    assert synth_sweep.parse_ltp(text) == 17
+    assert synth_sweep.parse_ltp("") is None
+
+
+def test_compare_and_csv(tmp_path):
+    point = dict(PHASE_DW=16, OUT_DW=16, USE_TAYLOR=0, LUT_DW=14, SIN_COS=1)
+    baseline = [dict(point, **synth_sweep.parse_stat(STAT), logic_depth=10)]
+    results = [dict(baseline[0], luts=9, logic_depth=10, dsp48=1)]
+    rows = {metric: (old, new, regression) for _, metric, old, new, regression in synth_sweep.compare(results, baseline)}
+    assert rows['luts'] == (8, 9, True) and rows['dsp48'] == (2, 1, False) and rows['logic_depth'] == (10, 10, False)
+    assert not any(r[-1] for r in synth_sweep.compare(results, baseline, threshold=0.2))
+    synth_sweep.write_csv(str(tmp_path / 'out.csv'), results + [dict(point, error='timeout')])
+    lines = (tmp_path / 'out.csv').read_text().splitlines()
+    assert lines[0].startswith("PHASE_DW,OUT_DW,USE_TAYLOR,LUT_DW,SIN_COS,cells,luts") and lines[0].endswith(",error")
+    assert len(lines) == 3
+
+
+@pytest.mark.skipif(shutil.which('yosys') is None, reason="yosys is not installed")
+def test_synthesize(tmp_path):
+    r = synth_sweep.synthesize(dict(PHASE_DW=8, OUT_DW=8, USE_TAYLOR=0, LUT_DW=6, SIN_COS=0), str(tmp_path))
+    assert 'error' not in r
+    assert r['luts'] > 0 and r['ffs'] > 0 and r['dsp48'] == 0 and r['logic_depth'] > 0
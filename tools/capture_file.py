@@ -0,0 +1,69 @@
+import numpy as np
+import os
+import struct
+
+# Appendable .npy capture files. The header has room for the largest possible length and is rewritten in place
+# by flush() and close(), so a long simulation can write its output chunk by chunk without keeping it in memory.
+# The files are normal .npy files, np.load(filename, mmap_mode='r') or read_window() only read the used part.
+
+HEADER_SIZE = 128  # magic, version, header length and the padded header dict, a multiple of 64 bytes
+
+def sample_dtype(OUT_DW):
+    # smallest signed integer type for OUT_DW bit samples
+    for dtype in (np.int8, np.int16, np.int32):
+        if OUT_DW <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+class CaptureWriter:
+    def __init__(self, filename, dtype=np.int32):
+        self.filename = filename
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.length = 0
+        self.file = open(filename, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = repr({'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False,
+                       'shape': (self.length,)}).encode('latin1')
+        header += b' ' * (HEADER_SIZE - 10 - len(header) - 1) + b'\n'
+        self.file.seek(0)
+        self.file.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header)
+        self.file.seek(0, os.SEEK_END)
+
+    def append(self, data):
+        data = np.asarray(data)
+        if data.ndim != 1:
+            raise ValueError("only 1d chunks can be appended")
+        self.file.write(data.astype(self.dtype, copy=False).tobytes())
+        self.length += len(data)
+
+    def flush(self):
+        # after flush() the file can be opened by a reader with the samples written so far
+        self._write_header()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def save(filename, data, dtype=np.int32, chunk_size=2**20):
+    with CaptureWriter(filename, dtype) as writer:
+        for i in range(0, len(data), chunk_size):
+            writer.append(data[i:i + chunk_size])
+
+def read_window(filename, start=0, stop=None):
+    # samples [start, stop) of a capture, .npy files are memory mapped so only the window is read from disk,
+    # text files of older captures (np.savetxt) are read completely
+    if filename.endswith('.npy'):
+        data = np.load(filename, mmap_mode='r')
+    else:
+        data = np.loadtxt(filename, dtype=np.int64, ndmin=1)
+    return data[start:stop]
@@ -0,0 +1,181 @@
+import numpy as np
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import importlib.util
+
+# Design space exploration of the dds core: for a grid of PHASE_DW, OUT_DW, USE_TAYLOR and LUT_DW the bit exact
+# model is evaluated for every phase value (or a dense sample for wide phases), the SFDR is measured with a
+# coherent tone from a phase accumulator. Together with the lut size and the multipliers of dds.sv this gives
+# the cheapest configuration that meets an error or SFDR spec without running rtl simulations.
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(root_dir, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+dds_model = load_module('dds_model', 'model/dds_model.py')
+nco = load_module('nco', 'model/nco.py')
+spectral_metrics = load_module('spectral_metrics', 'tools/spectral_metrics.py')
+
+# width of the constant operand of the phase error multiplication in dds.sv
+PHASE_FACTOR_WIDTH = 18
+# evaluation block size, bounds the memory of a worker for wide phases
+BLOCK_SIZE = 2**20
+
+def grid(PHASE_DWs, OUT_DWs, USE_TAYLORs, LUT_DWs):
+    # LUT_DW is only used with taylor correction, dds.sv needs at least one phase error bit
+    points = []
+    for PHASE_DW in PHASE_DWs:
+        for OUT_DW in OUT_DWs:
+            for USE_TAYLOR in USE_TAYLORs:
+                if USE_TAYLOR:
+                    points += [dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=1, LUT_DW=LUT_DW)
+                               for LUT_DW in LUT_DWs if LUT_DW <= PHASE_DW - 3]
+                else:
+                    points.append(dict(PHASE_DW=PHASE_DW, OUT_DW=OUT_DW, USE_TAYLOR=0, LUT_DW=PHASE_DW - 2))
+    return points
+
+def dsp48(a, b):
+    # number of DSP48E1 (25x18 signed) for a signed a x b bit multiplication
+    a, b = max(a, b), min(a, b)
+    return int(np.ceil((a - 1) / 24) * np.ceil((b - 1) / 17)) if b > 1 else 0
+
+def resources(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW):
+    lut_width = LUT_DW if USE_TAYLOR else PHASE_DW - 2
+    multipliers = []
+    if USE_TAYLOR:
+        # phase error times 2*pi and the two taylor products, see dds.sv
+        phase_error_width = PHASE_DW - (LUT_DW + 2)
+        multipliers = [(phase_error_width + 1, PHASE_FACTOR_WIDTH + 1),
+                       (OUT_DW, phase_error_width + PHASE_FACTOR_WIDTH - dds_model.PI_DECIMAL_SHIFT),
+                       (OUT_DW, phase_error_width + PHASE_FACTOR_WIDTH - dds_model.PI_DECIMAL_SHIFT)]
+    return {
+        'lut_bits': 2**lut_width * OUT_DW,
+        'multipliers': len(multipliers),
+        'multiplier_widths': multipliers,
+        'dsp48': sum(dsp48(a, b) for a, b in multipliers),
+    }
+
+def sample_phases(PHASE_DW, max_phases, seed=0):
+    # all phases if possible, otherwise one random phase in each of max_phases equally sized intervals
+    if 2**PHASE_DW <= max_phases:
+        return np.arange(2**PHASE_DW, dtype=np.int64)
+    stride = 2**PHASE_DW // max_phases
+    rng = np.random.default_rng(seed)
+    return np.arange(max_phases, dtype=np.int64) * stride + rng.integers(0, stride, max_phases)
+
+def evaluate(point, max_phases=2**20, fft_size=2**14, ACCU_DW=32, f=0.1234567, seed=0):
+    # max_error is the largest deviation of sin or cos from the ideal (unrounded) value in LSB
+    PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW = point['PHASE_DW'], point['OUT_DW'], point['USE_TAYLOR'], point['LUT_DW']
+    lut = dds_model.sine_lut(LUT_DW if USE_TAYLOR else PHASE_DW - 2, OUT_DW)
+    max_val = 2**(OUT_DW - 1) - 1
+    phases = sample_phases(PHASE_DW, max_phases, seed)
+    max_error = 0.0
+    error_sq_sum = 0.0
+    for i in range(0, len(phases), BLOCK_SIZE):
+        p = phases[i:i + BLOCK_SIZE]
+        sin, cos = dds_model.dds_bit_exact(p, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, 1, 0, 0, lut)
+        angle = 2 * np.pi * p / 2**PHASE_DW
+        sin_error = sin - np.sin(angle) * max_val
+        cos_error = cos - np.cos(angle) * max_val
+        max_error = max(max_error, np.abs(sin_error).max(), np.abs(cos_error).max())
+        error_sq_sum += np.sum(sin_error**2) + np.sum(cos_error**2)
+
+    # coherent tone at f * f_clk, the phase is truncated from ACCU_DW to PHASE_DW bits like in a real nco
+    fcw = spectral_metrics.coherent_word(f, 1.0, fft_size, ACCU_DW)
+    tone = nco.PhaseAccumulator(ACCU_DW, PHASE_DW).ramp(fcw, fft_size)
+    sin, _ = dds_model.dds_bit_exact(tone, PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, 1, 0, 0, lut)
+    m = spectral_metrics.metrics(spectral_metrics.power_spectrum(sin))
+
+    result = dict(point)
+    result.update({
+        'phases': len(phases),
+        'exhaustive': len(phases) == 2**PHASE_DW,
+        'max_error': float(max_error),
+        'rms_error': float(np.sqrt(error_sq_sum / (2 * len(phases)))),
+        'sfdr_db': m['sfdr_db'],
+        'sinad_db': m['sinad_db'],
+        'enob': m['enob'],
+    })
+    result.update(resources(PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW))
+    return result
+
+def _evaluate(args):
+    return evaluate(*args)
+
+def explore(points, jobs=None, **kwargs):
+    # evaluates all points in a process pool, the results are in the order of points
+    args = [(point, kwargs.get('max_phases', 2**20), kwargs.get('fft_size', 2**14), kwargs.get('ACCU_DW', 32))
+            for point in points]
+    if jobs == 1:
+        return [_evaluate(a) for a in args]
+    with multiprocessing.Pool(jobs) as pool:
+        return pool.map(_evaluate, args, chunksize=1)
+
+def cost(result, dsp_bits=18432):
+    # lut bits plus every DSP48 counted as dsp_bits of memory, default is one 18 kbit block ram per DSP48
+    return result['lut_bits'] + result['dsp48'] * dsp_bits
+
+def meets(result, sfdr=None, max_error=None):
+    return (sfdr is None or result['sfdr_db'] >= sfdr) and (max_error is None or result['max_error'] <= max_error)
+
+def cheapest(results, sfdr=None, max_error=None, dsp_bits=18432):
+    candidates = [r for r in results if meets(r, sfdr, max_error)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: (cost(r, dsp_bits), r['OUT_DW'], r['PHASE_DW']))
+
+def parse_list(text):
+    # "8,10,12" or "8-12"
+    values = []
+    for part in text.split(','):
+        if '-' in part:
+            start, stop = part.split('-')
+            values += list(range(int(start), int(stop) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Finds the cheapest dds configuration that meets an error or SFDR spec')
+    parser.add_argument('--PHASE_DW', required=False, default='12-24', help='phase widths, e.g. 16,20,24 or 12-24')
+    parser.add_argument('--OUT_DW', required=False, default='16', help='output widths')
+    parser.add_argument('--USE_TAYLOR', required=False, default='0,1', help='0, 1 or 0,1')
+    parser.add_argument('--LUT_DW', required=False, default='6-14', help='lut widths with taylor correction')
+    parser.add_argument('--sfdr', required=False, type=float, default=None, help='minimum SFDR in dBc')
+    parser.add_argument('--max_error', required=False, type=float, default=None, help='maximum absolute error in LSB')
+    parser.add_argument('--max_phases', required=False, type=int, default=2**20, help='phases per point, wider phases are sampled')
+    parser.add_argument('--fft_size', required=False, type=int, default=2**14, help='samples of the SFDR tone')
+    parser.add_argument('--ACCU_DW', required=False, type=int, default=32, help='phase accumulator width of the SFDR tone')
+    parser.add_argument('--dsp_bits', required=False, type=int, default=18432, help='cost of a DSP48 in lut bits')
+    parser.add_argument('--jobs', required=False, type=int, default=None, help='worker processes, default is one per cpu')
+    parser.add_argument('--output', metavar='path', required=False, default=None, help='json file for all results')
+    args = parser.parse_args(args)
+
+    points = grid(parse_list(args.PHASE_DW), parse_list(args.OUT_DW), parse_list(args.USE_TAYLOR), parse_list(args.LUT_DW))
+    results = explore(points, args.jobs, max_phases=args.max_phases, fft_size=args.fft_size, ACCU_DW=args.ACCU_DW)
+    results.sort(key=lambda r: cost(r, args.dsp_bits))
+
+    print(f"{'PHASE_DW':>8} {'OUT_DW':>6} {'TAYLOR':>6} {'LUT_DW':>6} {'max err':>8} {'SFDR':>7} {'ENOB':>6} {'lut bits':>10} {'DSP48':>5}")
+    for r in results:
+        print(f"{r['PHASE_DW']:8d} {r['OUT_DW']:6d} {r['USE_TAYLOR']:6d} {r['LUT_DW']:6d} {r['max_error']:8.3f} {r['sfdr_db']:7.2f} "
+              f"{r['enob']:6.2f} {r['lut_bits']:10d} {r['dsp48']:5d}{'' if meets(r, args.sfdr, args.max_error) else '  -'}")
+    best = cheapest(results, args.sfdr, args.max_error, args.dsp_bits)
+    if best is None:
+        print("no configuration meets the spec")
+    else:
+        print("cheapest configuration: " + " ".join(f"{k}={best[k]}" for k in ('PHASE_DW', 'OUT_DW', 'USE_TAYLOR', 'LUT_DW')))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'cheapest': best}, f, indent=2)
+    return best
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,36 +1,201 @@
-import numpy as np
-import argparse
-import sys
-
-def create_lut_file(filename, PHASE_DW, OUT_DW):
-    MAX_OUT_VAL = 2 ** (OUT_DW - 1) - 1
-    k = 0
-    f = open(filename+'.hex','w')
-    f_sv = open(filename+'.vh','w')
-    for p in range(int(2**PHASE_DW)):
-        lut_val = int(np.round(np.sin(2 * np.pi *  p / (2**PHASE_DW) / 4) * MAX_OUT_VAL))
-        #print(F"sin({2 * np.pi * p / (2**PHASE_DW)}) = {np.sin(2 * np.pi * p / (2**PHASE_DW))}  lut_val = {lut_val}")
-        if k % 8 == 0:
-            if k != 0:
-                f.write("\n")
-                f_sv.write("\n")
-            f.write(F"@{k:08x} ")
-        f.write("{0:0{1}x} ".format(lut_val, int(np.ceil(OUT_DW / 4))))
-        f_sv.write("assign lut[{3}] = {2}'h{0:0{1}x}; ".format(lut_val, int(np.ceil(OUT_DW / 4)), OUT_DW, p))
-        k += 1
-    f.close()
-    f_sv.close()
-
-def main(args):
-    print(sys.argv)
-
-    parser = argparse.ArgumentParser(description='Creates lut table for DDS core')
-    parser.add_argument('--filename', metavar='path', required=False, default = 'sine_lut.hex', help='lut filename')
-    parser.add_argument('--PHASE_DW', metavar='path', required=False, default = 8, help='phase data width')
-    parser.add_argument('--OUT_DW', metavar='path', required=False, default = 8, help='output data width')
-    args = parser.parse_args(args)
-
-    create_lut_file(args.filename, int(args.PHASE_DW), int(args.OUT_DW))
-
-if __name__ == "__main__":
-    main(sys.argv[1:])
\ No newline at end of file
+import numpy as np
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+import importlib.util
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+spec = importlib.util.spec_from_file_location("dds_model", os.path.join(root_dir, 'model', 'dds_model.py'))
+dds_model = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dds_model)
+
+DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+FORMATS = ('hex', 'vh', 'bin', 'npy', 'mem', 'coe')
+
+def lut_values(PHASE_DW, OUT_DW, rounding='even'):
+    # quarter wave sine table, rounding = 'even' is np.round (round half to even),
+    # 'away' rounds half away from zero like the real to integer conversion in dds.sv
+    MAX_OUT_VAL = 2 ** (OUT_DW - 1) - 1
+    p = np.arange(2**PHASE_DW)
+    lut = np.sin(2 * np.pi * p / (2**PHASE_DW) / 4) * MAX_OUT_VAL
+    if rounding == 'even':
+        lut = np.round(lut)
+    elif rounding == 'away':
+        lut = np.floor(lut + 0.5)
+    else:
+        raise ValueError(f"unknown rounding mode {rounding}")
+    return lut.astype(np.int64)
+
+def digits(values, width, base=16):
+    # ascii digits of every value as (len(values), width) uint8 array, with leading zeros
+    powers = base ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return DIGITS[(np.asarray(values, dtype=np.int64)[:, None] // powers) % base]
+
+def text(columns, n):
+    # Builds a text file from n records without a python loop. A column is either a constant string
+    # or a (uint8 array of shape (n, width), keep) tuple, keep is a boolean array of the same shape
+    # or of shape (n, 1) that selects which characters are written.
+    chars, keep = [], []
+    for column in columns:
+        if isinstance(column, str):
+            data = np.broadcast_to(np.frombuffer(column.encode(), dtype=np.uint8), (n, len(column)))
+            column = (data, True)
+        chars.append(column[0])
+        keep.append(np.broadcast_to(column[1], column[0].shape))
+    return np.hstack(chars)[np.hstack(keep)].tobytes()
+
+def write_atomic(filename, data):
+    # write to a temporary file in the same directory and rename it,
+    # so that concurrent readers never see a partially written file
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates the file with mode 0600, use the permissions of a normally created file
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_filename, 0o666 & ~umask)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+def lut_dtype(OUT_DW):
+    # smallest little endian signed integer type that holds OUT_DW bits
+    for dtype in ('<i1', '<i2', '<i4', '<i8'):
+        if np.dtype(dtype).itemsize * 8 >= OUT_DW:
+            return np.dtype(dtype)
+    raise ValueError("OUT_DW > 64 is not supported")
+
+def hex_file(lut, OUT_DW):
+    # $readmemh file with 8 entries per line, every line starts with its address
+    n = len(lut)
+    k = np.arange(n)
+    lut_hex = (digits(lut & (2**OUT_DW - 1), int(np.ceil(OUT_DW / 4))), True)
+    newline = (np.full((n, 1), ord('\n'), dtype=np.uint8), ((k % 8 == 0) & (k != 0))[:, None])
+    line_start = (k % 8 == 0)[:, None]
+    address = (digits(k, 8), line_start)
+    at = (np.full((n, 1), ord('@'), dtype=np.uint8), line_start)
+    space = (np.full((n, 1), ord(' '), dtype=np.uint8), line_start)
+    return text([newline, at, address, space, lut_hex, ' '], n)
+
+def vh_file(lut, OUT_DW, name='SINE_LUT'):
+    # One packed localparam with entry i in bits [i*OUT_DW +: OUT_DW], a single literal is parsed
+    # much faster than one assign per entry. Usage: lut[i] = SINE_LUT[i*OUT_DW +: OUT_DW]
+    n = len(lut)
+    width = n * OUT_DW
+    # bit matrix with the last entry and the msb first, looped over the bits instead of the entries
+    bits = np.empty((n, OUT_DW), dtype=np.uint8)
+    for b in range(OUT_DW):
+        bits[:, b] = (lut[::-1] >> (OUT_DW - 1 - b)) & 1
+    bits = np.concatenate((np.zeros(-width % 4, dtype=np.uint8), bits.ravel())).reshape(-1, 4)
+    nibbles = (bits[:, 0] << 3) | (bits[:, 1] << 2) | (bits[:, 2] << 1) | bits[:, 3]
+    return (f"localparam [{width}-1:0] {name} = {width}'h".encode() + DIGITS[nibbles].tobytes() + b';\n')
+
+def mem_file(lut, OUT_DW):
+    # one hex word per line, readable by $readmemh and vendor memory init flows
+    n = len(lut)
+    return text([(digits(lut & (2**OUT_DW - 1), int(np.ceil(OUT_DW / 4))), True), '\n'], n)
+
+def coe_file(lut, OUT_DW):
+    # xilinx coefficient file
+    n = len(lut)
+    separator = (np.frombuffer(b',;', dtype=np.uint8)[(np.arange(n) == n - 1).astype(int)][:, None], True)
+    header = b'memory_initialization_radix=16;\nmemory_initialization_vector=\n'
+    return header + text([(digits(lut & (2**OUT_DW - 1), int(np.ceil(OUT_DW / 4))), True), separator, '\n'], n)
+
+def bin_file(lut, OUT_DW):
+    # raw little endian two's complement data, np.fromfile(filename, lut_dtype(OUT_DW))
+    return lut.astype(lut_dtype(OUT_DW)).tobytes()
+
+def npy_file(lut, OUT_DW):
+    # can be opened without a copy with np.load(filename, mmap_mode='r')
+    f = io.BytesIO()
+    np.save(f, lut.astype(lut_dtype(OUT_DW)))
+    return f.getvalue()
+
+WRITERS = {'hex': hex_file, 'vh': vh_file, 'bin': bin_file, 'npy': npy_file, 'mem': mem_file, 'coe': coe_file}
+
+def check_formats(formats):
+    for fmt in formats:
+        if fmt not in WRITERS:
+            raise ValueError(f"unknown lut file format {fmt}")
+
+def write_lut(filename, lut, OUT_DW, formats, name='SINE_LUT'):
+    for fmt in formats:
+        data = vh_file(lut, OUT_DW, name) if fmt == 'vh' else WRITERS[fmt](lut, OUT_DW)
+        write_atomic(filename + '.' + fmt, data)
+
+def create_lut_file(filename, PHASE_DW, OUT_DW, rounding='even', formats=('hex', 'vh')):
+    # writes filename + '.' + format for every format
+    check_formats(formats)
+    write_lut(filename, lut_values(PHASE_DW, OUT_DW, rounding), OUT_DW, formats)
+
+def create_sunderland_files(filename, PHASE_DW, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, formats=('hex', 'vh')):
+    # Coarse and fine lut of LUT_COMPRESSION = 1 in dds.sv, written to filename + '_coarse.' + format
+    # and filename + '_fine.' + format. The entries are signed with sunderland_coarse_width() and
+    # sunderland_fine_width() bits, both include the SUNDERLAND_GUARD fraction bits.
+    # The values come from the model, they are rounded away from zero like in dds.sv.
+    check_formats(formats)
+    if SUNDERLAND_A < 1 or SUNDERLAND_C < 1 or SUNDERLAND_A + SUNDERLAND_C > PHASE_DW:
+        raise ValueError("SUNDERLAND_A >= 1, SUNDERLAND_C >= 1 and SUNDERLAND_A + SUNDERLAND_C <= PHASE_DW is required")
+    coarse, fine = dds_model.sunderland_luts(PHASE_DW, OUT_DW, SUNDERLAND_A, SUNDERLAND_C)
+    FINE_DW = dds_model.sunderland_fine_width(PHASE_DW, OUT_DW, SUNDERLAND_C)
+    write_lut(filename + '_coarse', coarse, dds_model.sunderland_coarse_width(OUT_DW), formats, 'SINE_LUT_COARSE')
+    write_lut(filename + '_fine', fine, FINE_DW, formats, 'SINE_LUT_FINE')
+
+def default_cache_dir():
+    return os.environ.get('DDS_LUT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'dds_lut'))
+
+def cached_lut_file(PHASE_DW, OUT_DW, rounding='even', cache_dir=None, formats=('hex', 'vh')):
+    # Returns the filename (without extension) of the lut in the cache and creates it if it does not exist.
+    # The lut only depends on (PHASE_DW, OUT_DW, rounding), so it is written once and can be shared
+    # by all test runs and pytest workers.
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    filename = os.path.join(cache_dir, f'sine_lut_{PHASE_DW}_{OUT_DW}_{rounding}')
+    missing = [fmt for fmt in formats if not os.path.isfile(filename + '.' + fmt)]
+    if missing:
+        create_lut_file(filename, PHASE_DW, OUT_DW, rounding, missing)
+    return filename
+
+def cached_sunderland_files(PHASE_DW, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, cache_dir=None, formats=('hex', 'vh')):
+    # like cached_lut_file() for the coarse and fine lut, the returned name is the name that dds.sv reads
+    # without the '_coarse.hex' and '_fine.hex' suffixes, the last number is the SUNDERLAND_GUARD of the luts
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    filename = os.path.join(cache_dir, f'sine_lut_{PHASE_DW}_{OUT_DW}_sunderland_{SUNDERLAND_A}_{SUNDERLAND_C}_{dds_model.SUNDERLAND_GUARD}')
+    missing = [fmt for fmt in formats
+               if not (os.path.isfile(filename + '_coarse.' + fmt) and os.path.isfile(filename + '_fine.' + fmt))]
+    if missing:
+        create_sunderland_files(filename, PHASE_DW, OUT_DW, SUNDERLAND_A, SUNDERLAND_C, missing)
+    return filename
+
+def main(args):
+    print(sys.argv)
+
+    parser = argparse.ArgumentParser(description='Creates lut table for DDS core')
+    parser.add_argument('--filename', metavar='path', required=False, default = 'sine_lut.hex', help='lut filename')
+    parser.add_argument('--PHASE_DW', metavar='path', required=False, default = 8, help='phase data width')
+    parser.add_argument('--OUT_DW', metavar='path', required=False, default = 8, help='output data width')
+    parser.add_argument('--rounding', choices=['even', 'away'], required=False, default = 'even', help='round half to even or away from zero')
+    parser.add_argument('--formats', required=False, default = 'hex,vh', help=f"comma separated list of {','.join(FORMATS)}")
+    parser.add_argument('--compression', choices=['none', 'sunderland'], required=False, default = 'none',
+                        help='sunderland writes the coarse and fine lut of LUT_COMPRESSION = 1 to <filename>_coarse and <filename>_fine')
+    parser.add_argument('--SUNDERLAND_A', required=False, type=int, default = 8, help='lut index msbs of coarse and fine lut')
+    parser.add_argument('--SUNDERLAND_C', required=False, type=int, default = 3, help='lut index lsbs of the fine lut')
+    args = parser.parse_args(args)
+
+    if args.compression == 'sunderland':
+        create_sunderland_files(args.filename, int(args.PHASE_DW), int(args.OUT_DW), args.SUNDERLAND_A, args.SUNDERLAND_C,
+                                args.formats.split(','))
+    else:
+        create_lut_file(args.filename, int(args.PHASE_DW), int(args.OUT_DW), args.rounding, args.formats.split(','))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,18 +1,62 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
-
-
-output = np.loadtxt("out.txt")
-output_cos = np.loadtxt("out_cos.txt")
-output_model = np.loadtxt("out_model.txt")
-output_model_cos = np.loadtxt("out_model_cos.txt")
-length = min(len(output),len(output_model),len(output_model_cos),len(output_cos))
-x = np.arange(1,length)
-sin = output[1:length]
-sin_model = output_model[1:length]
-cos = output_cos[1:length]
-cos_model = output_model_cos[1:length]
-plt.plot(x, sin, x, sin_model, x, cos, x, cos_model)
-plt.show()
-
+import numpy as np
+import argparse
+import os
+import sys
+
+import importlib.util
+
+# Plots the captures of a simulation (out, out_cos, out_model, out_model_cos) written with DUMP_CAPTURE.
+# Only the window [start, stop) is read from the memory mapped .npy files and every trace is reduced to about
+# --points values with min/max decimation, so traces with millions of samples render quickly.
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+spec = importlib.util.spec_from_file_location('capture_file', os.path.join(root_dir, 'tools', 'capture_file.py'))
+capture_file = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(capture_file)
+
+NAMES = ('out', 'out_model', 'out_cos', 'out_model_cos')
+
+def minmax_decimate(data, points, offset=0):
+    # Min and max of every bucket in their original order, so that the envelope and single sample glitches
+    # stay visible. Returns the sample indices plus offset and the values, at most about points of each.
+    data = np.asarray(data)
+    if len(data) <= points:
+        return np.arange(len(data)) + offset, np.array(data)
+    size = -(-len(data) // max(points // 2, 1))
+    buckets = len(data) // size
+    full = data[:buckets * size].reshape(buckets, size)
+    index = np.stack((np.argmin(full, axis=1), np.argmax(full, axis=1)), axis=1)
+    index.sort(axis=1)
+    index = (index + np.arange(buckets)[:, None] * size).ravel()
+    if buckets * size < len(data):
+        tail = data[buckets * size:]
+        index = np.concatenate((index, np.sort([np.argmin(tail), np.argmax(tail)]) + buckets * size))
+    return index + offset, np.asarray(data[index])
+
+def capture_filename(directory, name):
+    # .npy captures, text files of older captures as fallback
+    filename = os.path.join(directory, name + '.npy')
+    return filename if os.path.isfile(filename) else os.path.join(directory, name + '.txt')
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Plots simulation captures')
+    parser.add_argument('--dir', metavar='path', required=False, default='.', help='directory of the captures')
+    parser.add_argument('--names', required=False, default=','.join(NAMES), help='comma separated capture names')
+    parser.add_argument('--start', required=False, type=int, default=0, help='first sample')
+    parser.add_argument('--stop', required=False, type=int, default=None, help='last sample + 1')
+    parser.add_argument('--points', required=False, type=int, default=4000, help='plotted points per trace')
+    args = parser.parse_args(args)
+
+    import matplotlib.pyplot as plt
+    for name in args.names.split(','):
+        filename = capture_filename(args.dir, name)
+        if not os.path.isfile(filename):
+            continue
+        x, y = minmax_decimate(capture_file.read_window(filename, args.start, args.stop), args.points, args.start)
+        plt.plot(x, y, label=name)
+    plt.legend()
+    plt.show()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+import numpy as np
+import argparse
+import json
+import sys
+
+# Spectral metrics of a single tone like the dds output: SFDR, SNR, SINAD, ENOB and the worst spur.
+# The spectrum is calculated with rfft, either over the whole capture (use coherent sampling and no window)
+# or averaged over segments (Welch) so that captures of any length only need memory for one chunk.
+# All powers are relative, so the metrics do not depend on the scaling of the data.
+
+def coherent_word(f, f_clk, n, ACCU_DW=32):
+    # Frequency control word close to f that has an odd number of periods in n samples, n must be a power of two.
+    # An odd number of periods is coprime to n, so every sample hits a different phase.
+    if n & (n - 1):
+        raise ValueError("n must be a power of two for coherent sampling")
+    periods = int(round(f / f_clk * n))
+    periods += 1 - periods % 2
+    return periods * (2**ACCU_DW // n)
+
+def get_window(window, n):
+    if window is None or window == 'rect':
+        return np.ones(n)
+    if window == 'hann':
+        # periodic hann window like scipy.signal.windows.hann(n, sym=False)
+        return 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)
+    if window == 'blackmanharris':
+        k = 2 * np.pi * np.arange(n) / n
+        return 0.35875 - 0.48829 * np.cos(k) + 0.14128 * np.cos(2 * k) - 0.01168 * np.cos(3 * k)
+    if window == 'kaiser':
+        # periodic kaiser window with beta = 20, side lobes are below -180 dB,
+        # which is needed to measure spurs of 16 bit and wider outputs
+        return np.kaiser(n + 1, 20)[:-1]
+    raise ValueError(f"unknown window {window}")
+
+# half width of the main lobe in bins, the power of a tone is summed over these bins
+MAINLOBE_BINS = {None: 0, 'rect': 0, 'hann': 2, 'blackmanharris': 4, 'kaiser': 8}
+
+def power_spectrum(data, window=None):
+    # one sided power spectrum, the sum over all bins is proportional to the mean power of the windowed data
+    data = np.asarray(data, dtype=np.float64)
+    w = get_window(window, len(data))
+    spectrum = np.abs(np.fft.rfft(data * w))**2
+    # bins other than dc and nyquist contain the power of the positive and the negative frequency
+    spectrum[1:(len(data) + 1) // 2] *= 2
+    return spectrum / (len(data) * np.sum(w**2))
+
+def welch(chunks, nperseg, window='kaiser', noverlap=None):
+    # Averaged power spectrum over segments of nperseg samples with noverlap samples overlap (default nperseg // 2).
+    # chunks is an iterable of arrays of any length, e.g. read_chunks(). Every chunk is consumed segment by segment,
+    # only the less than nperseg samples after the last segment are carried over to the next chunk.
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    step = nperseg - noverlap
+    carry = np.zeros(0)
+    total = np.zeros(nperseg // 2 + 1)
+    segments = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk)
+        start = 0
+        while start + nperseg <= len(carry) + len(chunk):
+            if start < len(carry):
+                # the segment starts in the samples carried over from the previous chunks
+                segment = np.concatenate((carry[start:], chunk[:start + nperseg - len(carry)]))
+            else:
+                segment = chunk[start - len(carry):start - len(carry) + nperseg]
+            total += power_spectrum(segment, window)
+            segments += 1
+            start += step
+        carry = np.concatenate((carry[start:], chunk[max(start - len(carry), 0):]))
+    if segments == 0:
+        raise ValueError(f"less than nperseg = {nperseg} samples")
+    return total / segments
+
+def read_chunks(filename, chunk_size=2**20, dtype=np.int16, start=0, stop=None):
+    # Yields chunks of a capture on disk. .npy files are memory mapped, other files are read as raw binary of dtype.
+    if filename.endswith('.npy'):
+        data = np.load(filename, mmap_mode='r')
+    else:
+        data = np.memmap(filename, dtype=dtype, mode='r')
+    stop = len(data) if stop is None else min(stop, len(data))
+    for i in range(start, stop, chunk_size):
+        yield np.array(data[i:min(i + chunk_size, stop)])
+
+def band(spectrum, k, width):
+    return slice(max(k - width, 0), min(k + width + 1, len(spectrum)))
+
+def metrics(spectrum, f_clk=1.0, window=None, harmonics=5, mainlobe_bins=None):
+    # Single tone metrics of a one sided power spectrum with n // 2 + 1 bins, returns a dict with
+    # sfdr_db (dBc), snr_db, sinad_db, thd_db, enob, the fundamental and the worst spur frequency.
+    spectrum = np.asarray(spectrum, dtype=np.float64)
+    width = MAINLOBE_BINS[window] if mainlobe_bins is None else mainlobe_bins
+    n = 2 * (len(spectrum) - 1)
+    df = f_clk / n
+
+    # dc and its leakage are ignored
+    used = np.ones(len(spectrum), dtype=bool)
+    used[band(spectrum, 0, width)] = False
+    k0 = int(np.argmax(np.where(used, spectrum, 0)))
+    signal_bins = band(spectrum, k0, width)
+    signal = spectrum[signal_bins].sum()
+    used[signal_bins] = False
+
+    # harmonics, folded into the first nyquist zone
+    harmonic_mask = np.zeros(len(spectrum), dtype=bool)
+    for h in range(2, harmonics + 2):
+        k = (h * k0) % n
+        k = min(k, n - k)
+        harmonic_mask[band(spectrum, k, width)] = True
+    harmonic_mask &= used
+    distortion = spectrum[harmonic_mask].sum()
+    noise_and_distortion = spectrum[used].sum()
+    noise = noise_and_distortion - distortion
+
+    # the worst spur is the largest bin outside of dc and the fundamental, summed over its main lobe
+    k_spur = int(np.argmax(np.where(used, spectrum, -1)))
+    spur = spectrum[band(spectrum, k_spur, width)][used[band(spectrum, k_spur, width)]].sum()
+
+    def db(ratio):
+        with np.errstate(divide='ignore'):
+            return float(10 * np.log10(ratio))
+    sinad = db(signal / noise_and_distortion)
+    return {
+        'frequency': k0 * df,
+        'signal_power': float(signal),
+        'sfdr_db': db(signal / spur),
+        'spur_frequency': k_spur * df,
+        'snr_db': db(signal / noise),
+        'sinad_db': sinad,
+        'thd_db': db(distortion / signal),
+        'enob': (sinad - 1.76) / 6.02,
+    }
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Spectral metrics of a dds capture')
+    parser.add_argument('filename', help='.npy file or raw binary capture')
+    parser.add_argument('--dtype', required=False, default='int16', help='sample type of raw binary files')
+    parser.add_argument('--f_clk', required=False, type=float, default=1.0, help='sample rate')
+    parser.add_argument('--nperseg', required=False, type=int, default=2**16, help='segment length of the welch average')
+    parser.add_argument('--window', required=False, default='kaiser', choices=['rect', 'hann', 'blackmanharris', 'kaiser'])
+    parser.add_argument('--chunk_size', required=False, type=int, default=2**20, help='samples read from disk at once')
+    args = parser.parse_args(args)
+
+    spectrum = welch(read_chunks(args.filename, args.chunk_size, np.dtype(args.dtype)), args.nperseg, args.window)
+    print(json.dumps(metrics(spectrum, args.f_clk, args.window), indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from multiprocessing.pool import ThreadPool
+
+import importlib.util
+
+# Resource sweep of dds.sv with yosys: every point of a PHASE_DW, OUT_DW, USE_TAYLOR, LUT_DW, SIN_COS grid is
+# synthesized with synth_xilinx for 7 series (like the yosys CI workflow) in parallel jobs. The cell statistics
+# are reduced to LUTs, FFs, carry chains, block rams and DSP48s, the logic depth is the longest topological
+# path in cells. The results are written as json and csv, optionally together with the accuracy numbers of
+# design_space.py, and can be compared to a previous run to find area and depth regressions per commit.
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DDS_SV = os.path.join(root_dir, 'hdl', 'dds.sv')
+
+# the process pool of design_space pickles the worker function by module name,
+# so an already loaded design_space module is used instead of a second copy
+design_space = sys.modules.get('design_space')
+if design_space is None:
+    spec = importlib.util.spec_from_file_location('design_space', os.path.join(root_dir, 'tools', 'design_space.py'))
+    design_space = importlib.util.module_from_spec(spec)
+    sys.modules['design_space'] = design_space
+    spec.loader.exec_module(design_space)
+
+# columns that are compared between runs, all of them are better if lower
+METRICS = ('luts', 'ffs', 'carry4', 'bram18', 'dsp48', 'lutram', 'srl', 'logic_depth')
+PARAMETERS = ('PHASE_DW', 'OUT_DW', 'USE_TAYLOR', 'LUT_DW', 'SIN_COS')
+
+def grid(PHASE_DWs, OUT_DWs, USE_TAYLORs, LUT_DWs, SIN_COSs):
+    return [dict(point, SIN_COS=SIN_COS) for point in design_space.grid(PHASE_DWs, OUT_DWs, USE_TAYLORs, LUT_DWs)
+            for SIN_COS in SIN_COSs]
+
+def point_key(point):
+    return ",".join(f"{k}={point[k]}" for k in PARAMETERS if k in point)
+
+def yosys_script(point, arch='xc7', source=DDS_SV):
+    # the parameters are set with chparam on the deferred module, so that dds.sv is elaborated only once
+    parameters = " ".join(f"-set {k} {v}" for k, v in point.items())
+    return "\n".join([
+        f"read_verilog -sv -defer {source}",
+        f"chparam {parameters} dds",
+        f"synth_xilinx -flatten -abc9 -arch {arch} -top dds",
+        "tee -q -o stat.json stat -json",
+        "tee -q -o ltp.txt ltp -noff",
+    ]) + "\n"
+
+def parse_stat(stat):
+    # cell counts of the flattened design from the output of stat -json
+    design = stat.get('design')
+    if design is None:
+        design = next(iter(stat['modules'].values()))
+    cells = design.get('num_cells_by_type', {})
+    def count(*names):
+        return sum(n for cell, n in cells.items() if cell.startswith(names))
+    return {
+        'cells': design.get('num_cells', sum(cells.values())),
+        'luts': count('LUT'),
+        'ffs': count('FD'),
+        'carry4': count('CARRY'),
+        # a RAMB36E1 is two RAMB18E1
+        'bram18': count('RAMB18') + 2 * count('RAMB36'),
+        'dsp48': count('DSP48'),
+        'lutram': count('RAM32', 'RAM64', 'RAM128', 'RAM256'),
+        'srl': count('SRL'),
+        'muxf': count('MUXF'),
+        'cells_by_type': dict(cells),
+    }
+
+def parse_ltp(text):
+    # length of the longest topological path in cells, None if ltp found none
+    lengths = [int(m) for m in re.findall(r'Longest topological path in \S+ \(length=(\d+)\)', text)]
+    return max(lengths) if lengths else None
+
+def synthesize(point, work_dir, arch='xc7', timeout=3600):
+    # synthesizes one point in work_dir, returns the point with its resources or with the error
+    os.makedirs(work_dir, exist_ok=True)
+    with open(os.path.join(work_dir, 'synth.ys'), 'w') as f:
+        f.write(yosys_script(point, arch))
+    result = dict(point)
+    start = time.perf_counter()
+    try:
+        subprocess.run(['yosys', '-q', '-l', 'yosys.log', '-s', 'synth.ys'], cwd=work_dir, check=True, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        with open(os.path.join(work_dir, 'stat.json')) as f:
+            result.update(parse_stat(json.load(f)))
+        with open(os.path.join(work_dir, 'ltp.txt')) as f:
+            result['logic_depth'] = parse_ltp(f.read())
+    except subprocess.TimeoutExpired:
+        result['error'] = f"timeout after {timeout} s"
+    except subprocess.CalledProcessError as e:
+        lines = (e.stderr or b'').decode(errors='replace').strip().splitlines()
+        result['error'] = lines[-1] if lines else 'yosys failed'
+    result['synth_seconds'] = time.perf_counter() - start
+    return result
+
+def sweep(points, work_dir, jobs=None, arch='xc7', timeout=3600):
+    # the jobs are yosys processes, so a thread pool is enough to run them in parallel
+    def run(point):
+        return synthesize(point, os.path.join(work_dir, point_key(point).replace(',', '_')), arch, timeout)
+    with ThreadPool(jobs or os.cpu_count()) as pool:
+        return pool.map(run, points, chunksize=1)
+
+def add_accuracy(results, jobs=None, max_phases=2**20):
+    # error and SFDR of the bit exact model from design_space.py, they do not depend on SIN_COS
+    points = [dict(PHASE_DW=r['PHASE_DW'], OUT_DW=r['OUT_DW'], USE_TAYLOR=r['USE_TAYLOR'], LUT_DW=r['LUT_DW']) for r in results]
+    unique = [dict(p) for p in {tuple(p.items()) for p in points}]
+    accuracy = {point_key(a): a for a in design_space.explore(unique, jobs, max_phases=max_phases)}
+    for r, p in zip(results, points):
+        a = accuracy[point_key(p)]
+        r.update({k: a[k] for k in ('max_error', 'rms_error', 'sfdr_db', 'sinad_db', 'enob', 'lut_bits')})
+    return results
+
+def metadata():
+    def output(args):
+        try:
+            return subprocess.run(args, cwd=root_dir, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': output(['git', 'rev-parse', 'HEAD']),
+        'yosys': output(['yosys', '-V']),
+    }
+
+def write_csv(filename, results):
+    columns = []
+    for r in results:
+        columns += [k for k in r if k not in columns and k != 'cells_by_type']
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+def compare(results, baseline, threshold=0.0):
+    # Returns (key, metric, baseline value, new value, regression) for every metric of the points in both runs.
+    # A metric regressed if it grew by more than threshold (relative).
+    old = {point_key(r): r for r in baseline}
+    rows = []
+    for r in results:
+        b = old.get(point_key(r))
+        if b is None:
+            continue
+        for metric in METRICS:
+            if r.get(metric) is None or b.get(metric) is None:
+                continue
+            rows.append((point_key(r), metric, b[metric], r[metric], r[metric] > b[metric] * (1 + threshold)))
+    return rows
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Synthesizes dds.sv with yosys for a parameter grid and collects the resources')
+    parser.add_argument('--PHASE_DW', required=False, default='16,20,24', help='phase widths, e.g. 16,20,24 or 12-24')
+    parser.add_argument('--OUT_DW', required=False, default='16', help='output widths')
+    parser.add_argument('--USE_TAYLOR', required=False, default='0,1', help='0, 1 or 0,1')
+    parser.add_argument('--LUT_DW', required=False, default='10', help='lut widths with taylor correction')
+    parser.add_argument('--SIN_COS', required=False, default='0,1', help='0, 1 or 0,1')
+    parser.add_argument('--arch', required=False, default='xc7', help='synth_xilinx architecture')
+    parser.add_argument('--jobs', required=False, type=int, default=None, help='parallel yosys jobs, default is one per cpu')
+    parser.add_argument('--timeout', required=False, type=int, default=3600, help='timeout of one synthesis in seconds')
+    parser.add_argument('--work_dir', metavar='path', required=False, default='synth_sweep', help='directory of the yosys runs')
+    parser.add_argument('--accuracy', action='store_true', help='add the error and SFDR of design_space.py to the results')
+    parser.add_argument('--output', metavar='path', required=False, default='synth_sweep.json', help='json file, the csv is written next to it')
+    parser.add_argument('--compare', metavar='path', required=False, default=None, help='json file of a previous run')
+    parser.add_argument('--threshold', required=False, type=float, default=0.0, help='relative growth that is flagged as regression')
+    args = parser.parse_args(args)
+
+    if shutil.which('yosys') is None:
+        print("yosys is not installed")
+        return 2
+    parse = design_space.parse_list
+    points = grid(parse(args.PHASE_DW), parse(args.OUT_DW), parse(args.USE_TAYLOR), parse(args.LUT_DW), parse(args.SIN_COS))
+    results = sweep(points, args.work_dir, args.jobs, args.arch, args.timeout)
+    if args.accuracy:
+        add_accuracy(results, args.jobs)
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=2)
+    write_csv(os.path.splitext(args.output)[0] + '.csv', results)
+
+    print(f"{'PHASE_DW':>8} {'OUT_DW':>6} {'TAYLOR':>6} {'LUT_DW':>6} {'SIN_COS':>7} {'LUT':>6} {'FF':>6} {'CARRY4':>6} "
+          f"{'BRAM18':>6} {'DSP48':>5} {'depth':>5}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['PHASE_DW']:8d} {r['OUT_DW']:6d} {r['USE_TAYLOR']:6d} {r['LUT_DW']:6d} {r['SIN_COS']:7d}  {r['error']}")
+            continue
+        print(f"{r['PHASE_DW']:8d} {r['OUT_DW']:6d} {r['USE_TAYLOR']:6d} {r['LUT_DW']:6d} {r['SIN_COS']:7d} {r['luts']:6d} "
+              f"{r['ffs']:6d} {r['carry4']:6d} {r['bram18']:6d} {r['dsp48']:5d} {r['logic_depth'] or 0:5d}")
+    print(f"results written to {args.output}")
+
+    failed = sum('error' in r for r in results)
+    if args.compare is None:
+        return 1 if failed else 0
+    with open(args.compare) as f:
+        baseline = json.load(f)['results']
+    regressions = 0
+    print(f"\ncompared to {args.compare}:")
+    for key, metric, old, new, regression in compare(results, baseline, args.threshold):
+        regressions += regression
+        if old != new:
+            print(f"{key:60s} {metric:12s} {old:8d} -> {new:8d} {'REGRESSION' if regression else ''}")
+    print(f"{regressions} regressions")
+    return 1 if regressions or failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))